@@ -0,0 +1,98 @@
+"""Micro-benchmark of the per-request SDK overhead.
+
+Reports the client-side CPU time of one `ChatCompletion.create` call with an N-message conversation: validating the
+request, building the body, encoding it and parsing the response. The network is replaced by an in-memory client
+that answers immediately, so only SDK work is measured.
+
+    python benchmarks/bench_request_overhead.py --messages 50 --calls 5000
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('DATABRICKS_HOST', 'https://benchmark.cloud.databricks.com')
+os.environ.setdefault('DATABRICKS_TOKEN', 'dapi-benchmark')
+
+from databricks_genai_inference import ChatCompletion  # pylint: disable=wrong-import-position
+from databricks_genai_inference.api.chat_history import MessageHistory  # pylint: disable=wrong-import-position
+
+RESPONSE = json.dumps({
+    "id": "chatcmpl-benchmark",
+    "object": "chat.completion",
+    "model": "dbrx-instruct",
+    "choices": [{
+        "index": 0,
+        "message": {
+            "role": "assistant",
+            "content": "Hello!"
+        },
+        "finish_reason": "stop"
+    }],
+    "usage": {
+        "prompt_tokens": 10,
+        "completion_tokens": 2,
+        "total_tokens": 12
+    },
+}).encode()
+
+
+class InMemoryResponse:
+    status_code = 200
+    ok = True
+    headers = {}
+
+    def json(self):
+        return json.loads(RESPONSE)
+
+    def close(self):
+        pass
+
+
+class InMemoryClient:
+    """Stands in for a `requests.Session`, answering every request immediately."""
+
+    def post(self, **kwargs):
+        return InMemoryResponse()
+
+
+def make_messages(num_messages: int):
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(num_messages - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i}: " + "lorem ipsum dolor sit amet " * 8})
+    return messages
+
+
+def bench(label: str, calls: int, create=ChatCompletion.create, **kwargs):
+    client = InMemoryClient()
+    for _ in range(min(calls, 100)):
+        create(client=client, **kwargs)
+    start = time.process_time()
+    for _ in range(calls):
+        create(client=client, **kwargs)
+    elapsed = time.process_time() - start
+    print(f'{label:>32}: {elapsed / calls * 1e6:8.1f} us/call')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    request = {"model": "dbrx-instruct", "messages": messages, "max_tokens": 128, "temperature": 0.7}
+    bench(f'list of {args.messages} messages', args.calls, **request)
+    bench(f'MessageHistory of {args.messages}', args.calls, **{**request, "messages": MessageHistory(messages)})
+    if hasattr(ChatCompletion, 'prepare'):
+        prepared = ChatCompletion.prepare(model="dbrx-instruct", max_tokens=128, temperature=0.7)
+        bench(f'list of {args.messages}, prepared', args.calls, create=prepared, messages=messages)
+        bench(f'MessageHistory of {args.messages}, prepared',
+              args.calls,
+              create=prepared,
+              messages=MessageHistory(messages))
+
+
+if __name__ == '__main__':
+    main()
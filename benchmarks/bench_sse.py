@@ -0,0 +1,106 @@
+"""Micro-benchmark of the streaming response parser.
+
+Reports parsed chunks/sec for the sync and async streaming paths, fed from an in-memory SSE stream split into
+network-sized pieces, next to the line-by-line parser the SDK used before. The parsers take turns over `--repeat`
+rounds, and the median is reported with the spread of the rounds; differences within that spread are noise.
+
+    python benchmarks/bench_sse.py --chunks 20000 --piece-size 1400 --repeat 15
+
+Large chunks read in small pieces show the cost of re-scanning unfinished lines:
+
+    python benchmarks/bench_sse.py --chunks 200 --content-size 50000 --piece-size 64
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from databricks_genai_inference.api.sse import aiter_json, iter_json
+
+
+def make_stream(num_chunks: int, content_size: int) -> bytes:
+    chunks = []
+    for i in range(num_chunks):
+        chunk = {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion.chunk",
+            "model": "dbrx-instruct",
+            "choices": [{
+                "index": 0,
+                "delta": {
+                    "role": "assistant",
+                    "content": f" token{i}".ljust(content_size, "x")
+                },
+                "finish_reason": None
+            }],
+        }
+        chunks.append(f"data: {json.dumps(chunk)}\n\n".encode())
+    chunks.append(b"data: [DONE]\n\n")
+    return b"".join(chunks)
+
+
+def split(data: bytes, piece_size: int):
+    return [data[i:i + piece_size] for i in range(0, len(data), piece_size)]
+
+
+def legacy_iter_json(pieces):
+    """The parser used before: requests' iter_lines, then per-line decode, prefix strip and json.loads."""
+    pending = None
+    for piece in pieces:
+        if pending is not None:
+            piece = pending + piece
+        lines = piece.splitlines()
+        pending = lines.pop() if lines and piece and lines[-1] and piece[-1] == lines[-1][-1] else None
+        for line in lines:
+            if line:
+                line = line.decode('utf-8')
+                if line.startswith("data: "):
+                    line = line[len("data: "):]
+                if line == '[DONE]':
+                    return
+                loaded_json = json.loads(line)
+                if loaded_json:
+                    yield loaded_json
+
+
+async def aiter_pieces(pieces):
+    for piece in pieces:
+        yield piece
+
+
+async def count_async(pieces):
+    return sum([1 async for _ in aiter_json(aiter_pieces(pieces))])
+
+
+def report(name: str, num_chunks: int, seconds: list):
+    rates = sorted(num_chunks / elapsed for elapsed in seconds)
+    print(f"{name:<10} {statistics.median(rates):>12,.0f} chunks/sec (min {rates[0]:,.0f}, max {rates[-1]:,.0f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000, help="number of stream chunks")
+    parser.add_argument("--content-size", type=int, default=0, help="minimum characters of content per chunk")
+    parser.add_argument("--piece-size", type=int, default=1400, help="bytes per network read")
+    parser.add_argument("--repeat", type=int, default=15, help="rounds; the median is reported")
+    args = parser.parse_args()
+
+    pieces = split(make_stream(args.chunks, args.content_size), args.piece_size)
+    runs = {
+        "legacy": lambda: sum(1 for _ in legacy_iter_json(pieces)),
+        "sync": lambda: sum(1 for _ in iter_json(pieces)),
+        "async": lambda: asyncio.run(count_async(pieces)),
+    }
+    seconds = {name: [] for name in runs}
+    for _ in range(args.repeat):
+        for name, run in runs.items():
+            start = time.perf_counter()
+            assert run() == args.chunks
+            seconds[name].append(time.perf_counter() - start)
+    for name in runs:
+        report(name, args.chunks, seconds[name])
+
+
+if __name__ == "__main__":
+    main()
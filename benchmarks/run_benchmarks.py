@@ -0,0 +1,293 @@
+"""End-to-end benchmarks against a local stand-in serving endpoint.
+
+Starts `benchmarks/server.py` in a subprocess and sends chat, streaming chat and embedding requests to it through the
+SDK, in four modes:
+
+- sync-pooled: `create` with the connection pool managed by the library;
+- sync-unpooled: `create` with a new `requests.Session` per call;
+- async-pooled: `acreate` with the connection pool managed by the library;
+- async-unpooled: `acreate` with a new `httpx.AsyncClient` per call.
+
+Each scenario runs in a process of its own and reports the requests/sec, the latency percentiles, the CPU time per
+call of that process (the SDK and its HTTP stack; the server runs in another process), the chunks/sec of streams and
+the peak resident memory of the process. Results are written as JSON, and a previous result file can be given to
+compare against:
+
+    python benchmarks/run_benchmarks.py --calls 2000 --concurrency 8 --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Tuple
+
+import httpx
+import requests
+
+from databricks_genai_inference import ChatCompletion, Embedding
+from databricks_genai_inference.version import __version__
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+WORKLOADS = ('chat', 'stream', 'embedding')
+MODES = ('sync-pooled', 'sync-unpooled', 'async-pooled', 'async-unpooled')
+
+
+def make_requests(args) -> dict:
+    """
+    Returns the API resource and the request of every workload.
+    """
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(args.messages - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i}: " + "lorem ipsum dolor sit amet " * 8})
+    chat = {"model": "dbrx-instruct", "messages": messages, "max_tokens": args.response_tokens}
+    return {
+        'chat': (ChatCompletion, chat),
+        'stream': (ChatCompletion, {
+            **chat, "stream": True
+        }),
+        'embedding': (Embedding, {
+            "model": "bge-large-en",
+            "input": [f"Sentence {i}: lorem ipsum dolor sit amet" for i in range(args.embedding_batch)]
+        }),
+    }
+
+
+def sync_call(api, request: dict, pooled: bool) -> int:
+    """
+    Sends one request, reading the whole stream if any. Returns the number of chunks.
+    """
+    client = None if pooled else requests.Session()
+    try:
+        response = api.create(client=client, **request)
+        return sum(1 for _ in response) if request.get('stream') else 0
+    finally:
+        if client is not None:
+            client.close()
+
+
+async def async_call(api, request: dict, pooled: bool) -> int:
+    """
+    Sends one request asynchronously, reading the whole stream if any. Returns the number of chunks.
+    """
+    client = None if pooled else httpx.AsyncClient()
+    try:
+        response = await api.acreate(client=client, **request)
+        if not request.get('stream'):
+            return 0
+        chunks = 0
+        async for _ in response:
+            chunks += 1
+        return chunks
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+def run_sync(api, request: dict, pooled: bool, calls: int, concurrency: int):
+    latencies, chunks, errors = [], 0, 0
+
+    def timed_call():
+        start = time.perf_counter()
+        result = sync_call(api, request, pooled)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(timed_call) for _ in range(calls)]:
+            try:
+                chunks += future.result()
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+    return latencies, chunks, errors
+
+
+def run_async(api, request: dict, pooled: bool, calls: int, concurrency: int):
+    latencies = []
+
+    async def timed_call(semaphore: asyncio.Semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await async_call(api, request, pooled)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(timed_call(semaphore) for _ in range(calls)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    errors = sum(1 for result in results if isinstance(result, BaseException))
+    chunks = sum(result for result in results if not isinstance(result, BaseException))
+    return latencies, chunks, errors
+
+
+def percentile(values, fraction: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def bench(workload: str, mode: str, args) -> dict:
+    """
+    Runs one scenario after a warmup and returns its results. Meant to run in a process of its own, whose peak RSS is
+    then the scenario's.
+    """
+    api, request = make_requests(args)[workload]
+    run = run_async if mode.startswith('async') else run_sync
+    pooled = mode.endswith('-pooled')
+    if args.warmup:
+        run(api, request, pooled, args.warmup, args.concurrency)
+    gc.collect()
+    if args.trace_memory:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    latencies, chunks, errors = run(api, request, pooled, args.calls, args.concurrency)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    traced_peak = None
+    if args.trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'workload': workload,
+        'mode': mode,
+        'calls': args.calls,
+        'errors': errors,
+        'wall_time': wall,
+        'requests_per_sec': args.calls / wall,
+        'cpu_us_per_call': cpu / args.calls * 1e6,
+        'latency_p50_ms': percentile(latencies, 0.5) * 1e3 if latencies else None,
+        'latency_p99_ms': percentile(latencies, 0.99) * 1e3 if latencies else None,
+        'chunks_per_sec': chunks / wall if request.get('stream') else None,
+        'max_rss_bytes': max_rss_bytes(),
+        'traced_peak_bytes': traced_peak,
+    }
+
+
+def bench_in_subprocess(workload: str, mode: str, args) -> dict:
+    """
+    Runs one scenario in a new process: `ru_maxrss` only ever grows, so scenarios sharing a process would all report
+    the largest peak of the ones before them.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(bench, workload, mode, args).result()
+
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    """
+    Starts the stand-in serving endpoint and returns its process and URL.
+    """
+    options = {
+        '--latency-ms': args.latency_ms,
+        '--response-tokens': args.response_tokens,
+        '--stream-chunks': args.stream_chunks,
+        '--chunk-delay-ms': args.chunk_delay_ms,
+        '--embedding-dim': args.embedding_dim,
+        # Unpooled clients open a connection per call: keep the listen backlog well above the calls in flight.
+        '--backlog': max(128, 4 * args.concurrency),
+    }
+    command = [sys.executable, SERVER, '--port', '0', *(str(item) for option in options.items() for item in option)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = server.stdout.readline().strip()
+    if not url:
+        server.kill()
+        raise RuntimeError('The benchmark server did not start')
+    return server, url
+
+
+def print_results(results, baseline=None):
+    baseline = {(result['workload'], result['mode']): result for result in baseline or []}
+    print(f'{"scenario":>26} {"req/s":>9} {"cpu us/call":>12} {"p50 ms":>8} {"p99 ms":>8} {"chunks/s":>10} '
+          f'{"rss MB":>7} {"errors":>6}' + (f' {"req/s ratio":>12} {"cpu ratio":>10}' if baseline else ''))
+    for result in results:
+        chunks_per_sec = result['chunks_per_sec']
+        line = (f'{result["workload"] + " " + result["mode"]:>26} {result["requests_per_sec"]:9.1f} '
+                f'{result["cpu_us_per_call"]:12.1f} {result["latency_p50_ms"] or 0:8.2f} '
+                f'{result["latency_p99_ms"] or 0:8.2f} {chunks_per_sec or 0:10.0f} '
+                f'{(result["max_rss_bytes"] or 0) / 2**20:7.1f} {result["errors"]:6d}')
+        previous = baseline.get((result['workload'], result['mode']))
+        if previous:
+            line += (f' {result["requests_per_sec"] / previous["requests_per_sec"]:12.2f}'
+                     f' {result["cpu_us_per_call"] / previous["cpu_us_per_call"]:10.2f}')
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=1000, help='calls per scenario')
+    parser.add_argument('--warmup', type=int, default=50, help='calls before each scenario, not measured')
+    parser.add_argument('--concurrency', type=int, default=8, help='calls in flight at once')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help='comma-separated, of: ' + ', '.join(WORKLOADS))
+    parser.add_argument('--modes', default=','.join(MODES), help='comma-separated, of: ' + ', '.join(MODES))
+    parser.add_argument('--messages', type=int, default=10, help='messages in the chat requests')
+    parser.add_argument('--embedding-batch', type=int, default=16, help='inputs per embedding request')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='server delay before each response')
+    parser.add_argument('--response-tokens', type=int, default=64, help='tokens per completion')
+    parser.add_argument('--stream-chunks', type=int, default=64, help='chunks per streamed completion')
+    parser.add_argument('--chunk-delay-ms', type=float, default=0.0, help='server delay between stream chunks')
+    parser.add_argument('--embedding-dim', type=int, default=1024, help='dimension of the embeddings')
+    parser.add_argument('--trace-memory', action='store_true', help='report the peak of traced Python allocations')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='a JSON file of previous results to compare against')
+    args = parser.parse_args()
+
+    workloads = [workload for workload in args.workloads.split(',') if workload]
+    modes = [mode for mode in args.modes.split(',') if mode]
+    for name, known in ((workloads, WORKLOADS), (modes, MODES)):
+        unknown = set(name) - set(known)
+        if unknown:
+            parser.error(f'unknown: {", ".join(sorted(unknown))}')
+
+    server, url = start_server(args)
+    os.environ.pop('DATABRICKS_MODEL_URL', None)
+    os.environ['DATABRICKS_HOST'] = url
+    os.environ['DATABRICKS_TOKEN'] = 'dapi-benchmark'
+    try:
+        results = [bench_in_subprocess(workload, mode, args) for workload in workloads for mode in modes]
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.output:
+        metadata = {
+            'version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': datetime.now(timezone.utc).isoformat(),
+            'args': vars(args),
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
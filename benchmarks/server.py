@@ -0,0 +1,224 @@
+"""Local stand-in for a Databricks model serving endpoint, for benchmarks.
+
+Serves `POST /serving-endpoints/<name>/invocations` for any endpoint name:
+
+- requests with an `input` get one embedding of `--embedding-dim` floats per input;
+- requests with `"stream": true` get `--stream-chunks` SSE chunks, sent `--chunk-delay-ms` apart;
+- other requests get a chat completion, or a text completion if they have a `prompt`, of `--response-tokens` tokens.
+
+Every response is delayed by `--latency-ms`. Connections are kept alive. The server prints the URL it listens on,
+which is on a free port with `--port 0`.
+
+    python benchmarks/server.py --port 8000 --latency-ms 20 --stream-chunks 100
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+INVOCATIONS_PATH = re.compile(r'^/serving-endpoints/(?P<endpoint>[^/]+)/invocations$')
+
+
+class ServerConfig(NamedTuple):
+    """
+    The shape and timing of the responses.
+
+    Attributes:
+        latency_ms (float): The delay before each response.
+        response_tokens (int): The number of tokens of a completion.
+        stream_chunks (int): The number of chunks of a streamed completion.
+        chunk_delay_ms (float): The delay between two chunks of a stream.
+        embedding_dim (int): The dimension of the embeddings.
+    """
+    latency_ms: float = 0.0
+    response_tokens: int = 64
+    stream_chunks: int = 64
+    chunk_delay_ms: float = 0.0
+    embedding_dim: int = 1024
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens
+    }
+
+
+def make_response(endpoint: str, body: dict, config: ServerConfig) -> dict:
+    """
+    Returns the non-streaming response to a request.
+    """
+    if 'input' in body:
+        inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+        embedding = [round(i / config.embedding_dim, 6) for i in range(config.embedding_dim)]
+        return {
+            'object': 'list',
+            'model': endpoint,
+            'data': [{
+                'object': 'embedding',
+                'index': index,
+                'embedding': embedding
+            } for index in range(len(inputs))],
+            'usage': _usage(sum(len(str(text)) // 4 for text in inputs), 0),
+        }
+    text = ' '.join(f'token{i}' for i in range(config.response_tokens))
+    if 'prompt' in body:
+        choice = {'index': 0, 'text': text, 'finish_reason': 'stop'}
+        prompt_tokens = len(str(body['prompt'])) // 4
+    else:
+        choice = {'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}
+        prompt_tokens = sum(len(str(message.get('content', ''))) // 4 for message in body.get('messages') or [])
+    return {
+        'id': 'benchmark',
+        'object': 'chat.completion',
+        'model': endpoint,
+        'choices': [choice],
+        'usage': _usage(prompt_tokens, config.response_tokens),
+    }
+
+
+def make_chunk(endpoint: str, body: dict, index: int, config: ServerConfig) -> dict:
+    """
+    Returns a chunk of the streaming response to a request.
+    """
+    last = index == config.stream_chunks - 1
+    if 'prompt' in body:
+        choice = {'index': 0, 'text': f' token{index}', 'finish_reason': 'stop' if last else None}
+    else:
+        choice = {'index': 0, 'delta': {'content': f' token{index}'}, 'finish_reason': 'stop' if last else None}
+    chunk = {'id': 'benchmark', 'object': 'chat.completion.chunk', 'model': endpoint, 'choices': [choice]}
+    if last:
+        chunk['usage'] = _usage(0, config.stream_chunks)
+    return chunk
+
+
+def make_handler(config: ServerConfig):
+    """
+    Returns a request handler class serving responses shaped by `config`.
+    """
+
+    class InvocationsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; without this, delayed ACKs add ~40 ms to kept-alive requests.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            match = INVOCATIONS_PATH.match(self.path)
+            if match is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {'error_code': 'NOT_FOUND', 'message': self.path})
+                return
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError as e:
+                self._send_json(HTTPStatus.BAD_REQUEST, {'error_code': 'BAD_REQUEST', 'message': str(e)})
+                return
+            if config.latency_ms:
+                time.sleep(config.latency_ms / 1000)
+            endpoint = match.group('endpoint')
+            if request.get('stream'):
+                self._send_stream(endpoint, request)
+            else:
+                self._send_json(HTTPStatus.OK, make_response(endpoint, request, config))
+
+        def _send_json(self, status: HTTPStatus, payload: dict):
+            encoded = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def _send_stream(self, endpoint: str, request: dict):
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for index in range(config.stream_chunks):
+                if index and config.chunk_delay_ms:
+                    time.sleep(config.chunk_delay_ms / 1000)
+                self._write_chunk(f'data: {json.dumps(make_chunk(endpoint, request, index, config))}\n\n'.encode())
+            self._write_chunk(b'data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+    return InvocationsHandler
+
+
+class BenchmarkServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 is below the benchmark concurrency: connections beyond it wait about a second for the
+    # kernel to retry them, which shows up as client latency.
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients closing their connections, e.g. unpooled ones, are expected.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(config: ServerConfig,
+                host: str = '127.0.0.1',
+                port: int = 0,
+                backlog: int = BenchmarkServer.request_queue_size) -> BenchmarkServer:
+    """
+    Returns a stand-in serving endpoint server bound to `host` and `port`, not yet serving.
+
+    Args:
+        config (ServerConfig): The shape and timing of the responses.
+        host (str): The interface to listen on.
+        port (int): The port to listen on, or 0 for a free one.
+        backlog (int): The maximum number of connections waiting to be accepted. Keep it above the client concurrency.
+    """
+    server = BenchmarkServer((host, port), make_handler(config), bind_and_activate=False)
+    server.request_queue_size = backlog
+    try:
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='0 picks a free port')
+    parser.add_argument('--backlog', type=int, default=BenchmarkServer.request_queue_size, help='listen backlog')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='delay before each response')
+    parser.add_argument('--response-tokens', type=int, default=64, help='tokens per completion')
+    parser.add_argument('--stream-chunks', type=int, default=64, help='chunks per streamed completion')
+    parser.add_argument('--chunk-delay-ms', type=float, default=0.0, help='delay between stream chunks')
+    parser.add_argument('--embedding-dim', type=int, default=1024, help='dimension of the embeddings')
+    args = parser.parse_args()
+
+    config = ServerConfig(latency_ms=args.latency_ms,
+                          response_tokens=args.response_tokens,
+                          stream_chunks=args.stream_chunks,
+                          chunk_delay_ms=args.chunk_delay_ms,
+                          embedding_dim=args.embedding_dim)
+    server = make_server(config, args.host, args.port, args.backlog)
+    print(f'http://{args.host}:{server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
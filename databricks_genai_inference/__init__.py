@@ -1,12 +1,29 @@
 """Databricks Generative AI Inference Package
 """
-from databricks_genai_inference.api import (ChatCompletion, ChatCompletionChunkObject, ChatCompletionObject,
-                                            ChatSession, Completion, CompletionChunkObject, CompletionObject, Embedding,
-                                            EmbeddingObject, FoundationModelAPIException)
+from typing import TYPE_CHECKING
 
 from .version import __version__
 
+if TYPE_CHECKING:
+    from databricks_genai_inference.api import (ChatCompletion, ChatCompletionChunkObject, ChatCompletionObject,
+                                                ChatSession, Completion, CompletionChunkObject, CompletionObject,
+                                                Embedding, EmbeddingObject, FoundationModelAPIException)
+
 __all__ = [
     "ChatCompletion", "ChatSession", "Completion", "Embedding", "FoundationModelAPIException", "ChatCompletionObject",
     "ChatCompletionChunkObject", "CompletionObject", "CompletionChunkObject", "EmbeddingObject"
 ]
+
+
+def __getattr__(name):
+    # The API is imported on first use, as its dependencies take long to import.
+    if name not in __all__:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    from databricks_genai_inference import api  # pylint: disable=import-outside-toplevel
+    value = getattr(api, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
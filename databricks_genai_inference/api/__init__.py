@@ -1,12 +1,45 @@
 """ API module for databricks_genai_inference package.
+
+The resources and response objects are imported on first use, so that importing the package does not import its
+dependencies.
 """
-from databricks_genai_inference.api.chat_completion import ChatCompletion
-from databricks_genai_inference.api.chat_session import ChatSession
-from databricks_genai_inference.api.completion import Completion
-from databricks_genai_inference.api.embedding import Embedding
-from databricks_genai_inference.api.exception import FoundationModelAPIException
-from databricks_genai_inference.api.objects.chat_completion_chunk_object import ChatCompletionChunkObject
-from databricks_genai_inference.api.objects.chat_completion_object import ChatCompletionObject
-from databricks_genai_inference.api.objects.completion_chunk_object import CompletionChunkObject
-from databricks_genai_inference.api.objects.completion_object import CompletionObject
-from databricks_genai_inference.api.objects.embedding_object import EmbeddingObject
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from databricks_genai_inference.api.chat_completion import ChatCompletion
+    from databricks_genai_inference.api.chat_session import ChatSession
+    from databricks_genai_inference.api.completion import Completion
+    from databricks_genai_inference.api.embedding import Embedding
+    from databricks_genai_inference.api.exception import FoundationModelAPIException
+    from databricks_genai_inference.api.objects.chat_completion_chunk_object import ChatCompletionChunkObject
+    from databricks_genai_inference.api.objects.chat_completion_object import ChatCompletionObject
+    from databricks_genai_inference.api.objects.completion_chunk_object import CompletionChunkObject
+    from databricks_genai_inference.api.objects.completion_object import CompletionObject
+    from databricks_genai_inference.api.objects.embedding_object import EmbeddingObject
+
+_LAZY_ATTRIBUTES = {
+    'ChatCompletion': 'databricks_genai_inference.api.chat_completion',
+    'ChatSession': 'databricks_genai_inference.api.chat_session',
+    'Completion': 'databricks_genai_inference.api.completion',
+    'Embedding': 'databricks_genai_inference.api.embedding',
+    'FoundationModelAPIException': 'databricks_genai_inference.api.exception',
+    'ChatCompletionChunkObject': 'databricks_genai_inference.api.objects.chat_completion_chunk_object',
+    'ChatCompletionObject': 'databricks_genai_inference.api.objects.chat_completion_object',
+    'CompletionChunkObject': 'databricks_genai_inference.api.objects.completion_chunk_object',
+    'CompletionObject': 'databricks_genai_inference.api.objects.completion_object',
+    'EmbeddingObject': 'databricks_genai_inference.api.objects.embedding_object',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
@@ -1,24 +1,55 @@
 """Foundation Model API Resource.
 """
 import asyncio
+import functools
+import itertools
 import json as json_lib
 import os
-from typing import Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from http import HTTPStatus
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
 
 import httpx
 import requests
-from databricks.sdk import WorkspaceClient
 from pydantic import BaseModel, ConfigDict, ValidationError
-from tenacity import retry, retry_if_result, stop_after_attempt, wait_random_exponential
 
 from databricks_genai_inference.api.abstract.api_resource import APIResource
 from databricks_genai_inference.api.abstract.foundation_model_object import FoundationModelObject
+from databricks_genai_inference.api.cache import get_response_cache
+from databricks_genai_inference.api.credentials import (Credentials, aget_credentials, get_credentials,
+                                                        invalidate_credentials)
+from databricks_genai_inference.api.endpoints import (DATABRICKS_HOST_ENV, DATABRICKS_MODEL_URL_ENV, MODEL_URL_TEMPLATE,
+                                                      get_endpoint_registry)
 from databricks_genai_inference.api.exception import FoundationModelAPIException
-from databricks_genai_inference.api.util import asend_request, is_internal_server_error, send_request
+from databricks_genai_inference.api.hooks import (RequestHook, RequestTrace, add_hook, current_trace, get_hooks,
+                                                  remove_hook)
+from databricks_genai_inference.api.rate_limit import estimate_request_tokens, get_rate_limiter
+from databricks_genai_inference.api.retry import RetryPolicy
+from databricks_genai_inference.api.singleflight import get_single_flight
+from databricks_genai_inference.api.sse import aiter_json, iter_json
+from databricks_genai_inference.api.transport import get_async_pool
+from databricks_genai_inference.api.util import asend_request, send_request
+
+if TYPE_CHECKING:
+    from databricks_genai_inference.api.prepared_request import PreparedRequest
+
+AUTH_ERROR_STATUSES = (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
+DEFAULT_CONCURRENCY = 8
+REQUEST_HEADERS = {
+    'Content-Type': 'application/json',
+    'X-Databricks-Endpoints-API-Client': 'Generative AI Inference (Mosaic) SDK'
+}
+
+
+def request_headers(credentials: Credentials) -> dict:
+    """
+    Returns the headers of a request: the library headers, overridden by the auth headers of the credentials.
 
-DATABRICKS_MODEL_URL_ENV = 'DATABRICKS_MODEL_URL'
-DATABRICKS_HOST_ENV = 'DATABRICKS_HOST'
-MODEL_URL_TEMPLATE = '{host}/serving-endpoints/{endpoint}/invocations'
+    Args:
+        credentials (Credentials): The resolved credentials.
+    """
+    return REQUEST_HEADERS | credentials.headers
 
 
 def get_url(
@@ -28,6 +59,9 @@ def get_url(
     """
     Returns the URL for the API.
 
+    Requests are routed with the endpoint registry, see `databricks_genai_inference.api.endpoints`. Unlike the
+    registry, this reads the environment on every call.
+
     Args:
         host (str): The host for the API.
         endpoint (str): The model endpoint id for the API.
@@ -54,7 +88,7 @@ class FoundationModelAPIInput(BaseModel):
     Attributes:
         model (str): The name of the model to use.
         timeout (Optional[int]): The timeout for the API request.
-        max_retries (Optional[int]): The maximum number of retries for the API request.
+        max_retries (Optional[int]): The maximum number of attempts for the API request, including the first one.
     """
     model_config = ConfigDict(extra='forbid')
 
@@ -69,7 +103,10 @@ class FoundationModelAPIResource(APIResource):
 
     Attributes:
         SUPPORTED_MODEL_LIST (list): A list of supported models.
+        SUPPORTED_MODELS (frozenset): The supported models, sent to their pay-per-token endpoints.
         DEFAULT_TIMEOUT (int): The default timeout for API requests.
+        MAX_RETRIES (int): The default maximum number of attempts for API requests.
+        retry_policy (RetryPolicy): The policy deciding which failed attempts are retried, and when.
         model_input (FoundationModelAPIInput): The input schema for the API.
         model_output (FoundationModelObject): The output schema for the API.
         model_streaming_output (FoundationModelObject): The streaming output schema for the API.
@@ -77,8 +114,10 @@ class FoundationModelAPIResource(APIResource):
     """
 
     SUPPORTED_MODEL_LIST = []
+    SUPPORTED_MODELS = frozenset()
     DEFAULT_TIMEOUT = 60
-    MAX_RETRIES = 1
+    MAX_RETRIES = 3
+    retry_policy = RetryPolicy()
     model_input = FoundationModelAPIInput
     model_output = FoundationModelObject
     model_streaming_output = FoundationModelObject
@@ -97,6 +136,128 @@ class FoundationModelAPIResource(APIResource):
         api_input, endpoint = cls._parse_and_validate_request(**kwargs)
         return cls._make_query(client, api_input, endpoint)
 
+    @classmethod
+    def prepare(cls, **kwargs) -> 'PreparedRequest':
+        """
+        Prepares a request template for repeated calls with the same parameters.
+
+        The parameters given here are validated and encoded once, and the URL and headers are resolved once per
+        credential refresh, so each call only validates and encodes the parameters it adds.
+
+        Args:
+        **kwargs: The keyword arguments fixed for every call, including `model`.
+
+        Returns:
+        A thread-safe callable taking the other keyword arguments, with an async variant `acall`.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from databricks_genai_inference.api.prepared_request import PreparedRequest
+        return PreparedRequest(cls, **kwargs)
+
+    @classmethod
+    def add_hook(cls, hook: RequestHook):
+        """
+        Notifies a hook of the requests of this resource, and of its subclasses. Hooks added to
+        `FoundationModelAPIResource` observe every resource.
+
+        Args:
+        hook (RequestHook): The hook.
+        """
+        add_hook(cls, hook)
+
+    @classmethod
+    def remove_hook(cls, hook: RequestHook):
+        """
+        Stops notifying a hook of the requests of this resource.
+
+        Args:
+        hook (RequestHook): The hook, as added to this resource.
+        """
+        remove_hook(cls, hook)
+
+    @classmethod
+    def create_many(cls,
+                    request_kwargs: Iterable[dict],
+                    max_workers: int = DEFAULT_CONCURRENCY,
+                    executor: Optional[Executor] = None,
+                    client: requests.Session = None) -> List[Union[FoundationModelObject, FoundationModelAPIException]]:
+        """
+        Creates many API responses concurrently on a thread pool.
+
+        A failed request does not abort the others: its `FoundationModelAPIException` is returned in its place.
+
+        Args:
+        request_kwargs (Iterable[dict]): The keyword arguments of each request, as for `create`.
+        max_workers (int): The maximum number of requests in flight.
+        executor (Optional[Executor]): The executor to run the requests on. Defaults to a thread pool of `max_workers`
+            threads, shut down once all requests completed.
+        client (requests.Session): The session shared by all requests. It must be safe to use from several threads.
+            Defaults to the pooled session.
+
+        Returns:
+        The response or exception of each request, in input order.
+        """
+        results = {}
+        for index, result in cls.create_as_completed(request_kwargs, max_workers=max_workers, executor=executor,
+                                                     client=client):
+            results[index] = result
+        return [results[index] for index in range(len(results))]
+
+    @classmethod
+    def create_as_completed(
+        cls,
+        request_kwargs: Iterable[dict],
+        max_workers: int = DEFAULT_CONCURRENCY,
+        executor: Optional[Executor] = None,
+        client: requests.Session = None
+    ) -> Iterator[Tuple[int, Union[FoundationModelObject, FoundationModelAPIException]]]:
+        """
+        Creates many API responses concurrently on a thread pool and yields them as they complete.
+
+        Requests are read lazily, so `request_kwargs` may be a generator of any length. A failed request does not abort
+        the others: its `FoundationModelAPIException` is yielded in its place. Leaving the loop early cancels the
+        requests not started yet.
+
+        Args:
+        request_kwargs (Iterable[dict]): The keyword arguments of each request, as for `create`.
+        max_workers (int): The maximum number of requests in flight.
+        executor (Optional[Executor]): The executor to run the requests on. Defaults to a thread pool of `max_workers`
+            threads, shut down once all requests completed.
+        client (requests.Session): The session shared by all requests. It must be safe to use from several threads.
+            Defaults to the pooled session.
+
+        Returns:
+        An iterator of (input index, response or exception) pairs.
+        """
+        if max_workers < 1:
+            raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+        owns_executor = executor is None
+        if owns_executor:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{cls.__name__}.create_many')
+        pending = enumerate(request_kwargs)
+        in_flight = {}
+        try:
+            while True:
+                for index, kwargs in itertools.islice(pending, max_workers - len(in_flight)):
+                    in_flight[executor.submit(cls._create_or_error, client, kwargs)] = index
+                if not in_flight:
+                    return
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if owns_executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _create_or_error(cls, client: requests.Session, kwargs: dict):
+        try:
+            return cls.create(client=client, **kwargs)
+        except FoundationModelAPIException as e:
+            return e
+
     @classmethod
     def _parse_and_validate_request(cls, **kwargs) -> FoundationModelAPIInput:
         """
@@ -113,15 +274,20 @@ class FoundationModelAPIResource(APIResource):
         """
         try:
             api_input = cls.model_input(**kwargs)
-            # If this is a 'supported' model, map it to a pay-per-token name. Otherwise assume this is a custom endpoint.
-            if api_input.model in cls.SUPPORTED_MODEL_LIST:
-                endpoint = f'databricks-{api_input.model}'
-            else:
-                endpoint = api_input.model
-            return api_input, endpoint
+            return api_input, cls._endpoint(api_input.model)
         except ValidationError as e:
             raise FoundationModelAPIException(message=str(e)) from e
 
+    @classmethod
+    def _endpoint(cls, model: str) -> str:
+        """
+        Returns the serving endpoint of a model.
+
+        Args:
+        model (str): The model name.
+        """
+        return get_endpoint_registry().endpoint(model, cls.SUPPORTED_MODELS)
+
     @classmethod
     def _make_query(cls, client: requests.Session, model_input: FoundationModelAPIInput, endpoint: str):
         """
@@ -137,38 +303,137 @@ class FoundationModelAPIResource(APIResource):
         FoundationModelAPIException: If the API query fails.
         """
 
-        w = WorkspaceClient()
-        url = get_url(host=w.config.host, endpoint=endpoint)
-        headers = {
-            'Content-Type': 'application/json',
-            'X-Databricks-Endpoints-API-Client': 'Generative AI Inference (Mosaic) SDK'
-        }
-        headers = headers | w.config.authenticate()
-        json = model_input.model_dump(exclude_unset=True)
+        hooks = get_hooks(cls)
+        started = time.perf_counter() if hooks else 0.0
+        credentials = get_credentials()
+        trace = RequestTrace(hooks, cls.__name__, endpoint, started) if hooks else None
+        url = get_endpoint_registry().url(endpoint, credentials.host)
+        headers = request_headers(credentials)
+        json = cls._request_body(model_input)
         timeout = json.pop("timeout", cls.DEFAULT_TIMEOUT)
         max_retries = json.pop("max_retries", cls.MAX_RETRIES)
-        model = json.pop("model")
-        try:
-            if model_input.model_dump().get("stream", False):
-                return cls._get_streaming_response(client=client,
-                                                   url=url,
-                                                   headers=headers,
-                                                   json=json,
-                                                   timeout=timeout,
-                                                   max_retries=max_retries)
-            else:
-                return cls._get_non_streaming_response(client=client,
+        json.pop("model")
+        return cls._send_query(client, endpoint, url, headers, json, timeout, max_retries, trace)
+
+    @classmethod
+    def _send_query(cls,
+                    client: requests.Session,
+                    endpoint: str,
+                    url: str,
+                    headers: dict,
+                    json: dict,
+                    timeout: int,
+                    max_retries: int,
+                    trace: Optional[RequestTrace] = None):
+        """
+        Sends a request body to the API, through the response cache, request coalescing and rate limiting.
+
+        Args:
+        client (requests.Session): The client for http call.
+        endpoint (str): The model endpoint id.
+        url (str): The URL for the API.
+        headers (dict): The headers for the API request.
+        json (dict): The JSON data for the API request.
+        timeout (int): The timeout for the API request.
+        max_retries (int): The maximum number of attempts for the API request.
+        trace (Optional[RequestTrace]): The trace notifying the hooks of the request, if any.
+
+        Returns:
+        The response of the API query.
+
+        Raises:
+        FoundationModelAPIException: If the API query fails.
+        """
+        deterministic = cls._is_deterministic(json)
+        cache = get_response_cache()
+        cache_key = cache.key_for(endpoint, json, deterministic) if cache is not None else None
+        if cache_key is not None:
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                return cls.model_output(cached_response)
+
+        def send():
+            rate_limiter = get_rate_limiter(endpoint)
+            if rate_limiter is not None:
+                rate_limiter.acquire(estimate_request_tokens(json))
+            try:
+                if json.get("stream"):
+                    return cls._get_streaming_response(client=client,
                                                        url=url,
                                                        headers=headers,
                                                        json=json,
                                                        timeout=timeout,
                                                        max_retries=max_retries)
-        except requests.exceptions.ReadTimeout as e:
-            raise FoundationModelAPIException(message=f'API request timed out after {timeout} seconds') from e
-        except requests.exceptions.ConnectionError as e:
-            raise FoundationModelAPIException(message="API request failed with connection error") from e
-        except FoundationModelAPIException as e:
-            raise e
+                else:
+                    response = cls._get_non_streaming_response(client=client,
+                                                               url=url,
+                                                               headers=headers,
+                                                               json=json,
+                                                               timeout=timeout,
+                                                               max_retries=max_retries)
+                    if cache_key is not None:
+                        cache.put(cache_key, response.response)
+                    return response
+            except requests.exceptions.ReadTimeout as e:
+                raise FoundationModelAPIException(message=f'API request timed out after {timeout} seconds') from e
+            except requests.exceptions.ConnectionError as e:
+                raise FoundationModelAPIException(message="API request failed with connection error") from e
+            except FoundationModelAPIException as e:
+                if e.status in AUTH_ERROR_STATUSES:
+                    invalidate_credentials()
+                raise e
+
+        if trace is not None:
+            send = functools.partial(trace.call, send, bool(json.get("stream")))
+        single_flight = get_single_flight()
+        flight_key = single_flight.key_for(endpoint, json, deterministic) if single_flight is not None else None
+        if flight_key is not None:
+            return single_flight.do(flight_key, send)
+        return send()
+
+    @classmethod
+    def _make_prepared_query(cls, client: requests.Session, prepared: 'PreparedRequest', json: dict, timeout: int,
+                             max_retries: int):
+        """
+        Makes a query to the API from a prepared request.
+
+        Args:
+        client (requests.Session): The client for http call.
+        prepared (PreparedRequest): The prepared request.
+        json (dict): The JSON data for the API request.
+        timeout (int): The timeout for the API request.
+        max_retries (int): The maximum number of attempts for the API request.
+
+        Returns:
+        The response of the API query.
+        """
+        hooks = get_hooks(cls)
+        started = time.perf_counter() if hooks else 0.0
+        url, headers = prepared.target(get_credentials())
+        trace = RequestTrace(hooks, cls.__name__, prepared.endpoint, started) if hooks else None
+        return cls._send_query(client, prepared.endpoint, url, headers, json, timeout, max_retries, trace)
+
+    @staticmethod
+    def _request_body(model_input: FoundationModelAPIInput) -> dict:
+        """
+        Returns the fields set in the request. Unlike `model_dump(exclude_unset=True)`, the validated values are used
+        as they are instead of being copied.
+
+        Args:
+        model_input (FoundationModelAPIInput): The input for the API.
+        """
+        fields_set = model_input.model_fields_set
+        return {name: value for name, value in model_input.__dict__.items() if name in fields_set}
+
+    @classmethod
+    def _is_deterministic(cls, json: dict) -> bool:
+        """
+        Returns whether identical requests are expected to get identical responses, i.e. whether sampling is greedy.
+
+        Args:
+        json (dict): The JSON data for the API request.
+        """
+        return json.get('temperature') == 0 or json.get('top_k') == 1
 
     @classmethod
     def _get_non_streaming_response(cls, client, url, headers, json, timeout, max_retries):
@@ -184,11 +449,16 @@ class FoundationModelAPIResource(APIResource):
         Raises:
         NotImplementedError: If the method is not implemented.
         """
-        retry_req = retry(retry=retry_if_result(is_internal_server_error),
-                          wait=wait_random_exponential(min=1, max=timeout),
-                          stop=stop_after_attempt(max_retries),
-                          retry_error_callback=lambda retry: retry.outcome.result())(send_request)
-        response = retry_req(client=client, url=url, headers=headers, json=json, timeout=timeout)
+        response = cls.retry_policy.call(send_request,
+                                         max_attempts=max_retries,
+                                         client=client,
+                                         url=url,
+                                         headers=headers,
+                                         json=json,
+                                         timeout=timeout)
+        trace = current_trace()
+        if trace is not None:
+            trace.response_headers(response.status_code, response.headers)
         if response.ok:
             try:
                 return cls.model_output(response.json())
@@ -211,25 +481,27 @@ class FoundationModelAPIResource(APIResource):
         Raises:
         NotImplementedError: If the method is not implemented.
         """
-        retry_req = retry(retry=retry_if_result(is_internal_server_error),
-                          wait=wait_random_exponential(min=1, max=timeout),
-                          stop=stop_after_attempt(max_retries),
-                          retry_error_callback=lambda retry: retry.outcome.result())(send_request)
-        response = retry_req(url=url, headers=headers, json=json, timeout=timeout, client=client)
+        response = cls.retry_policy.call(send_request,
+                                         max_attempts=max_retries,
+                                         client=client,
+                                         url=url,
+                                         headers=headers,
+                                         json=json,
+                                         timeout=timeout,
+                                         stream=True)
+        trace = current_trace()
+        if trace is not None:
+            trace.response_headers(response.status_code, response.headers)
         if response:
             try:
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[len("data: "):]
-                        if line == '[DONE]':
-                            break
-                        loaded_json = json_lib.loads(line)
-                        if loaded_json:
-                            yield cls.model_streaming_output(loaded_json)
+                for loaded_json in iter_json(response.iter_content(chunk_size=None)):
+                    yield cls.model_streaming_output(loaded_json)
             except json_lib.decoder.JSONDecodeError as e:
-                raise FoundationModelAPIException(response=response, message="JSONDecodeError", url=url) from e
+                raise FoundationModelAPIException(status=HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                  message="JSONDecodeError",
+                                                  url=url) from e
+            finally:
+                response.close()
         else:
             raise FoundationModelAPIException(response=response, url=url)
 
@@ -248,6 +520,77 @@ class FoundationModelAPIResource(APIResource):
         model_input, endpoint = cls._parse_and_validate_request(**kwargs)
         return await cls._amake_query(client, model_input, endpoint)
 
+    @classmethod
+    async def acreate_many(cls,
+                           request_kwargs: Iterable[dict],
+                           concurrency: int = DEFAULT_CONCURRENCY,
+                           client: httpx.AsyncClient = None) -> List[Union[FoundationModelObject,
+                                                                           FoundationModelAPIException]]:
+        """
+        Creates many API responses concurrently.
+
+        A failed request does not abort the others: its `FoundationModelAPIException` is returned in its place.
+
+        Args:
+        request_kwargs (Iterable[dict]): The keyword arguments of each request, as for `acreate`.
+        concurrency (int): The maximum number of requests in flight.
+        client (httpx.AsyncClient): The client for http call, shared by all requests. Defaults to the pooled client.
+
+        Returns:
+        The response or exception of each request, in input order.
+        """
+        results = {}
+        async for index, result in cls.acreate_as_completed(request_kwargs, concurrency=concurrency, client=client):
+            results[index] = result
+        return [results[index] for index in range(len(results))]
+
+    @classmethod
+    async def acreate_as_completed(
+        cls,
+        request_kwargs: Iterable[dict],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        client: httpx.AsyncClient = None
+    ) -> AsyncIterator[Tuple[int, Union[FoundationModelObject, FoundationModelAPIException]]]:
+        """
+        Creates many API responses concurrently and yields them as they complete.
+
+        Requests are read lazily, so `request_kwargs` may be a generator of any length. A failed request does not abort
+        the others: its `FoundationModelAPIException` is yielded in its place. Leaving the loop early cancels the
+        requests still in flight.
+
+        Args:
+        request_kwargs (Iterable[dict]): The keyword arguments of each request, as for `acreate`.
+        concurrency (int): The maximum number of requests in flight.
+        client (httpx.AsyncClient): The client for http call, shared by all requests. Defaults to the pooled client.
+
+        Returns:
+        An async iterator of (input index, response or exception) pairs.
+        """
+        if concurrency < 1:
+            raise ValueError(f'concurrency must be at least 1, got {concurrency}')
+        client = client or get_async_pool().get_client()
+        pending = enumerate(request_kwargs)
+        in_flight = {}
+        try:
+            while True:
+                for index, kwargs in itertools.islice(pending, concurrency - len(in_flight)):
+                    in_flight[asyncio.ensure_future(cls._acreate_or_error(client, kwargs))] = index
+                if not in_flight:
+                    return
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield in_flight.pop(task), task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    @classmethod
+    async def _acreate_or_error(cls, client: httpx.AsyncClient, kwargs: dict):
+        try:
+            return await cls.acreate(client=client, **kwargs)
+        except FoundationModelAPIException as e:
+            return e
+
     @classmethod
     async def _amake_query(cls, client: httpx.AsyncClient, model_input: FoundationModelAPIInput, endpoint: str):
         """
@@ -263,39 +606,115 @@ class FoundationModelAPIResource(APIResource):
         Raises:
         FoundationModelAPIException: If the API query fails.
         """
-        w = WorkspaceClient()
-        url = f'{w.config.host}/serving-endpoints/{endpoint}/invocations'
-        headers = {
-            'Content-Type': 'application/json',
-            'X-Databricks-Endpoints-API-Client': 'Generative AI Inference (Mosaic) SDK'
-        }
-        headers = w.config.authenticate() | headers
-        json = model_input.model_dump(exclude_unset=True)
+        hooks = get_hooks(cls)
+        started = time.perf_counter() if hooks else 0.0
+        credentials = await aget_credentials()
+        trace = RequestTrace(hooks, cls.__name__, endpoint, started) if hooks else None
+        url = get_endpoint_registry().url(endpoint, credentials.host)
+        headers = request_headers(credentials)
+        json = cls._request_body(model_input)
         timeout = json.pop("timeout", cls.DEFAULT_TIMEOUT)
         max_retries = json.pop("max_retries", cls.MAX_RETRIES)
-        model = json.pop("model")
+        json.pop("model")
+        return await cls._asend_query(client, endpoint, url, headers, json, timeout, max_retries, trace)
 
-        try:
-            if model_input.model_dump().get("stream", False):
-                return await cls._aget_streaming_response(client=client,
-                                                          url=url,
-                                                          headers=headers,
-                                                          json=json,
-                                                          timeout=timeout,
-                                                          max_retries=max_retries)
-            else:
-                return await cls._aget_non_streaming_response(client=client,
+    @classmethod
+    async def _asend_query(cls,
+                           client: httpx.AsyncClient,
+                           endpoint: str,
+                           url: str,
+                           headers: dict,
+                           json: dict,
+                           timeout: int,
+                           max_retries: int,
+                           trace: Optional[RequestTrace] = None):
+        """
+        Sends a request body to the API, through the response cache, request coalescing and rate limiting.
+
+        Args:
+        client (httpx.AsyncClient): The client for http call.
+        endpoint (str): The model endpoint id.
+        url (str): The URL for the API.
+        headers (dict): The headers for the API request.
+        json (dict): The JSON data for the API request.
+        timeout (int): The timeout for the API request.
+        max_retries (int): The maximum number of attempts for the API request.
+        trace (Optional[RequestTrace]): The trace notifying the hooks of the request, if any.
+
+        Returns:
+        The response of the API query.
+
+        Raises:
+        FoundationModelAPIException: If the API query fails.
+        """
+        deterministic = cls._is_deterministic(json)
+        cache = get_response_cache()
+        cache_key = cache.key_for(endpoint, json, deterministic) if cache is not None else None
+        if cache_key is not None:
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                return cls.model_output(cached_response)
+
+        async def send():
+            rate_limiter = get_rate_limiter(endpoint)
+            if rate_limiter is not None:
+                await rate_limiter.aacquire(estimate_request_tokens(json))
+            try:
+                if json.get("stream"):
+                    return await cls._aget_streaming_response(client=client,
                                                               url=url,
                                                               headers=headers,
                                                               json=json,
                                                               timeout=timeout,
                                                               max_retries=max_retries)
-        except httpx.ReadTimeout as e:
-            raise FoundationModelAPIException(message=f'API request timed out after {timeout} seconds') from e
-        except httpx.ConnectError as e:
-            raise FoundationModelAPIException(message="API request failed with connection error") from e
-        except FoundationModelAPIException as e:
-            raise e
+                else:
+                    response = await cls._aget_non_streaming_response(client=client,
+                                                                      url=url,
+                                                                      headers=headers,
+                                                                      json=json,
+                                                                      timeout=timeout,
+                                                                      max_retries=max_retries)
+                    if cache_key is not None:
+                        cache.put(cache_key, response.response)
+                    return response
+            except httpx.ReadTimeout as e:
+                raise FoundationModelAPIException(message=f'API request timed out after {timeout} seconds') from e
+            except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                raise FoundationModelAPIException(message="API request failed with connection error") from e
+            except FoundationModelAPIException as e:
+                if e.status in AUTH_ERROR_STATUSES:
+                    invalidate_credentials()
+                raise e
+
+        if trace is not None:
+            send = functools.partial(trace.acall, send, bool(json.get("stream")))
+        single_flight = get_single_flight()
+        flight_key = single_flight.key_for(endpoint, json, deterministic) if single_flight is not None else None
+        if flight_key is not None:
+            return await single_flight.ado(flight_key, send)
+        return await send()
+
+    @classmethod
+    async def _amake_prepared_query(cls, client: httpx.AsyncClient, prepared: 'PreparedRequest', json: dict,
+                                    timeout: int, max_retries: int):
+        """
+        Makes a query to the API from a prepared request.
+
+        Args:
+        client (httpx.AsyncClient): The client for http call.
+        prepared (PreparedRequest): The prepared request.
+        json (dict): The JSON data for the API request.
+        timeout (int): The timeout for the API request.
+        max_retries (int): The maximum number of attempts for the API request.
+
+        Returns:
+        The response of the API query.
+        """
+        hooks = get_hooks(cls)
+        started = time.perf_counter() if hooks else 0.0
+        url, headers = prepared.target(await aget_credentials())
+        trace = RequestTrace(hooks, cls.__name__, prepared.endpoint, started) if hooks else None
+        return await cls._asend_query(client, prepared.endpoint, url, headers, json, timeout, max_retries, trace)
 
     @classmethod
     async def _aget_non_streaming_response(cls, client, url, headers, json, timeout, max_retries):
@@ -306,11 +725,16 @@ class FoundationModelAPIResource(APIResource):
         url (str): The URL for the API.
         response (httpx.Resonse): The response from the post request.
         """
-        asend_request_with_retry = retry(retry=retry_if_result(is_internal_server_error),
-                                         wait=wait_random_exponential(min=1, max=timeout),
-                                         stop=stop_after_attempt(max_retries),
-                                         retry_error_callback=lambda retry: retry.outcome.result())(asend_request)
-        response = await asend_request_with_retry(client=client, url=url, headers=headers, json=json, timeout=timeout)
+        response = await cls.retry_policy.acall(asend_request,
+                                                max_attempts=max_retries,
+                                                client=client,
+                                                url=url,
+                                                headers=headers,
+                                                json=json,
+                                                timeout=timeout)
+        trace = current_trace()
+        if trace is not None:
+            trace.response_headers(response.status_code, response.headers)
         if response.status_code < 400:
             try:
                 response_body = response.json()
@@ -329,11 +753,17 @@ class FoundationModelAPIResource(APIResource):
         url (str): The URL for the API.
         response (httpx.Resonse): The response from the post request.
         """
-        asend_request_with_retry = retry(retry=retry_if_result(is_internal_server_error),
-                                         wait=wait_random_exponential(min=1, max=timeout),
-                                         stop=stop_after_attempt(max_retries),
-                                         retry_error_callback=lambda retry: retry.outcome.result())(asend_request)
-        response = await asend_request_with_retry(client=client, url=url, headers=headers, json=json, timeout=timeout)
+        response = await cls.retry_policy.acall(asend_request,
+                                                max_attempts=max_retries,
+                                                client=client,
+                                                url=url,
+                                                headers=headers,
+                                                json=json,
+                                                timeout=timeout,
+                                                stream=True)
+        trace = current_trace()
+        if trace is not None:
+            trace.response_headers(response.status_code, response.headers)
         return AsyncStreamResponse(url, response, cls.model_streaming_output)
 
 
@@ -351,7 +781,10 @@ class AsyncStreamResponse:
 
     def __del__(self):
         if not self._closed:
-            asyncio.run(self._response.aclose())
+            try:
+                asyncio.get_running_loop().create_task(self._response.aclose())
+            except RuntimeError:
+                asyncio.run(self._response.aclose())
 
     async def __aiter__(self):
         try:
@@ -364,17 +797,12 @@ class AsyncStreamResponse:
     async def __stream__(self):
         if self._response.status_code < 400:
             try:
-                async for line in self._response.aiter_lines():
-                    if line:
-                        if line.startswith("data: "):
-                            line = line[len("data: "):]
-                        if line == '[DONE]':
-                            break
-                        loaded_json = json_lib.loads(line)
-                        if loaded_json:
-                            yield self._model_streaming_output_cls(loaded_json)
+                async for loaded_json in aiter_json(self._response.aiter_bytes()):
+                    yield self._model_streaming_output_cls(loaded_json)
             except json_lib.decoder.JSONDecodeError as e:
-                raise FoundationModelAPIException(url=self._url, message="JSONDecodeError",
-                                                  response=self._response) from e
+                raise FoundationModelAPIException(status=HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                  message="JSONDecodeError",
+                                                  url=self._url) from e
         else:
+            await self._response.aread()
             raise FoundationModelAPIException(url=self._url, response=self._response)
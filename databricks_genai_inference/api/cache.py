@@ -0,0 +1,176 @@
+"""In-memory cache of API responses.
+"""
+import hashlib
+import json as json_lib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Dict, Optional, Tuple
+
+from databricks_genai_inference.api.util import dumps_json, json_loads
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300.0
+
+
+def _encode_sequence(value):
+    if isinstance(value, Sequence):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def request_key(endpoint: str, json: dict) -> str:
+    """
+    Returns a canonical hash of a request: identical requests get the same key regardless of field order.
+
+    Args:
+        endpoint (str): The serving endpoint name.
+        json (dict): The request body.
+
+    Returns:
+        str: The key.
+    """
+    body = json_lib.dumps(json, sort_keys=True, separators=(',', ':'), default=_encode_sequence)
+    return hashlib.sha256(f'{endpoint}\0{body}'.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    A thread-safe, size-bounded LRU cache of raw API responses with a time-to-live.
+
+    Streaming requests are never cached. Requests that sample (non-zero temperature) are only cached when
+    `cache_nondeterministic` is set, since repeating them is expected to give a different answer.
+
+    Responses are stored encoded as JSON, so every hit decodes its own copy: callers modifying a response do not
+    change what later hits get.
+
+    Attributes:
+        maxsize (int): The maximum number of cached responses.
+        ttl (Optional[float]): Seconds a response stays valid. None means until evicted.
+        cache_nondeterministic (bool): If True, also cache requests that sample.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups not answered from the cache.
+        evictions (int): The number of responses dropped to make room.
+    """
+
+    def __init__(self,
+                 maxsize: int = DEFAULT_MAXSIZE,
+                 ttl: Optional[float] = DEFAULT_TTL,
+                 cache_nondeterministic: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, endpoint: str, json: dict, deterministic: bool) -> Optional[str]:
+        """
+        Returns the cache key of a request, or None if the request must not be cached.
+
+        Args:
+            endpoint (str): The serving endpoint name.
+            json (dict): The request body.
+            deterministic (bool): Whether identical requests are expected to get identical responses.
+
+        Returns:
+            Optional[str]: The key.
+        """
+        if json.get('stream') or not (deterministic or self.cache_nondeterministic):
+            return None
+        return request_key(endpoint, json)
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns a cached response, or None if it is missing or expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[dict]: The raw response.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                encoded = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+        return json_loads(encoded)
+
+    def put(self, key: str, response: dict):
+        """
+        Caches a response, evicting the least recently used ones beyond `maxsize`.
+
+        Args:
+            key (str): The cache key.
+            response (dict): The raw response.
+        """
+        encoded = dumps_json(response)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every cached response.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit, miss and eviction counters and the current size.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._entries)}
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def enable_response_cache(maxsize: int = DEFAULT_MAXSIZE,
+                          ttl: Optional[float] = DEFAULT_TTL,
+                          cache_nondeterministic: bool = False) -> ResponseCache:
+    """
+    Caches the responses of deterministic, non-streaming requests for the whole process.
+
+    Args:
+        maxsize (int): The maximum number of cached responses.
+        ttl (Optional[float]): Seconds a response stays valid. None means until evicted.
+        cache_nondeterministic (bool): If True, also cache requests that sample.
+
+    Returns:
+        ResponseCache: The cache.
+    """
+    global _response_cache
+    _response_cache = ResponseCache(maxsize=maxsize, ttl=ttl, cache_nondeterministic=cache_nondeterministic)
+    return _response_cache
+
+
+def disable_response_cache():
+    """
+    Stops caching responses and drops the cache.
+    """
+    global _response_cache
+    _response_cache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, or None if caching is disabled.
+    """
+    return _response_cache
@@ -2,8 +2,11 @@
 """
 from typing import List, Optional, Union
 
+from pydantic import InstanceOf
+
 from databricks_genai_inference.api.abstract.foundation_model_api_resource import (FoundationModelAPIInput,
                                                                                    FoundationModelAPIResource)
+from databricks_genai_inference.api.chat_history import MessageHistory
 from databricks_genai_inference.api.objects.chat_completion_chunk_object import ChatCompletionChunkObject
 from databricks_genai_inference.api.objects.chat_completion_object import ChatCompletionObject
 from databricks_genai_inference.api.util import ChatCompletionModel
@@ -14,7 +17,7 @@ class ChatCompletionAPIInput(FoundationModelAPIInput):
     A class representing the input schema for the Chat Completion API.
 
     Attributes:
-        messages (List[dict]): A list of messages comprising the conversation so far. Each message is a dictionary with the following keys: `role` (str), `content` (str)
+        messages (Union[MessageHistory, List[dict]]): A list of messages comprising the conversation so far. Each message is a dictionary with the following keys: `role` (str), `content` (str). A `MessageHistory` is sent as is, without validating or encoding its messages again.
         user (Optional[str]): An id representing the user making the request.
         max_tokens (Optional[int]): The maximum number of tokens to generate.
         temperature (Optional[float]): The sampling temperature. Use higher value for more random outputs and lower value for more deterministic outputs. Must be between 0 and 2. Defaults to 1.0.
@@ -23,7 +26,8 @@ class ChatCompletionAPIInput(FoundationModelAPIInput):
         stream (Optional[bool]): If set to True, the API will stream the partial output as it’s generated as message chunks. Defaults to False.
         n (Optional[int]): The number of completion choices to return. Currently, only 1 choice is supported.
     """
-    messages: List[dict]
+    # Only the list is validated: message bodies are passed through as is, without being walked or copied.
+    messages: Union[InstanceOf[MessageHistory], List[InstanceOf[dict]]]
     user: Optional[str] = None
     max_tokens: Optional[int] = None
     temperature: Optional[float] = None
@@ -39,6 +43,7 @@ class ChatCompletion(FoundationModelAPIResource):
     A class representing the chat completion API resource.
     """
     SUPPORTED_MODEL_LIST = [model.value for model in ChatCompletionModel.__members__.values()]
+    SUPPORTED_MODELS = frozenset(SUPPORTED_MODEL_LIST)
     model_input = ChatCompletionAPIInput
     model_output = ChatCompletionObject
     model_streaming_output = ChatCompletionChunkObject
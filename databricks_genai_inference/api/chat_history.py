@@ -0,0 +1,191 @@
+"""Immutable chat messages and message histories with a cached JSON encoding.
+"""
+from collections.abc import MutableSequence, Sequence
+from typing import Iterator, List, Mapping, Union
+
+from databricks_genai_inference.api.rate_limit import estimate_tokens
+from databricks_genai_inference.api.util import RawJSON, dumps_json
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Message(dict):
+    """
+    An immutable chat message, e.g. `{"role": "user", "content": "Hi"}`.
+
+    It compares equal to the plain dict with the same keys, and caches its JSON encoding and token estimate, so a
+    message is encoded once however many requests it is sent in.
+    """
+    __slots__ = ('_encoded', '_tokens')
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('Message is immutable')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return Message, (dict(self),)
+
+    @property
+    def encoded(self) -> bytes:
+        """
+        Returns the UTF-8 JSON encoding of the message.
+        """
+        try:
+            return self._encoded
+        except AttributeError:
+            self._encoded = dumps_json(self)
+            return self._encoded
+
+    @property
+    def tokens(self) -> int:
+        """
+        Returns a rough local estimate of the tokens the message takes in a prompt.
+        """
+        try:
+            return self._tokens
+        except AttributeError:
+            self._tokens = estimate_tokens(str(self.get('content') or '')) + MESSAGE_OVERHEAD_TOKENS
+            return self._tokens
+
+
+class MessageHistory(RawJSON, MutableSequence):
+    """
+    A list of immutable messages, optimized for appending.
+
+    `snapshot()` returns a view of the history as it is now, in constant time: snapshots share the messages and their
+    encoded JSON with the history instead of copying them. Appending encodes only the new message, so sending a long
+    history costs one copy of its cached encoding rather than validating and encoding every message again.
+
+    The list operations are supported too: item assignment, `del`, `insert`, `pop`, `extend` and `+`. Other than
+    appending and popping the last message, they rebuild the encoding from the cached encodings of the messages.
+    Slicing and `+` return plain lists. The messages themselves are immutable: replace a message instead of editing it.
+    """
+    __slots__ = ('_messages', '_buffer', '_offsets', '_length')
+
+    def __init__(self, messages: Union[Sequence, List[Mapping]] = ()):
+        """Args:
+            messages (Sequence): The initial messages.
+        """
+        self._messages: List[Message] = []
+        # The encoded messages, after an opening bracket.
+        self._buffer = bytearray(b'[')
+        self._offsets = [1]
+        self._length = 0
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: Mapping):
+        """
+        Appends a message.
+
+        Args:
+            message (Mapping): The message, e.g. `{"role": "user", "content": "Hi"}`.
+        """
+        if not isinstance(message, Message):
+            message = Message(message)
+        if self._length != len(self._messages):
+            # The storage is shared with a longer history: stop sharing it.
+            end = self._offsets[self._length]
+            self._messages = self._messages[:self._length]
+            self._buffer = self._buffer[:end]
+            self._offsets = self._offsets[:self._length + 1]
+        if self._length:
+            self._buffer += b','
+        self._buffer += message.encoded
+        self._messages.append(message)
+        self._offsets.append(len(self._buffer))
+        self._length += 1
+
+    def _reset(self, messages: List[Mapping]):
+        # New storage, so that snapshots sharing the current one are unaffected.
+        self._messages = []
+        self._buffer = bytearray(b'[')
+        self._offsets = [1]
+        self._length = 0
+        for message in messages:
+            self.append(message)
+
+    def insert(self, index: int, message: Mapping):
+        """
+        Inserts a message before `index`.
+
+        Args:
+            index (int): The position of the new message.
+            message (Mapping): The message.
+        """
+        if index >= self._length:
+            self.append(message)
+            return
+        messages = list(self)
+        messages.insert(index, message)
+        self._reset(messages)
+
+    def __setitem__(self, index, message):
+        messages = list(self)
+        messages[index] = message
+        self._reset(messages)
+
+    def __delitem__(self, index):
+        if index in (-1, self._length - 1) and self._length:
+            # The storage is kept: the next append stops sharing it.
+            self._length -= 1
+            return
+        messages = list(self)
+        del messages[index]
+        self._reset(messages)
+
+    def reverse(self):
+        self._reset(list(self)[::-1])
+
+    def __add__(self, other) -> list:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> list:
+        return list(other) + list(self)
+
+    def copy(self) -> list:
+        return list(self)
+
+    def snapshot(self) -> 'MessageHistory':
+        """
+        Returns a view of the history as it is now, unaffected by later appends.
+        """
+        view = MessageHistory.__new__(MessageHistory)
+        view._messages = self._messages
+        view._buffer = self._buffer
+        view._offsets = self._offsets
+        view._length = self._length
+        return view
+
+    def encode_json(self) -> bytearray:
+        encoded = self._buffer[:self._offsets[self._length]]
+        encoded += b']'
+        return encoded
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._messages[i] for i in range(self._length)[index]]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('MessageHistory index out of range')
+        return self._messages[index]
+
+    def __iter__(self) -> Iterator[Message]:
+        messages = self._messages
+        for i in range(self._length):
+            yield messages[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageHistory, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
@@ -1,8 +1,19 @@
 """ ChatSession class for multi-turn chat completion management.
 """
-import copy
+from typing import AsyncIterator, Iterator
 
 from databricks_genai_inference.api.chat_completion import ChatCompletion
+from databricks_genai_inference.api.chat_history import MessageHistory
+from databricks_genai_inference.api.history_policy import HistoryPolicy
+from databricks_genai_inference.api.objects.chat_completion_chunk_object import ChatCompletionChunkObject
+
+
+def _chunk_content(chunk: ChatCompletionChunkObject) -> str:
+    """
+    Returns the text of a chunk. The first and last chunks of a stream may carry only a role or a finish reason.
+    """
+    choices = chunk.response.get('choices') or [{}]
+    return (choices[0].get('delta') or {}).get('content') or ''
 
 
 class ChatSession():
@@ -11,28 +22,34 @@ class ChatSession():
 
     Methods:
         reply(message: str) -> ChatCompletion: Sends a message to the chat model and returns its response.
+        areply(message: str) -> ChatCompletion: Sends a message to the chat model and returns its response,
+            asynchronously.
+        reply_stream(message: str) -> Iterator: Sends a message to the chat model and streams its response.
+        areply_stream(message: str) -> AsyncIterator: Sends a message to the chat model and streams its response,
+            asynchronously.
         system_message() -> str: Returns the system message.
         last() -> str: Returns the last assistant message in the chat history.
-        history() -> List: Returns the entire chat history.
+        history() -> MessageHistory: Returns the entire chat history.
         pretty_history() -> str: Returns a formatted string representing the chat history.
         count() -> int: Returns the number of chat rounds conducted so far
     """
 
-    def __init__(self, model: str, system_message=None, **kwargs):
+    def __init__(self, model: str, system_message=None, history_policy: HistoryPolicy = None, **kwargs):
         """Args:
             model (str): The model name.
             system_message (str): The system message to guide the conversation. e.g. "You are a helpful assistant."
-            **kwargs: Additional model parameters to pass to the chat completion API.
+            history_policy (HistoryPolicy): Decides which messages of the history are sent with each reply, e.g.
+                `TokenBudgetPolicy(max_tokens=4096)`. Defaults to sending the whole history.
+            **kwargs: Additional model parameters to pass to the chat completion API. With `stream=True`, `reply` and
+                `areply` stream the response like `reply_stream` and `areply_stream`.
         """
         self.model = model
+        self.history_policy = history_policy
         self.parameters = kwargs
-        self.chat_history = []
+        self.chat_history = MessageHistory()
         self.system_message = system_message
-        if self.parameters.get("stream", False):
-            raise NotImplementedError(
-                "You are setting stream=True, but streaming is not supported for ChatSession() yet.")
         if system_message is not None:
-            self.chat_history = [{"role": "system", "content": system_message}]
+            self.chat_history.append({"role": "system", "content": system_message})
 
     def reply(self, message: str):
         """
@@ -42,13 +59,112 @@ class ChatSession():
             message (str): The message to send to the chat model.
 
         Returns:
-            ChatCompletionObject: An object representing the response from the chat model.
+            ChatCompletionObject: An object representing the response from the chat model. With `stream=True`, an
+            iterator of ChatCompletionChunkObject, as returned by `reply_stream`.
         """
+        if self.parameters.get("stream", False):
+            return self.reply_stream(message)
         self.chat_history.append({"role": "user", "content": message})
-        response = ChatCompletion.create(model=self.model, messages=copy.deepcopy(self.chat_history), **self.parameters)
+        response = ChatCompletion.create(model=self.model, messages=self._messages(), **self.parameters)
         self.chat_history.append({"role": "assistant", "content": response.message})
         return response
 
+    async def areply(self, message: str):
+        """
+        Sends a message to the chat model and returns its response, asynchronously.
+
+        Args:
+            message (str): The message to send to the chat model.
+
+        Returns:
+            ChatCompletionObject: An object representing the response from the chat model. With `stream=True`, an
+            async iterator of ChatCompletionChunkObject, as returned by `areply_stream`.
+        """
+        if self.parameters.get("stream", False):
+            return self.areply_stream(message)
+        self.chat_history.append({"role": "user", "content": message})
+        response = await ChatCompletion.acreate(model=self.model, messages=await self._amessages(), **self.parameters)
+        self.chat_history.append({"role": "assistant", "content": response.message})
+        return response
+
+    def reply_stream(self, message: str) -> Iterator[ChatCompletionChunkObject]:
+        """
+        Sends a message to the chat model and streams its response.
+
+        The assistant message is assembled from the chunks and added to the history when the stream ends, or when the
+        caller stops reading it, with the content received so far.
+
+        Args:
+            message (str): The message to send to the chat model.
+
+        Returns:
+            Iterator[ChatCompletionChunkObject]: The chunks of the response, as they arrive.
+        """
+        self.chat_history.append({"role": "user", "content": message})
+        parameters = {**self.parameters, "stream": True}
+        return self._assemble(ChatCompletion.create(model=self.model, messages=self._messages(), **parameters))
+
+    def areply_stream(self, message: str) -> AsyncIterator[ChatCompletionChunkObject]:
+        """
+        Sends a message to the chat model and streams its response, asynchronously.
+
+        The assistant message is assembled from the chunks and added to the history when the stream ends, or when the
+        caller stops reading it, with the content received so far.
+
+        Args:
+            message (str): The message to send to the chat model.
+
+        Returns:
+            AsyncIterator[ChatCompletionChunkObject]: The chunks of the response, as they arrive.
+        """
+        self.chat_history.append({"role": "user", "content": message})
+        return self._aassemble(self.chat_history.snapshot())
+
+    def _assemble(self, chunks: Iterator[ChatCompletionChunkObject]) -> Iterator[ChatCompletionChunkObject]:
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(_chunk_content(chunk))
+                yield chunk
+        except GeneratorExit:
+            self.chat_history.append({"role": "assistant", "content": ''.join(parts)})
+            raise
+        self.chat_history.append({"role": "assistant", "content": ''.join(parts)})
+
+    async def _aassemble(self, history: MessageHistory) -> AsyncIterator[ChatCompletionChunkObject]:
+        parts = []
+        try:
+            messages = await self._amessages(history)
+            parameters = {**self.parameters, "stream": True}
+            chunks = await ChatCompletion.acreate(model=self.model, messages=messages, **parameters)
+            async for chunk in chunks:
+                parts.append(_chunk_content(chunk))
+                yield chunk
+        except GeneratorExit:
+            self.chat_history.append({"role": "assistant", "content": ''.join(parts)})
+            raise
+        self.chat_history.append({"role": "assistant", "content": ''.join(parts)})
+
+    def _messages(self) -> MessageHistory:
+        """
+        Returns the messages to send with the next request.
+        """
+        if self.history_policy is None:
+            return self.chat_history.snapshot()
+        return self.history_policy.select(self.chat_history)
+
+    async def _amessages(self, history: MessageHistory = None) -> MessageHistory:
+        """
+        Returns the messages to send with the next request, without blocking the event loop.
+
+        Args:
+            history (MessageHistory): The history to select from. Defaults to the chat history.
+        """
+        history = self.chat_history if history is None else history
+        if self.history_policy is None:
+            return history.snapshot()
+        return await self.history_policy.aselect(history)
+
     @property
     def last(self):
         """
@@ -67,7 +183,7 @@ class ChatSession():
         Returns the entire chat history.
 
         Returns:
-            List: The entire chat history.
+            MessageHistory: The entire chat history. It supports the list operations, but its messages are immutable.
         """
         return self.chat_history
 
@@ -49,6 +49,7 @@ class Completion(FoundationModelAPIResource):
     """
 
     SUPPORTED_MODEL_LIST = [model.value for model in CompletionModel.__members__.values()]
+    SUPPORTED_MODELS = frozenset(SUPPORTED_MODEL_LIST)
     model_input = CompletionAPIInput
     model_output = CompletionObject
     model_streaming_output = CompletionChunkObject
@@ -0,0 +1,204 @@
+"""Process-wide cache of resolved workspace hosts and auth headers.
+"""
+import asyncio
+import base64
+import functools
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from databricks.sdk.core import Config
+
+DATABRICKS_CONFIG_PROFILE_ENV = 'DATABRICKS_CONFIG_PROFILE'
+DATABRICKS_HOST_ENV = 'DATABRICKS_HOST'
+DEFAULT_REFRESH_INTERVAL = 300
+DEFAULT_EXPIRY_SKEW = 60
+
+
+class Credentials(NamedTuple):
+    """
+    Resolved credentials for a workspace.
+
+    Attributes:
+        host (str): The workspace host.
+        headers (Dict[str, str]): The auth headers to send with each request.
+        expires_at (float): `time.monotonic()` deadline after which the headers are resolved again.
+    """
+    host: str
+    headers: Dict[str, str]
+    expires_at: float
+
+
+def _jwt_expiry(headers: Dict[str, str]) -> Optional[float]:
+    """
+    Returns the `exp` claim (epoch seconds) of a bearer JWT, or None if the token is not a JWT.
+
+    Args:
+        headers (Dict[str, str]): The auth headers.
+
+    Returns:
+        Optional[float]: The expiry of the token.
+    """
+    auth = headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return None
+    parts = auth[len('Bearer '):].split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + '=' * (-len(parts[1]) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _new_config(**kwargs) -> 'Config':
+    """
+    Returns a new workspace config. The Databricks SDK is imported on first use, as it takes long to import.
+    """
+    from databricks.sdk.core import Config  # pylint: disable=import-outside-toplevel
+    return Config(**kwargs)
+
+
+class CredentialCache:
+    """
+    A thread-safe cache of workspace configs and auth headers keyed by (profile, host).
+
+    Resolving a `databricks.sdk` config parses config files, probes the environment and may call a credential
+    provider, so it is done once per key. Auth headers are reused until the bearer token is within `expiry_skew`
+    seconds of its expiry, or for `refresh_interval` seconds when the token does not carry an expiry (e.g. PATs).
+    """
+
+    def __init__(self, refresh_interval: float = DEFAULT_REFRESH_INTERVAL, expiry_skew: float = DEFAULT_EXPIRY_SKEW):
+        """Args:
+            refresh_interval (float): Seconds to reuse headers whose token has no known expiry.
+            expiry_skew (float): Seconds before a token's expiry at which the headers are resolved again.
+        """
+        self.refresh_interval = refresh_interval
+        self.expiry_skew = expiry_skew
+        self._configs: Dict[Tuple, 'Config'] = {}
+        self._credentials: Dict[Tuple, Credentials] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(profile: Optional[str], host: Optional[str]) -> Tuple:
+        return (profile or os.getenv(DATABRICKS_CONFIG_PROFILE_ENV), host or os.getenv(DATABRICKS_HOST_ENV))
+
+    def _lookup(self, key: Tuple) -> Optional[Credentials]:
+        credentials = self._credentials.get(key)
+        if credentials is not None and credentials.expires_at > time.monotonic():
+            return credentials
+        return None
+
+    def _expires_at(self, headers: Dict[str, str]) -> float:
+        now = time.monotonic()
+        exp = _jwt_expiry(headers)
+        if exp is None:
+            return now + self.refresh_interval
+        return now + max(0.0, exp - time.time() - self.expiry_skew)
+
+    def get(self, profile: Optional[str] = None, host: Optional[str] = None) -> Credentials:
+        """
+        Returns the credentials for a workspace, resolving them if they are missing or close to expiry.
+
+        Args:
+            profile (Optional[str]): The config profile. Defaults to `DATABRICKS_CONFIG_PROFILE`.
+            host (Optional[str]): The workspace host. Defaults to `DATABRICKS_HOST`.
+
+        Returns:
+            Credentials: The resolved host and auth headers.
+        """
+        key = self._key(profile, host)
+        credentials = self._lookup(key)
+        if credentials is not None:
+            return credentials
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            credentials = self._lookup(key)
+            if credentials is not None:
+                return credentials
+            config = self._configs.get(key)
+            if config is None:
+                config_kwargs = {name: value for name, value in zip(('profile', 'host'), key) if value}
+                config = _new_config(**config_kwargs)
+                self._configs[key] = config
+            headers = dict(config.authenticate())
+            credentials = Credentials(host=config.host, headers=headers, expires_at=self._expires_at(headers))
+            self._credentials[key] = credentials
+            return credentials
+
+    async def aget(self, profile: Optional[str] = None, host: Optional[str] = None) -> Credentials:
+        """
+        Async variant of `get`. Resolution runs in the default executor so a slow credential provider does not
+        block the event loop.
+
+        Args:
+            profile (Optional[str]): The config profile. Defaults to `DATABRICKS_CONFIG_PROFILE`.
+            host (Optional[str]): The workspace host. Defaults to `DATABRICKS_HOST`.
+
+        Returns:
+            Credentials: The resolved host and auth headers.
+        """
+        credentials = self._lookup(self._key(profile, host))
+        if credentials is not None:
+            return credentials
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.get, profile, host))
+
+    def invalidate(self, profile: Optional[str] = None, host: Optional[str] = None):
+        """
+        Drops the cached config and headers for a workspace, so the next request resolves them again.
+
+        Args:
+            profile (Optional[str]): The config profile. Defaults to `DATABRICKS_CONFIG_PROFILE`.
+            host (Optional[str]): The workspace host. Defaults to `DATABRICKS_HOST`.
+        """
+        key = self._key(profile, host)
+        with self._lock:
+            self._configs.pop(key, None)
+            self._credentials.pop(key, None)
+
+    def clear(self):
+        """
+        Drops every cached config and header.
+        """
+        with self._lock:
+            self._configs.clear()
+            self._credentials.clear()
+
+
+_default_cache = CredentialCache()
+
+
+def get_credentials(profile: Optional[str] = None, host: Optional[str] = None) -> Credentials:
+    """
+    Returns the credentials for a workspace from the process-wide cache.
+    """
+    return _default_cache.get(profile=profile, host=host)
+
+
+async def aget_credentials(profile: Optional[str] = None, host: Optional[str] = None) -> Credentials:
+    """
+    Returns the credentials for a workspace from the process-wide cache.
+    """
+    return await _default_cache.aget(profile=profile, host=host)
+
+
+def invalidate_credentials(profile: Optional[str] = None, host: Optional[str] = None):
+    """
+    Drops the cached credentials for a workspace from the process-wide cache.
+    """
+    _default_cache.invalidate(profile=profile, host=host)
+
+
+def clear_credentials():
+    """
+    Drops every entry from the process-wide credential cache.
+    """
+    _default_cache.clear()
@@ -1,9 +1,16 @@
 """Embedding API resource.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Union
 
+import httpx
+import requests
+
 from databricks_genai_inference.api.abstract.foundation_model_api_resource import (FoundationModelAPIInput,
                                                                                    FoundationModelAPIResource)
+from databricks_genai_inference.api.embedding_store import EmbeddingStore
+from databricks_genai_inference.api.exception import FoundationModelAPIException
 from databricks_genai_inference.api.objects.embedding_object import EmbeddingObject
 from databricks_genai_inference.api.util import EmbeddingModel
 
@@ -25,8 +32,20 @@ class EmbeddingAPIInput(FoundationModelAPIInput):
 class Embedding(FoundationModelAPIResource):
     """
     A class representing the embedding API resource.
+
+    Attributes:
+        MAX_BATCH_SIZE (int): The maximum number of inputs the server accepts in one request.
+        BATCH_CONCURRENCY (int): The default number of sub-batches `create_batch` sends concurrently.
+        BATCH_RETRIES (int): The default number of times `create_batch` retries a failed sub-batch.
+        embedding_store (Optional[EmbeddingStore]): If set, embeddings are looked up in this store before sending a
+            request, only the missing inputs are sent, and their embeddings are added to the store.
     """
     SUPPORTED_MODEL_LIST = [model.value for model in EmbeddingModel.__members__.values()]
+    SUPPORTED_MODELS = frozenset(SUPPORTED_MODEL_LIST)
+    MAX_BATCH_SIZE = 150
+    BATCH_CONCURRENCY = 4
+    BATCH_RETRIES = 2
+    embedding_store: Optional[EmbeddingStore] = None
     model_input = EmbeddingAPIInput
     model_output = EmbeddingObject
 
@@ -37,3 +56,208 @@ class Embedding(FoundationModelAPIResource):
     @classmethod
     async def _aget_streaming_response(cls, url, json, timeout, extra_headers=None):
         raise NotImplementedError("Streaming is not supported for the Embedding API.")
+
+    @classmethod
+    def _make_query(cls, client: requests.Session, model_input: EmbeddingAPIInput, endpoint: str):
+        store = cls.embedding_store
+        if store is None:
+            return super()._make_query(client, model_input, endpoint)
+        texts = [model_input.input] if isinstance(model_input.input, str) else model_input.input
+        embeddings = store.get_many(endpoint, model_input.instruction, texts)
+        missing = cls._missing_inputs(texts, embeddings)
+        response = None
+        if missing:
+            response = super()._make_query(client, model_input.model_copy(update={'input': missing}), endpoint)
+            store.put_many(endpoint, model_input.instruction, missing, response.embeddings)
+        return cls._stored_response(model_input, texts, embeddings, missing, response)
+
+    @classmethod
+    async def _amake_query(cls, client: httpx.AsyncClient, model_input: EmbeddingAPIInput, endpoint: str):
+        store = cls.embedding_store
+        if store is None:
+            return await super()._amake_query(client, model_input, endpoint)
+        loop = asyncio.get_running_loop()
+        texts = [model_input.input] if isinstance(model_input.input, str) else model_input.input
+        embeddings = await loop.run_in_executor(None, store.get_many, endpoint, model_input.instruction, texts)
+        missing = cls._missing_inputs(texts, embeddings)
+        response = None
+        if missing:
+            response = await super()._amake_query(client, model_input.model_copy(update={'input': missing}), endpoint)
+            await loop.run_in_executor(None, store.put_many, endpoint, model_input.instruction, missing,
+                                       response.embeddings)
+        return cls._stored_response(model_input, texts, embeddings, missing, response)
+
+    @classmethod
+    def _make_prepared_query(cls, client: requests.Session, prepared, json: dict, timeout: int, max_retries: int):
+        if cls.embedding_store is None:
+            return super()._make_prepared_query(client, prepared, json, timeout, max_retries)
+        model_input = cls.model_input.model_construct(model=prepared.model,
+                                                      timeout=timeout,
+                                                      max_retries=max_retries,
+                                                      **json)
+        return cls._make_query(client, model_input, prepared.endpoint)
+
+    @classmethod
+    async def _amake_prepared_query(cls, client: httpx.AsyncClient, prepared, json: dict, timeout: int,
+                                    max_retries: int):
+        if cls.embedding_store is None:
+            return await super()._amake_prepared_query(client, prepared, json, timeout, max_retries)
+        model_input = cls.model_input.model_construct(model=prepared.model,
+                                                      timeout=timeout,
+                                                      max_retries=max_retries,
+                                                      **json)
+        return await cls._amake_query(client, model_input, prepared.endpoint)
+
+    @staticmethod
+    def _missing_inputs(texts: List[str], embeddings: List[Optional[List[float]]]) -> List[str]:
+        """
+        Returns the distinct texts without a stored embedding, in input order.
+        """
+        return list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+
+    @classmethod
+    def _stored_response(cls, model_input: EmbeddingAPIInput, texts: List[str],
+                         embeddings: List[Optional[List[float]]], missing: List[str],
+                         response: Optional[EmbeddingObject]) -> EmbeddingObject:
+        """
+        Builds the response of a request partly answered from the embedding store.
+        """
+        fetched = dict(zip(missing, response.embeddings)) if response is not None else {}
+        merged = dict(response.response) if response is not None else {
+            'object': 'list',
+            'model': model_input.model,
+            'usage': {
+                'prompt_tokens': 0,
+                'total_tokens': 0
+            },
+        }
+        merged['data'] = [{
+            'object': 'embedding',
+            'index': i,
+            'embedding': embedding if embedding is not None else fetched[text],
+        } for i, (text, embedding) in enumerate(zip(texts, embeddings))]
+        return cls.model_output(merged)
+
+    @classmethod
+    def _is_deterministic(cls, json: dict) -> bool:
+        """
+        Embeddings do not sample, so identical requests always get identical responses.
+        """
+        return True
+
+    @classmethod
+    def create_batch(cls,
+                     inputs: List[str],
+                     batch_size: int = None,
+                     concurrency: int = None,
+                     batch_retries: int = None,
+                     client: requests.Session = None,
+                     **kwargs) -> EmbeddingObject:
+        """
+        Embeds an arbitrarily long list of inputs by splitting it into sub-batches sent concurrently.
+
+        Args:
+            inputs (List[str]): The input texts to embed.
+            batch_size (int): The number of inputs per request. Defaults to `MAX_BATCH_SIZE`.
+            concurrency (int): The number of requests in flight. Defaults to `BATCH_CONCURRENCY`.
+            batch_retries (int): The number of times a failed sub-batch is retried by the `retry_policy`. Defaults to
+                `BATCH_RETRIES`, or to `max_retries - 1` if `max_retries` is given instead.
+            client (requests.Session): The client for http call. Defaults to the library-managed pool.
+            **kwargs: The other keyword arguments for the API, e.g. `model` and `instruction`.
+
+        Returns:
+            EmbeddingObject: A single response holding the embeddings of all inputs, in input order.
+
+        Raises:
+            FoundationModelAPIException: If the request is invalid, or a sub-batch still fails after its retries.
+        """
+        batches = cls._split_batches(inputs, batch_size, batch_retries, kwargs)
+
+        def create_sub_batch(batch):
+            return cls.create(client=client, input=batch, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency or cls.BATCH_CONCURRENCY, len(batches)))) as pool:
+            return cls._merge_batches(list(pool.map(create_sub_batch, batches)))
+
+    @classmethod
+    async def acreate_batch(cls,
+                            inputs: List[str],
+                            batch_size: int = None,
+                            concurrency: int = None,
+                            batch_retries: int = None,
+                            client: httpx.AsyncClient = None,
+                            **kwargs) -> EmbeddingObject:
+        """
+        Embeds an arbitrarily long list of inputs by splitting it into sub-batches sent concurrently.
+
+        Args:
+            inputs (List[str]): The input texts to embed.
+            batch_size (int): The number of inputs per request. Defaults to `MAX_BATCH_SIZE`.
+            concurrency (int): The number of requests in flight. Defaults to `BATCH_CONCURRENCY`.
+            batch_retries (int): The number of times a failed sub-batch is retried by the `retry_policy`. Defaults to
+                `BATCH_RETRIES`, or to `max_retries - 1` if `max_retries` is given instead.
+            client (httpx.AsyncClient): The client for http call. Defaults to the library-managed client.
+            **kwargs: The other keyword arguments for the API, e.g. `model` and `instruction`.
+
+        Returns:
+            EmbeddingObject: A single response holding the embeddings of all inputs, in input order.
+
+        Raises:
+            FoundationModelAPIException: If the request is invalid, or a sub-batch still fails after its retries.
+        """
+        batches = cls._split_batches(inputs, batch_size, batch_retries, kwargs)
+        semaphore = asyncio.Semaphore(concurrency or cls.BATCH_CONCURRENCY)
+
+        async def acreate_sub_batch(batch):
+            async with semaphore:
+                return await cls.acreate(client=client, input=batch, **kwargs)
+
+        tasks = [asyncio.ensure_future(acreate_sub_batch(batch)) for batch in batches]
+        try:
+            return cls._merge_batches(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @classmethod
+    def _split_batches(cls, inputs: List[str], batch_size: Optional[int], batch_retries: Optional[int],
+                       kwargs: dict) -> List[List[str]]:
+        """
+        Validates the shared request parameters once, sets the attempts of each sub-batch in `kwargs` and splits the
+        inputs into sub-batches.
+
+        Failed sub-batches are only retried by the `retry_policy`, on rate limits, server errors and connection errors,
+        so that retries are not multiplied by a second layer and invalid requests fail at once.
+        """
+        if 'input' in kwargs:
+            raise FoundationModelAPIException(message='create_batch takes the texts to embed as `inputs`, not `input`')
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if batch_retries is not None or 'max_retries' not in kwargs:
+            kwargs['max_retries'] = (cls.BATCH_RETRIES if batch_retries is None else batch_retries) + 1
+        cls._parse_and_validate_request(input=[], **kwargs)
+        batch_size = batch_size or cls.MAX_BATCH_SIZE
+        if batch_size < 1:
+            raise FoundationModelAPIException(message=f'batch_size must be positive, got {batch_size}')
+        return [inputs[i:i + batch_size] for i in range(0, len(inputs), batch_size)]
+
+    @classmethod
+    def _merge_batches(cls, responses: List[EmbeddingObject]) -> EmbeddingObject:
+        """
+        Concatenates sub-batch responses into one response, renumbering the embedding indexes.
+        """
+        if not responses:
+            return cls.model_output({'object': 'list', 'data': [], 'usage': {}})
+        merged = {key: value for key, value in responses[0].response.items() if key not in ('data', 'usage')}
+        merged['data'] = []
+        merged['usage'] = {}
+        for response in responses:
+            offset = len(merged['data'])
+            data_in_order = sorted(response.response['data'], key=lambda data: data.get('index', 0))
+            for i, data in enumerate(data_in_order):
+                merged['data'].append({**data, 'index': offset + i})
+            for key, value in response.response.get('usage', {}).items():
+                if isinstance(value, (int, float)):
+                    merged['usage'][key] = merged['usage'].get(key, 0) + value
+        return cls.model_output(merged)
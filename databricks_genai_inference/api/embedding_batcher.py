@@ -0,0 +1,261 @@
+"""Micro-batching of single-text embedding requests.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import httpx
+import requests
+
+from databricks_genai_inference.api.embedding import Embedding
+from databricks_genai_inference.api.objects.embedding_object import EmbeddingObject
+
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def _split_response(response: EmbeddingObject, texts: List[str], unique_texts: List[str]) -> List[EmbeddingObject]:
+    """
+    Splits the response of a batched request into one single-embedding response per text.
+    """
+    data_in_order = sorted(response.response['data'], key=lambda data: data.get('index', 0))
+    data_by_text = dict(zip(unique_texts, data_in_order))
+    base = {key: value for key, value in response.response.items() if key not in ('data', 'usage')}
+    return [Embedding.model_output({**base, 'data': [{**data_by_text[text], 'index': 0}]}) for text in texts]
+
+
+class EmbeddingBatcher:
+    """
+    Collects single texts embedded from many threads into batched requests.
+
+    A batch is sent as soon as it holds `max_batch_size` texts, or `max_wait_ms` after its first text arrived,
+    whichever comes first, so the latency added to a call is bounded by `max_wait_ms`. Duplicate texts within a batch
+    are sent once. Each caller gets an `EmbeddingObject` holding only its own embedding; if the batched request fails,
+    every caller in the batch gets the exception. A text whose future is cancelled before its batch is sent is dropped.
+
+        batcher = EmbeddingBatcher(model="bge-large-en")
+        embedding = batcher.embed("one query").embeddings[0]
+    """
+
+    def __init__(self,
+                 model: str,
+                 instruction: Optional[str] = None,
+                 max_batch_size: int = Embedding.MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 client: requests.Session = None,
+                 **kwargs):
+        """Args:
+            model (str): The model of every request.
+            instruction (Optional[str]): The instruction of every request.
+            max_batch_size (int): The maximum number of texts per request.
+            max_wait_ms (float): The maximum milliseconds a text waits for its batch to fill up.
+            max_concurrency (int): The maximum number of batched requests in flight.
+            client (requests.Session): The client for http call. Defaults to the library-managed pool.
+            **kwargs: The other keyword arguments for the API, e.g. `timeout`.
+        """
+        self._request = {'model': model, **kwargs}
+        if instruction is not None:
+            self._request['instruction'] = instruction
+        Embedding._parse_and_validate_request(input=[], **self._request)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._client = client
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='EmbeddingBatcher.send')
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='EmbeddingBatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> "Future[EmbeddingObject]":
+        """
+        Adds a text to the next batch.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            Future[EmbeddingObject]: The future response holding the embedding of the text.
+        """
+        future = Future()
+        with self._lock:
+            # Checked and queued together, so that no text is queued behind the shutdown marker of `close`.
+            if self._closed:
+                raise RuntimeError('EmbeddingBatcher is closed')
+            self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> EmbeddingObject:
+        """
+        Embeds a text as part of the next batch, blocking until its batch completes.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            EmbeddingObject: The response holding the embedding of the text.
+        """
+        return self.submit(text).result()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[str, Future]]):
+        # Futures cancelled by their callers are dropped; the others can no longer be cancelled once claimed.
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        unique_texts = list(dict.fromkeys(texts))
+        try:
+            responses = _split_response(Embedding.create(client=self._client, input=unique_texts, **self._request),
+                                        texts, unique_texts)
+        except BaseException as e:  # pylint: disable=broad-except
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), response in zip(batch, responses):
+            future.set_result(response)
+
+    def close(self):
+        """
+        Sends the texts still waiting and waits for every batch to complete.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncEmbeddingBatcher:
+    """
+    Collects single texts embedded from many coroutines into batched requests.
+
+    It batches like `EmbeddingBatcher`, on the event loop it is first used from, without a background thread.
+
+        batcher = AsyncEmbeddingBatcher(model="bge-large-en")
+        embedding = (await batcher.embed("one query")).embeddings[0]
+    """
+
+    def __init__(self,
+                 model: str,
+                 instruction: Optional[str] = None,
+                 max_batch_size: int = Embedding.MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 client: httpx.AsyncClient = None,
+                 **kwargs):
+        """Args:
+            model (str): The model of every request.
+            instruction (Optional[str]): The instruction of every request.
+            max_batch_size (int): The maximum number of texts per request.
+            max_wait_ms (float): The maximum milliseconds a text waits for its batch to fill up.
+            max_concurrency (int): The maximum number of batched requests in flight.
+            client (httpx.AsyncClient): The client for http call. Defaults to the library-managed client.
+            **kwargs: The other keyword arguments for the API, e.g. `timeout`.
+        """
+        self._request = {'model': model, **kwargs}
+        if instruction is not None:
+            self._request['instruction'] = instruction
+        Embedding._parse_and_validate_request(input=[], **self._request)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self._client = client
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+
+    async def embed(self, text: str) -> EmbeddingObject:
+        """
+        Embeds a text as part of the next batch.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            EmbeddingObject: The response holding the embedding of the text.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            batch, self._pending = self._pending, []
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        texts = [text for text, _ in batch]
+        unique_texts = list(dict.fromkeys(texts))
+        try:
+            async with self._semaphore:
+                response = await Embedding.acreate(client=self._client, input=unique_texts, **self._request)
+            responses = _split_response(response, texts, unique_texts)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def aclose(self):
+        """
+        Sends the texts still waiting and waits for every batch to complete.
+        """
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,91 @@
+"""Persistent on-disk store of embeddings.
+"""
+import hashlib
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+SQLITE_MAX_PARAMETERS = 900
+
+
+def text_hash(text: str) -> bytes:
+    """
+    Returns the key of a text in the store.
+    """
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class EmbeddingStore:
+    """
+    A SQLite-backed store of embeddings keyed by (model, instruction, text hash), shared across runs and processes.
+
+    Vectors are stored as packed float32. Lookups and inserts are batched, so embedding a large corpus issues one
+    query per few hundred texts rather than one per text. The store is safe to share across threads.
+    """
+
+    def __init__(self, path: str):
+        """Args:
+            path (str): The SQLite database file. It is created if it does not exist.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS embeddings ('
+                               'model TEXT NOT NULL, instruction TEXT NOT NULL, text_hash BLOB NOT NULL, '
+                               'vector BLOB NOT NULL, PRIMARY KEY (model, instruction, text_hash)) WITHOUT ROWID')
+
+    def get_many(self, model: str, instruction: Optional[str], texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Looks up the embeddings of many texts.
+
+        Args:
+            model (str): The model or endpoint that produced the embeddings.
+            instruction (Optional[str]): The instruction the texts were embedded with.
+            texts (Sequence[str]): The texts.
+
+        Returns:
+            List[Optional[List[float]]]: The embedding of each text, or None where it is not stored.
+        """
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique_hashes), SQLITE_MAX_PARAMETERS):
+                batch = unique_hashes[start:start + SQLITE_MAX_PARAMETERS]
+                rows = self._conn.execute(
+                    'SELECT text_hash, vector FROM embeddings WHERE model = ? AND instruction = ? AND text_hash IN '
+                    f'({",".join("?" * len(batch))})', (model, instruction or '', *batch))
+                for key, vector in rows:
+                    found[key] = array('f', vector).tolist()
+        return [found.get(key) for key in hashes]
+
+    def put_many(self, model: str, instruction: Optional[str], texts: Iterable[str],
+                 embeddings: Iterable[List[float]]):
+        """
+        Stores the embeddings of many texts in one transaction.
+
+        Args:
+            model (str): The model or endpoint that produced the embeddings.
+            instruction (Optional[str]): The instruction the texts were embedded with.
+            texts (Iterable[str]): The texts.
+            embeddings (Iterable[List[float]]): The embedding of each text.
+        """
+        rows = [(model, instruction or '', text_hash(text), array('f', embedding).tobytes())
+                for text, embedding in zip(texts, embeddings)]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)', rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,156 @@
+"""Routing of model names to serving endpoints and invocation URLs.
+"""
+import os
+import threading
+from typing import AbstractSet, Dict, Optional, Tuple
+
+DATABRICKS_MODEL_URL_ENV = 'DATABRICKS_MODEL_URL'
+DATABRICKS_HOST_ENV = 'DATABRICKS_HOST'
+MODEL_URL_TEMPLATE = '{host}/serving-endpoints/{endpoint}/invocations'
+PAY_PER_TOKEN_PREFIX = 'databricks-'
+
+
+class EndpointRegistry:
+    """
+    Maps model names to serving endpoints, and serving endpoints to invocation URLs.
+
+    By default a supported model is sent to its pay-per-token endpoint, `databricks-<model>`, and any other model
+    name is taken as the name of a custom endpoint, e.g. a provisioned throughput or fine-tuned model. A model can be
+    routed elsewhere with `set`, to another endpoint name or to a full invocation URL.
+
+    `DATABRICKS_MODEL_URL` is read when the registry is created, or by `reload`, instead of on every request.
+    Invocation URLs are built once per endpoint and host. The host is the one the request's credentials were resolved
+    for, so that a token is only ever sent to its own workspace.
+    """
+
+    def __init__(self):
+        self._endpoints: Dict[str, str] = {}
+        self._endpoint_urls: Dict[str, str] = {}
+        self._urls: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """
+        Reads `DATABRICKS_MODEL_URL` from the environment again.
+        """
+        with self._lock:
+            self._model_url = os.getenv(DATABRICKS_MODEL_URL_ENV) or None
+            self._urls = {}
+
+    def set(self, model: str, endpoint: Optional[str] = None, url: Optional[str] = None):
+        """
+        Routes a model to a serving endpoint, or to an invocation URL.
+
+        Args:
+            model (str): The model name passed to the API, e.g. `dbrx-instruct`.
+            endpoint (Optional[str]): The serving endpoint name. Defaults to the model name. It also keys the rate
+                limits, the response cache and request coalescing.
+            url (Optional[str]): The full invocation URL. Defaults to the URL of the endpoint on the workspace.
+        """
+        if endpoint is None and url is None:
+            raise ValueError(f'set needs an endpoint or a url for model {model}')
+        endpoint = endpoint or model
+        with self._lock:
+            self._endpoints[model] = endpoint
+            if url is not None:
+                self._endpoint_urls[endpoint] = url
+            else:
+                self._endpoint_urls.pop(endpoint, None)
+
+    def remove(self, model: str):
+        """
+        Restores the default routing of a model.
+
+        Args:
+            model (str): The model name.
+        """
+        with self._lock:
+            endpoint = self._endpoints.pop(model, None)
+            if endpoint is not None and endpoint not in self._endpoints.values():
+                self._endpoint_urls.pop(endpoint, None)
+
+    def clear(self):
+        """
+        Restores the default routing of every model.
+        """
+        with self._lock:
+            self._endpoints.clear()
+            self._endpoint_urls.clear()
+
+    def endpoint(self, model: str, supported_models: AbstractSet[str] = frozenset()) -> str:
+        """
+        Returns the serving endpoint of a model.
+
+        Args:
+            model (str): The model name.
+            supported_models (AbstractSet[str]): The models served by pay-per-token endpoints.
+
+        Returns:
+            str: The serving endpoint name.
+        """
+        endpoint = self._endpoints.get(model)
+        if endpoint is not None:
+            return endpoint
+        if model in supported_models:
+            return PAY_PER_TOKEN_PREFIX + model
+        return model
+
+    def url(self, endpoint: str, host: str) -> str:
+        """
+        Returns the invocation URL of a serving endpoint.
+
+        Args:
+            endpoint (str): The serving endpoint name.
+            host (str): The workspace host of the resolved credentials.
+
+        Returns:
+            str: The invocation URL.
+        """
+        url = self._endpoint_urls.get(endpoint) or self._model_url
+        if url is not None:
+            return url
+        key = (endpoint, host)
+        url = self._urls.get(key)
+        if url is None:
+            url = MODEL_URL_TEMPLATE.format(host=host, endpoint=endpoint)
+            self._urls[key] = url
+        return url
+
+
+_endpoint_registry: Optional[EndpointRegistry] = None
+_endpoint_registry_lock = threading.Lock()
+
+
+def get_endpoint_registry() -> EndpointRegistry:
+    """
+    Returns the process-wide endpoint registry, creating it on first use.
+    """
+    global _endpoint_registry
+    if _endpoint_registry is None:
+        with _endpoint_registry_lock:
+            if _endpoint_registry is None:
+                _endpoint_registry = EndpointRegistry()
+    return _endpoint_registry
+
+
+def set_model_endpoint(model: str, endpoint: Optional[str] = None, url: Optional[str] = None):
+    """
+    Routes every request for a model from this process to a serving endpoint, or to an invocation URL.
+
+    Args:
+        model (str): The model name passed to the API, e.g. `dbrx-instruct`.
+        endpoint (Optional[str]): The serving endpoint name. Defaults to the model name.
+        url (Optional[str]): The full invocation URL. Defaults to the URL of the endpoint on the workspace.
+    """
+    get_endpoint_registry().set(model, endpoint=endpoint, url=url)
+
+
+def remove_model_endpoint(model: str):
+    """
+    Restores the default routing of a model.
+
+    Args:
+        model (str): The model name.
+    """
+    get_endpoint_registry().remove(model)
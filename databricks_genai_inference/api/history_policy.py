@@ -0,0 +1,235 @@
+"""Policies bounding the chat history sent with each ChatSession reply.
+"""
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+from databricks_genai_inference.api.chat_completion import ChatCompletion
+from databricks_genai_inference.api.chat_history import Message, MessageHistory
+
+SUMMARY_PROMPT = ('Summarize the following conversation in a few sentences. Keep every fact, name, decision and open '
+                  'question needed to continue it.\n\n')
+SUMMARY_HEADER = 'Summary of the earlier conversation:\n'
+
+
+def _system_prefix(history: MessageHistory) -> int:
+    """
+    Returns the number of leading system messages.
+    """
+    count = 0
+    while count < len(history) and history[count].get('role') == 'system':
+        count += 1
+    return count
+
+
+def _turn_start(history: MessageHistory, start: int) -> int:
+    """
+    Moves `start` forward to the next user message, so that a window does not begin in the middle of a turn. The last
+    message is always kept.
+    """
+    while start < len(history) - 1 and history[start].get('role') != 'user':
+        start += 1
+    return start
+
+
+def _window(history: MessageHistory, system: int, start: int) -> MessageHistory:
+    """
+    Returns the leading system messages followed by the messages from `start` on.
+    """
+    if start <= system:
+        return history.snapshot()
+    return MessageHistory([*history[:system], *history[start:]])
+
+
+class HistoryPolicy:
+    """
+    Decides which messages of a chat history are sent with the next request.
+    """
+
+    def select(self, history: MessageHistory) -> MessageHistory:
+        """
+        Returns the messages to send.
+
+        Args:
+            history (MessageHistory): The whole chat history, ending with the new user message.
+
+        Returns:
+            MessageHistory: The messages to send.
+        """
+        raise NotImplementedError
+
+    async def aselect(self, history: MessageHistory) -> MessageHistory:
+        """
+        Returns the messages to send, for async replies. Override it if selecting may block, e.g. on a request.
+
+        Args:
+            history (MessageHistory): The whole chat history, ending with the new user message.
+
+        Returns:
+            MessageHistory: The messages to send.
+        """
+        return self.select(history)
+
+
+class SlidingWindowPolicy(HistoryPolicy):
+    """
+    Sends the system message and the last `max_messages` other messages.
+    """
+
+    def __init__(self, max_messages: int):
+        """Args:
+            max_messages (int): The maximum number of messages sent besides the system message.
+        """
+        if max_messages < 1:
+            raise ValueError(f'max_messages must be at least 1, got {max_messages}')
+        self.max_messages = max_messages
+
+    def select(self, history: MessageHistory) -> MessageHistory:
+        system = _system_prefix(history)
+        start = max(system, len(history) - self.max_messages)
+        return _window(history, system, _turn_start(history, start))
+
+
+class TokenBudgetPolicy(HistoryPolicy):
+    """
+    Sends the system message and as many of the latest messages as fit in `max_tokens` estimated tokens. The new
+    user message is always sent, even if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_tokens: int):
+        """Args:
+            max_tokens (int): The estimated token budget of the messages sent.
+        """
+        self.max_tokens = max_tokens
+
+    def select(self, history: MessageHistory) -> MessageHistory:
+        system = _system_prefix(history)
+        budget = self.max_tokens - sum(message.tokens for message in history[:system])
+        start = len(history)
+        while start > system and history[start - 1].tokens <= budget:
+            start -= 1
+            budget -= history[start].tokens
+        return _window(history, system, _turn_start(history, min(start, len(history) - 1)))
+
+
+class SummarizingPolicy(HistoryPolicy):
+    """
+    Sends the whole history until it exceeds `max_tokens` estimated tokens, then replaces all but the last
+    `keep_last` messages with a summary added to the system message. The summary is extended incrementally: each
+    time the budget is exceeded again, the summarizer gets the previous summary and the messages since.
+
+    In async replies, a summarizer with an `asummarize` coroutine method, such as `chat_summarizer`, is awaited; other
+    summarizers run in a worker thread, so that the event loop is not blocked.
+
+    The policy keeps the summary of one session, so use one instance per `ChatSession`.
+    """
+
+    def __init__(self, summarizer: Callable[[List[Message]], str], max_tokens: int, keep_last: int = 4):
+        """Args:
+            summarizer (Callable[[List[Message]], str]): Returns a summary of the given messages, e.g.
+                `chat_summarizer("dbrx-instruct")`.
+            max_tokens (int): The estimated token budget of the messages sent.
+            keep_last (int): The number of latest messages never summarized.
+        """
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.summary: Optional[str] = None
+        self._summarized = 0
+
+    def _system_messages(self, history: MessageHistory, system: int) -> List[Message]:
+        if self.summary is None:
+            return history[:system]
+        prompt = '\n\n'.join([*(message.get('content') or '' for message in history[:system]),
+                                SUMMARY_HEADER + self.summary])
+        return [Message({'role': 'system', 'content': prompt})]
+
+    def _to_summarize(self, history: MessageHistory, system: int) -> Tuple[int, Optional[int]]:
+        """
+        Returns where the messages not summarized yet start, and where the messages to summarize now end, or None if
+        the history fits in the budget.
+        """
+        if self._summarized > len(history):
+            self.summary, self._summarized = None, 0
+        start = max(system, self._summarized)
+        if sum(message.tokens for message in self._system_messages(history, system)) + sum(
+                message.tokens for message in history[start:]) > self.max_tokens:
+            cut = _turn_start(history, max(start, len(history) - self.keep_last))
+            if cut > start:
+                return start, cut
+        return start, None
+
+    def _summarizer_input(self, history: MessageHistory, start: int, cut: int) -> List[Message]:
+        previous = [Message({'role': 'system', 'content': self.summary})] if self.summary else []
+        return [*previous, *history[start:cut]]
+
+    def _selected(self, history: MessageHistory, system: int, start: int) -> MessageHistory:
+        if self.summary is None:
+            return history.snapshot()
+        return MessageHistory([*self._system_messages(history, system), *history[start:]])
+
+    def select(self, history: MessageHistory) -> MessageHistory:
+        system = _system_prefix(history)
+        start, cut = self._to_summarize(history, system)
+        if cut is not None:
+            self.summary = self.summarizer(self._summarizer_input(history, start, cut))
+            self._summarized = start = cut
+        return self._selected(history, system, start)
+
+    async def aselect(self, history: MessageHistory) -> MessageHistory:
+        system = _system_prefix(history)
+        start, cut = self._to_summarize(history, system)
+        if cut is not None:
+            messages = self._summarizer_input(history, start, cut)
+            asummarize = getattr(self.summarizer, 'asummarize', None)
+            if asummarize is not None:
+                self.summary = await asummarize(messages)
+            else:
+                self.summary = await asyncio.to_thread(self.summarizer, messages)
+            self._summarized = start = cut
+        return self._selected(history, system, start)
+
+
+class ChatSummarizer:
+    """
+    A summarizer for `SummarizingPolicy` that asks a chat model for the summary, with an async variant for async
+    replies.
+    """
+
+    def __init__(self, model: str, **kwargs):
+        """Args:
+            model (str): The model name.
+            **kwargs: Additional model parameters, e.g. `max_tokens`.
+        """
+        self.model = model
+        self.parameters = kwargs
+
+    def _messages(self, messages: List[Message]) -> List[dict]:
+        transcript = '\n'.join(f'{message.get("role")}: {message.get("content")}' for message in messages)
+        return [{'role': 'user', 'content': SUMMARY_PROMPT + transcript}]
+
+    def __call__(self, messages: List[Message]) -> str:
+        """
+        Returns a summary of the given messages.
+        """
+        return ChatCompletion.create(model=self.model, messages=self._messages(messages), **self.parameters).message
+
+    async def asummarize(self, messages: List[Message]) -> str:
+        """
+        Returns a summary of the given messages, asynchronously.
+        """
+        response = await ChatCompletion.acreate(model=self.model, messages=self._messages(messages), **self.parameters)
+        return response.message
+
+
+def chat_summarizer(model: str, **kwargs) -> ChatSummarizer:
+    """
+    Returns a summarizer for `SummarizingPolicy` that asks a chat model for the summary.
+
+    Args:
+        model (str): The model name.
+        **kwargs: Additional model parameters, e.g. `max_tokens`.
+
+    Returns:
+        ChatSummarizer: The summarizer, also usable from async replies.
+    """
+    return ChatSummarizer(model, **kwargs)
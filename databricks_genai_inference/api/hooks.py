@@ -0,0 +1,300 @@
+"""Instrumentation hooks observing the requests sent by the API resources.
+"""
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar[Optional['RequestTrace']] = contextvars.ContextVar('request_trace',
+                                                                                         default=None)
+
+
+class RequestHook:
+    """
+    Observes the requests sent by an API resource. Subclass it and override the events of interest.
+
+    Each request emits `on_request_start` and `on_response_headers`, then, for streams, `on_first_chunk` and
+    `on_chunk` for every chunk, and finally `on_complete` or `on_error`. Every event gets the `RequestTrace` of the
+    request with the timings known so far. Responses answered from the response cache, and calls coalesced with an
+    identical request in flight, emit no events. An exception raised by a hook is logged and does not fail the request.
+    """
+
+    def on_request_start(self, trace: 'RequestTrace'):
+        """Called when the request is about to be sent, after the credentials were resolved."""
+
+    def on_response_headers(self, trace: 'RequestTrace'):
+        """Called when the response headers of the last attempt arrived."""
+
+    def on_first_chunk(self, trace: 'RequestTrace', chunk: Any):
+        """Called with the first chunk of a stream, before `on_chunk`."""
+
+    def on_chunk(self, trace: 'RequestTrace', chunk: Any):
+        """Called with every chunk of a stream."""
+
+    def on_complete(self, trace: 'RequestTrace', response: Any):
+        """Called with the response once it is parsed, or with None once a stream ended."""
+
+    def on_error(self, trace: 'RequestTrace', error: BaseException):
+        """Called when the request failed."""
+
+
+class RequestTrace:
+    """
+    The progress and timings of one request. Times are in seconds.
+
+    Attributes:
+        resource (str): The name of the API resource, e.g. `ChatCompletion`.
+        endpoint (str): The serving endpoint.
+        stream (bool): Whether the response is streamed.
+        auth_time (float): Resolving the credentials.
+        send_time (Optional[float]): From sending the request to its response headers, including rate limiting
+            waits and retries.
+        ttfb (Optional[float]): From the start of the request to its response headers.
+        ttft (Optional[float]): From the start of the request to the first chunk of a stream.
+        total_time (Optional[float]): From the start of the request to its completion or failure.
+        status (Optional[int]): The HTTP status of the response.
+        headers (Optional[Mapping]): The response headers.
+        retries (int): The number of retries.
+        chunks (int): The number of chunks received from a stream.
+        usage (Optional[dict]): The token usage reported by the server.
+        error (Optional[BaseException]): The error the request failed with.
+    """
+
+    def __init__(self, hooks: Tuple[RequestHook, ...], resource: str, endpoint: str, started: float):
+        """Args:
+            hooks (Tuple[RequestHook, ...]): The hooks notified of the events of the request.
+            resource (str): The name of the API resource.
+            endpoint (str): The serving endpoint.
+            started (float): The `time.perf_counter()` at which the request started.
+        """
+        self.hooks = hooks
+        self.resource = resource
+        self.endpoint = endpoint
+        self.started = started
+        self.auth_time = time.perf_counter() - started
+        self.stream = False
+        self.send_time: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.status: Optional[int] = None
+        self.headers = None
+        self.retries = 0
+        self.chunks = 0
+        self.usage: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+        self._sent = started
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """
+        Returns the completion tokens per second of a stream after its first chunk, or None for other requests. The
+        tokens are the reported completion tokens, or the number of chunks if the server reported no usage.
+        """
+        if not self.stream or self.ttft is None or self.total_time is None or self.total_time <= self.ttft:
+            return None
+        tokens = (self.usage or {}).get('completion_tokens') or self.chunks
+        return tokens / (self.total_time - self.ttft)
+
+    def _emit(self, event: str, *args):
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(self, *args)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Request hook %r failed on %s', hook, event)
+
+    def response_headers(self, status: int, headers):
+        """
+        Records the arrival of the response headers.
+
+        Args:
+            status (int): The HTTP status.
+            headers (Mapping): The response headers.
+        """
+        now = time.perf_counter()
+        self.status = status
+        self.headers = headers
+        self.send_time = now - self._sent
+        self.ttfb = now - self.started
+        self._emit('on_response_headers')
+
+    def retried(self):
+        """
+        Records a retry.
+        """
+        self.retries += 1
+
+    def _start(self, stream: bool):
+        self.stream = stream
+        self._emit('on_request_start')
+        self._sent = time.perf_counter()
+
+    def _chunk(self, chunk):
+        self.chunks += 1
+        if self.chunks == 1:
+            self.ttft = time.perf_counter() - self.started
+            self._emit('on_first_chunk', chunk)
+        usage = getattr(chunk, 'response', {}).get('usage')
+        if usage:
+            self.usage = usage
+        self._emit('on_chunk', chunk)
+
+    def _complete(self, response):
+        self.total_time = time.perf_counter() - self.started
+        if response is not None:
+            self.usage = getattr(response, 'response', {}).get('usage') or self.usage
+        self._emit('on_complete', response)
+
+    def _fail(self, error: BaseException):
+        self.total_time = time.perf_counter() - self.started
+        self.error = error
+        self.status = getattr(error, 'status', None) or self.status
+        self._emit('on_error', error)
+
+    def call(self, send: Callable, stream: bool):
+        """
+        Sends the request with `send`, emitting its events.
+
+        Args:
+            send (Callable): Sends the request and returns its response, or its stream of chunks.
+            stream (bool): Whether the response is streamed.
+
+        Returns:
+            The response, or a stream of chunks emitting the chunk events.
+        """
+        self._start(stream)
+        token = _current_trace.set(self)
+        try:
+            response = send()
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            _current_trace.reset(token)
+        if stream:
+            return self._trace_stream(response)
+        self._complete(response)
+        return response
+
+    async def acall(self, send: Callable, stream: bool):
+        """
+        Sends the request with the coroutine function `send`, emitting its events.
+
+        Args:
+            send (Callable): Sends the request and returns its response, or its async stream of chunks.
+            stream (bool): Whether the response is streamed.
+
+        Returns:
+            The response, or an async stream of chunks emitting the chunk events.
+        """
+        self._start(stream)
+        token = _current_trace.set(self)
+        try:
+            response = await send()
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            _current_trace.reset(token)
+        if stream:
+            return self._atrace_stream(response)
+        self._complete(response)
+        return response
+
+    def _trace_stream(self, chunks) -> Iterator:
+        iterator = iter(chunks)
+        try:
+            while True:
+                # The stream sends its request on the first `next`, which must see the trace.
+                token = _current_trace.set(self)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    _current_trace.reset(token)
+                self._chunk(chunk)
+                yield chunk
+        except GeneratorExit:
+            iterator.close()
+            self._complete(None)
+            raise
+        except BaseException as e:
+            self._fail(e)
+            raise
+        self._complete(None)
+
+    async def _atrace_stream(self, chunks) -> AsyncIterator:
+        iterator = chunks.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                self._chunk(chunk)
+                yield chunk
+        except GeneratorExit:
+            await iterator.aclose()
+            self._complete(None)
+            raise
+        except BaseException as e:
+            self._fail(e)
+            raise
+        self._complete(None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """
+    Returns the trace of the request being sent, or None if no hooks observe it.
+    """
+    return _current_trace.get()
+
+
+_hooks: Dict[type, Tuple[RequestHook, ...]] = {}
+_active_hooks: Dict[type, Tuple[RequestHook, ...]] = {}
+_hooks_lock = threading.Lock()
+
+
+def add_hook(resource: type, hook: RequestHook):
+    """
+    Notifies a hook of the requests of an API resource and of its subclasses.
+
+    Args:
+        resource (type): The API resource, e.g. `ChatCompletion`, or `FoundationModelAPIResource` for all of them.
+        hook (RequestHook): The hook.
+    """
+    with _hooks_lock:
+        _hooks[resource] = (*_hooks.get(resource, ()), hook)
+        _active_hooks.clear()
+
+
+def remove_hook(resource: type, hook: RequestHook):
+    """
+    Stops notifying a hook of the requests of an API resource.
+
+    Args:
+        resource (type): The API resource the hook was added to.
+        hook (RequestHook): The hook.
+    """
+    with _hooks_lock:
+        _hooks[resource] = tuple(added for added in _hooks.get(resource, ()) if added is not hook)
+        _active_hooks.clear()
+
+
+def get_hooks(resource: type) -> Tuple[RequestHook, ...]:
+    """
+    Returns the hooks notified of the requests of an API resource, including the hooks of its base classes.
+
+    Args:
+        resource (type): The API resource.
+    """
+    hooks = _active_hooks.get(resource)
+    if hooks is None:
+        with _hooks_lock:
+            hooks = tuple(hook for klass in reversed(resource.__mro__) for hook in _hooks.get(klass, ()))
+            _active_hooks[resource] = hooks
+    return hooks
@@ -0,0 +1,276 @@
+"""In-process metrics of the requests sent by the API resources, exported in the Prometheus text format.
+"""
+import bisect
+import itertools
+import threading
+import weakref
+from collections import Counter, deque
+from typing import Dict, Optional, Sequence
+
+from databricks_genai_inference.api.abstract.foundation_model_api_resource import FoundationModelAPIResource
+from databricks_genai_inference.api.hooks import RequestHook, RequestTrace
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = 'databricks_genai'
+
+
+class Histogram:
+    """
+    Counts of observed values in fixed buckets, as in a Prometheus histogram.
+
+    Attributes:
+        buckets (Sequence[float]): The upper bounds of the buckets, in increasing order.
+        counts (List[int]): The number of values in each bucket, and above the last one. Not cumulative.
+        sum (float): The sum of the values.
+        count (int): The number of values.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram'):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+
+class EndpointMetrics:
+    """
+    The metrics of one serving endpoint.
+
+    Attributes:
+        requests (int): The number of requests.
+        errors (Counter): The number of failed requests by HTTP status, 0 when there was no response.
+        retries (int): The number of retries.
+        prompt_tokens (int): The prompt tokens reported by the server.
+        completion_tokens (int): The completion tokens reported by the server.
+        latency (Histogram): The total time of the requests, in seconds.
+        ttft (Histogram): The time to first token of streamed requests, in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.requests = 0
+        self.errors = Counter()
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = Histogram(buckets)
+        self.ttft = Histogram(buckets)
+
+    def merge(self, other: 'EndpointMetrics'):
+        self.requests += other.requests
+        self.errors.update(other.errors)
+        self.retries += other.retries
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.latency.merge(other.latency)
+        self.ttft.merge(other.ttft)
+
+
+class _Shard:
+    """
+    The metrics one thread records, by endpoint. Only the thread-locals reference it, so it is finalized when the
+    thread exits.
+    """
+    __slots__ = ('metrics', '__weakref__')
+
+    def __init__(self):
+        self.metrics: Dict[str, EndpointMetrics] = {}
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry(RequestHook):
+    """
+    Records per-endpoint request and error counts, retries, latency and time-to-first-token histograms, and token
+    usage, from the traces of the requests it observes as a hook.
+
+    Each thread records into a shard of its own, so recording takes no lock; shards are merged when the metrics are
+    read. When a thread exits, its shard is merged into a retired total, so the requests of finished threads stay
+    counted while the number of shards stays bounded by the number of live threads.
+
+        metrics = enable_metrics()
+        ...
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """Args:
+            latency_buckets (Sequence[float]): The upper bounds of the histogram buckets, in seconds.
+        """
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self._shards: Dict[int, Dict[str, EndpointMetrics]] = {}
+        self._retired: Dict[str, EndpointMetrics] = {}
+        self._retiring = deque()
+        self._keys = itertools.count()
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            holder = _Shard()
+            shard = holder.metrics
+            with self._lock:
+                self._collect_retired()
+                key = next(self._keys)
+                self._shards[key] = shard
+                generation = self._generation
+            # The thread-local holder is dropped when the thread exits, which retires its shard.
+            weakref.finalize(holder, self._retire, key, generation)
+            self._local.holder = holder
+            self._local.shard = shard
+        metrics = shard.get(endpoint)
+        if metrics is None:
+            metrics = shard[endpoint] = EndpointMetrics(self.latency_buckets)
+        return metrics
+
+    def _retire(self, key: int, generation: int):
+        # Finalizers may run while the lock is held, e.g. when `reset` drops the thread locals, so the shard is only
+        # queued here and merged by `_collect_retired`.
+        self._retiring.append((key, generation))
+
+    def _collect_retired(self):
+        # Called with the lock held.
+        while self._retiring:
+            key, generation = self._retiring.popleft()
+            if generation == self._generation:
+                self._merge_into(self._retired, self._shards.pop(key, None) or {})
+
+    def _merge_into(self, merged: Dict[str, EndpointMetrics], shard: Dict[str, EndpointMetrics]):
+        for endpoint, metrics in list(shard.items()):
+            if endpoint not in merged:
+                merged[endpoint] = EndpointMetrics(self.latency_buckets)
+            merged[endpoint].merge(metrics)
+
+    def _record(self, trace: RequestTrace) -> EndpointMetrics:
+        metrics = self._endpoint_metrics(trace.endpoint)
+        metrics.requests += 1
+        metrics.retries += trace.retries
+        if trace.total_time is not None:
+            metrics.latency.observe(trace.total_time)
+        if trace.ttft is not None:
+            metrics.ttft.observe(trace.ttft)
+        return metrics
+
+    def on_complete(self, trace: RequestTrace, response):
+        metrics = self._record(trace)
+        usage = trace.usage or {}
+        metrics.prompt_tokens += usage.get('prompt_tokens') or 0
+        metrics.completion_tokens += usage.get('completion_tokens') or 0
+
+    def on_error(self, trace: RequestTrace, error: BaseException):
+        metrics = self._record(trace)
+        metrics.errors[int(trace.status or 0)] += 1
+
+    def snapshot(self) -> Dict[str, EndpointMetrics]:
+        """
+        Returns the metrics of every endpoint, merged across threads.
+        """
+        merged: Dict[str, EndpointMetrics] = {}
+        with self._lock:
+            self._collect_retired()
+            self._merge_into(merged, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._merge_into(merged, shard)
+        return merged
+
+    def reset(self):
+        """
+        Drops every recorded metric.
+        """
+        with self._lock:
+            self._shards = {}
+            self._retired = {}
+            self._generation += 1
+            self._local = threading.local()
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+
+        def counter(name: str, help_text: str, samples):
+            lines.extend((f'# HELP {METRIC_PREFIX}_{name} {help_text}', f'# TYPE {METRIC_PREFIX}_{name} counter'))
+            lines.extend(f'{METRIC_PREFIX}_{name}{{{labels}}} {value}' for labels, value in samples)
+
+        def histogram(name: str, help_text: str, attribute: str):
+            lines.extend((f'# HELP {METRIC_PREFIX}_{name} {help_text}', f'# TYPE {METRIC_PREFIX}_{name} histogram'))
+            for endpoint, metrics in snapshot:
+                values = getattr(metrics, attribute)
+                labels = f'endpoint="{_label(endpoint)}"'
+                cumulative = 0
+                for bound, count in zip((*self.latency_buckets, '+Inf'), values.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_{name}_sum{{{labels}}} {values.sum}')
+                lines.append(f'{METRIC_PREFIX}_{name}_count{{{labels}}} {values.count}')
+
+        counter('requests_total', 'Requests sent, by serving endpoint.',
+                ((f'endpoint="{_label(endpoint)}"', metrics.requests) for endpoint, metrics in snapshot))
+        counter('errors_total', 'Failed requests, by serving endpoint and HTTP status (0 without a response).',
+                ((f'endpoint="{_label(endpoint)}",status="{status}"', count)
+                 for endpoint, metrics in snapshot
+                 for status, count in sorted(metrics.errors.items())))
+        counter('retries_total', 'Retried attempts, by serving endpoint.',
+                ((f'endpoint="{_label(endpoint)}"', metrics.retries) for endpoint, metrics in snapshot))
+        counter('prompt_tokens_total', 'Prompt tokens reported by the server, by serving endpoint.',
+                ((f'endpoint="{_label(endpoint)}"', metrics.prompt_tokens) for endpoint, metrics in snapshot))
+        counter('completion_tokens_total', 'Completion tokens reported by the server, by serving endpoint.',
+                ((f'endpoint="{_label(endpoint)}"', metrics.completion_tokens) for endpoint, metrics in snapshot))
+        histogram('request_duration_seconds', 'Total time of the requests, by serving endpoint.', 'latency')
+        histogram('time_to_first_token_seconds', 'Time to the first chunk of streamed requests, by serving endpoint.',
+                  'ttft')
+        return '\n'.join(lines) + '\n'
+
+
+_metrics: Optional[MetricsRegistry] = None
+
+
+def enable_metrics(latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> MetricsRegistry:
+    """
+    Records the metrics of every request sent by this process.
+
+    Args:
+        latency_buckets (Sequence[float]): The upper bounds of the histogram buckets, in seconds.
+
+    Returns:
+        MetricsRegistry: The registry.
+    """
+    global _metrics
+    disable_metrics()
+    _metrics = MetricsRegistry(latency_buckets=latency_buckets)
+    FoundationModelAPIResource.add_hook(_metrics)
+    return _metrics
+
+
+def disable_metrics():
+    """
+    Stops recording metrics and drops them.
+    """
+    global _metrics
+    if _metrics is not None:
+        FoundationModelAPIResource.remove_hook(_metrics)
+        _metrics = None
+
+
+def get_metrics() -> Optional[MetricsRegistry]:
+    """
+    Returns the process-wide metrics registry, or None if metrics are disabled.
+    """
+    return _metrics
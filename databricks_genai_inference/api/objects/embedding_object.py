@@ -1,5 +1,8 @@
 """EmbeddingObject class.
 """
+import functools
+import itertools
+
 from databricks_genai_inference.api.abstract.foundation_model_object import FoundationModelObject
 
 
@@ -8,7 +11,7 @@ class EmbeddingObject(FoundationModelObject):
     A class representing an embedding response object.
     """
 
-    @property
+    @functools.cached_property
     def embeddings(self):
         """
         Returns the embedding content from the chat completion API response.
@@ -17,3 +20,36 @@ class EmbeddingObject(FoundationModelObject):
             List: The embedding content.
         """
         return [data['embedding'] for data in self.response['data']]
+
+    def as_array(self, dtype='float32'):
+        """
+        Returns the embeddings as a contiguous 2-D NumPy array of shape (number of inputs, embedding dimension).
+
+        The array is decoded straight from the response, without building intermediate lists, and cached per dtype.
+        It is read-only because it is shared by every caller; use `.copy()` to get a writable array.
+
+        Args:
+            dtype: The NumPy dtype of the array. Defaults to float32.
+
+        Returns:
+            numpy.ndarray: The embeddings.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        try:
+            import numpy as np  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError('as_array requires NumPy. Install it with '
+                              '`pip install wfork-databricks-genai-inference[numpy]`.') from e
+        dtype = np.dtype(dtype)
+        arrays = self.__dict__.setdefault('_arrays', {})
+        array = arrays.get(dtype)
+        if array is None:
+            data = self.response['data']
+            dim = len(data[0]['embedding']) if data else 0
+            values = itertools.chain.from_iterable(row['embedding'] for row in data)
+            array = np.fromiter(values, dtype=dtype, count=len(data) * dim).reshape(len(data), dim)
+            array.flags.writeable = False
+            arrays[dtype] = array
+        return array
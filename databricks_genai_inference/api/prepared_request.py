@@ -0,0 +1,133 @@
+"""Prepared request templates for repeated calls with the same parameters.
+"""
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from databricks_genai_inference.api.abstract.foundation_model_api_resource import request_headers
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.endpoints import get_endpoint_registry
+from databricks_genai_inference.api.exception import FoundationModelAPIException
+from databricks_genai_inference.api.util import RawJSON, dumps_json
+
+if TYPE_CHECKING:
+    from databricks_genai_inference.api.abstract.foundation_model_api_resource import FoundationModelAPIResource
+
+CALL_OPTIONS = ('timeout', 'max_retries')
+
+
+def _partial_model(model_input: Type[BaseModel], names: Iterable[str]) -> Type[BaseModel]:
+    """
+    Returns an input schema with only the given fields of `model_input`, validated the same way.
+    """
+    fields = {name: (field.annotation, field) for name, field in model_input.model_fields.items() if name in names}
+    return create_model(f'Partial{model_input.__name__}', __config__=model_input.model_config, **fields)
+
+
+class _PreparedBody(dict, RawJSON):
+    """
+    A request body made of the encoded fixed parameters of a prepared request and the parameters of one call.
+    """
+
+    def __init__(self, fixed: dict, encoded_fixed: bytes, varying: dict):
+        super().__init__(fixed)
+        self.update(varying)
+        self._encoded_fixed = encoded_fixed
+        self._varying = varying
+
+    def encode_json(self) -> bytes:
+        varying = dumps_json(self._varying)
+        if not self._encoded_fixed:
+            return varying
+        if len(varying) == 2:
+            return b'{' + self._encoded_fixed + b'}'
+        return b''.join((b'{', self._encoded_fixed, b',', varying[1:]))
+
+
+class PreparedRequest:
+    """
+    A request template for repeated calls to one model with the same parameters, returned by `prepare`.
+
+    The fixed parameters are validated and encoded once, and the URL and headers are resolved once per credential
+    refresh, so each call only validates and encodes the parameters it adds. Responses go through the same retries,
+    rate limiting, caching and coalescing as `create`. It is thread-safe and can be shared.
+
+        chat = ChatCompletion.prepare(model="dbrx-instruct", temperature=0.7, max_tokens=128)
+        response = chat(messages=[{"role": "user", "content": "Hi"}])
+        response = await chat.acall(messages=[{"role": "user", "content": "Hi"}])
+    """
+
+    def __init__(self, resource: Type['FoundationModelAPIResource'], **kwargs):
+        """Args:
+            resource (Type[FoundationModelAPIResource]): The API resource, e.g. `ChatCompletion`.
+            **kwargs: The keyword arguments fixed for every call, including `model`.
+        """
+        self.resource = resource
+        model_input = resource.model_input
+        fixed = self._validate(_partial_model(model_input, kwargs), kwargs)
+        if 'model' not in fixed:
+            raise FoundationModelAPIException(message='A prepared request needs a fixed model')
+        self.model = fixed.pop('model')
+        self.endpoint = resource._endpoint(self.model)
+        self._options = {name: fixed.pop(name) for name in CALL_OPTIONS if name in fixed}
+        self._fixed = fixed
+        self._encoded_fixed = dumps_json(fixed)[1:-1]
+        self._varying_input = _partial_model(model_input, set(model_input.model_fields) - set(kwargs))
+        self._target: Optional[Tuple[Credentials, str, dict]] = None
+
+    def _validate(self, model_input: Type[BaseModel], kwargs: dict) -> dict:
+        try:
+            return self.resource._request_body(model_input(**kwargs))
+        except ValidationError as e:
+            raise FoundationModelAPIException(message=str(e)) from e
+
+    def _body(self, kwargs: dict) -> Tuple[_PreparedBody, int, int]:
+        varying = self._validate(self._varying_input, kwargs)
+        timeout = varying.pop('timeout', self._options.get('timeout', self.resource.DEFAULT_TIMEOUT))
+        max_retries = varying.pop('max_retries', self._options.get('max_retries', self.resource.MAX_RETRIES))
+        return _PreparedBody(self._fixed, self._encoded_fixed, varying), timeout, max_retries
+
+    def target(self, credentials: Credentials) -> Tuple[str, dict]:
+        """
+        Returns the URL and headers of the request, resolved again only when the credentials changed.
+
+        Args:
+            credentials (Credentials): The current credentials.
+
+        Returns:
+            Tuple[str, dict]: The URL and headers.
+        """
+        target = self._target
+        if target is None or target[0] is not credentials:
+            url = get_endpoint_registry().url(self.endpoint, credentials.host)
+            target = (credentials, url, request_headers(credentials))
+            self._target = target
+        return target[1], target[2]
+
+    def __call__(self, client=None, **kwargs):
+        """
+        Creates a new API response.
+
+        Args:
+            client (requests.Session): The client for http call. Defaults to the library-managed pool.
+            **kwargs: The keyword arguments for the API that are not fixed, e.g. `messages`.
+
+        Returns:
+            The result of the API query, as returned by `create`.
+        """
+        json, timeout, max_retries = self._body(kwargs)
+        return self.resource._make_prepared_query(client, self, json, timeout, max_retries)
+
+    async def acall(self, client=None, **kwargs):
+        """
+        Creates a new API response, asynchronously.
+
+        Args:
+            client (httpx.AsyncClient): The client for http call. Defaults to the library-managed client.
+            **kwargs: The keyword arguments for the API that are not fixed, e.g. `messages`.
+
+        Returns:
+            The result of the API query, as returned by `acreate`.
+        """
+        json, timeout, max_retries = self._body(kwargs)
+        return await self.resource._amake_prepared_query(client, self, json, timeout, max_retries)
@@ -0,0 +1,183 @@
+"""Client-side rate limiting per serving endpoint.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns a rough local estimate of the number of tokens in a text, without loading a tokenizer.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_request_tokens(json: dict) -> int:
+    """
+    Returns a rough estimate of the tokens a request consumes: its prompt, messages or input, plus `max_tokens`.
+
+    Args:
+        json (dict): The request body.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    tokens = json.get('max_tokens') or 0
+    for message in json.get('messages') or ():
+        tokens += estimate_tokens(str(message.get('content') or ''))
+    for field in ('prompt', 'input', 'instruction'):
+        value = json.get(field)
+        if isinstance(value, str):
+            tokens += estimate_tokens(value)
+        elif isinstance(value, list):
+            tokens += sum(estimate_tokens(str(item)) for item in value)
+    return tokens
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Callers reserve tokens up front and are told how long to wait for them, so waiting
+    callers are served in order instead of polling.
+
+    Attributes:
+        rate (float): The tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError(f'rate and capacity must be positive, got rate={rate} and capacity={capacity}')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` tokens from the bucket, going into debt if there are not enough.
+
+        Args:
+            amount (float): The number of tokens.
+
+        Returns:
+            float: The seconds to wait before the reserved tokens are available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Throttles requests on both requests per second and estimated tokens per minute. Callers over the limit wait for
+    their turn instead of failing. `acquire` blocks the calling thread and `aacquire` suspends the calling coroutine;
+    both draw from the same buckets.
+
+    Attributes:
+        requests_per_second (Optional[float]): The allowed request rate.
+        tokens_per_minute (Optional[float]): The allowed estimated token rate.
+    """
+
+    def __init__(self,
+                 requests_per_second: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 burst: Optional[int] = None):
+        """Args:
+            requests_per_second (Optional[float]): The allowed request rate.
+            tokens_per_minute (Optional[float]): The allowed estimated token rate.
+            burst (Optional[int]): The number of requests allowed at once. Defaults to one second of requests.
+        """
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self._request_bucket = TokenBucket(requests_per_second, burst or max(1.0, requests_per_second)) if (
+            requests_per_second) else None
+        self._token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self._request_bucket is not None:
+            delay = self._request_bucket.reserve(1)
+        if self._token_bucket is not None and tokens:
+            delay = max(delay, self._token_bucket.reserve(tokens))
+        return delay
+
+    def acquire(self, tokens: int = 0):
+        """
+        Blocks until one request using `tokens` tokens is allowed.
+
+        Args:
+            tokens (int): The estimated tokens of the request.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0):
+        """
+        Waits until one request using `tokens` tokens is allowed.
+
+        Args:
+            tokens (int): The estimated tokens of the request.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def set_rate_limit(endpoint: str,
+                   requests_per_second: Optional[float] = None,
+                   tokens_per_minute: Optional[float] = None,
+                   burst: Optional[int] = None) -> RateLimiter:
+    """
+    Throttles every request to a serving endpoint from this process.
+
+    Args:
+        endpoint (str): The serving endpoint name, e.g. `databricks-dbrx-instruct`.
+        requests_per_second (Optional[float]): The allowed request rate.
+        tokens_per_minute (Optional[float]): The allowed estimated token rate.
+        burst (Optional[int]): The number of requests allowed at once. Defaults to one second of requests.
+
+    Returns:
+        RateLimiter: The limiter of the endpoint.
+    """
+    rate_limiter = RateLimiter(requests_per_second=requests_per_second,
+                               tokens_per_minute=tokens_per_minute,
+                               burst=burst)
+    _rate_limiters[endpoint] = rate_limiter
+    return rate_limiter
+
+
+def remove_rate_limit(endpoint: str):
+    """
+    Stops throttling requests to a serving endpoint.
+
+    Args:
+        endpoint (str): The serving endpoint name.
+    """
+    _rate_limiters.pop(endpoint, None)
+
+
+def get_rate_limiter(endpoint: str) -> Optional[RateLimiter]:
+    """
+    Returns the limiter of a serving endpoint, or None if it is not throttled.
+
+    Args:
+        endpoint (str): The serving endpoint name.
+    """
+    return _rate_limiters.get(endpoint)
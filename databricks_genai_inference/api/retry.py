@@ -0,0 +1,198 @@
+"""Retry policies for API requests.
+"""
+import asyncio
+import email.utils
+import threading
+import time
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+import httpx
+import requests
+from tenacity import (AsyncRetrying, RetryCallState, Retrying, retry_if_exception_type, retry_if_result,
+                      stop_after_attempt, wait_random_exponential)
+
+from databricks_genai_inference.api.hooks import current_trace
+
+DEFAULT_MIN_WAIT = 1.0
+DEFAULT_MAX_WAIT = 60.0
+DEFAULT_MAX_RETRY_AFTER = 60.0
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError, httpx.ConnectError, httpx.ReadError, httpx.WriteError,
+                     httpx.RemoteProtocolError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a `Retry-After` header, given either as delay seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): The header value.
+
+    Returns:
+        Optional[float]: The delay in seconds, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryStats:
+    """
+    Thread-safe counters of the retries performed by a `RetryPolicy`.
+
+    Attributes:
+        retries (int): The total number of retries.
+        rate_limited (int): Retries after a 429 response.
+        server_errors (int): Retries after a 5xx response.
+        connection_errors (int): Retries after a connection error.
+    """
+
+    def __init__(self):
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.connection_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, retry_state: RetryCallState):
+        """
+        Counts a retry about to happen after the given attempt.
+        """
+        with self._lock:
+            self.retries += 1
+            if retry_state.outcome.failed:
+                self.connection_errors += 1
+            elif retry_state.outcome.result().status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                self.rate_limited += 1
+            else:
+                self.server_errors += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Returns a snapshot of the counters.
+        """
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'server_errors': self.server_errors,
+                'connection_errors': self.connection_errors,
+            }
+
+    def reset(self):
+        """
+        Resets every counter to zero.
+        """
+        with self._lock:
+            self.retries = self.rate_limited = self.server_errors = self.connection_errors = 0
+
+
+class RetryPolicy:
+    """
+    A reusable retry policy for sending API requests.
+
+    Requests are retried on 429 responses, honoring the `Retry-After` header, on 5xx responses and on connection
+    errors, with jittered exponential backoff. The tenacity retryers are built once per number of attempts and shared
+    across calls and threads.
+
+    Attributes:
+        min_wait (float): The minimum backoff in seconds.
+        max_wait (float): The maximum backoff in seconds.
+        max_retry_after (float): The maximum delay in seconds honored from a `Retry-After` header.
+        stats (RetryStats): The counters of the retries performed with this policy.
+    """
+
+    def __init__(self,
+                 min_wait: float = DEFAULT_MIN_WAIT,
+                 max_wait: float = DEFAULT_MAX_WAIT,
+                 max_retry_after: float = DEFAULT_MAX_RETRY_AFTER):
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.max_retry_after = max_retry_after
+        self.stats = RetryStats()
+        self._backoff = wait_random_exponential(min=min_wait, max=max_wait)
+        self._retry = retry_if_result(self._is_retryable_response) | retry_if_exception_type(CONNECTION_ERRORS)
+        self._retryers: Dict[Tuple[int, bool], Retrying] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_retryable_response(response) -> bool:
+        return response.status_code == HTTPStatus.TOO_MANY_REQUESTS or response.status_code >= 500
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        if not retry_state.outcome.failed:
+            retry_after = parse_retry_after(retry_state.outcome.result().headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        return self._backoff(retry_state)
+
+    def _before_sleep(self, retry_state: RetryCallState):
+        self.stats.record(retry_state)
+        trace = current_trace()
+        if trace is not None:
+            trace.retried()
+        if not retry_state.outcome.failed:
+            # Release the connection of the discarded response, which may still be streaming.
+            response = retry_state.outcome.result()
+            try:
+                response.close()
+            except RuntimeError:
+                asyncio.ensure_future(response.aclose())
+
+    @staticmethod
+    def _give_up(retry_state: RetryCallState):
+        # Return the last response so that the caller surfaces the API error, or re-raise the last exception.
+        return retry_state.outcome.result()
+
+    def _retryer(self, max_attempts: int, is_async: bool) -> Retrying:
+        key = (max_attempts, is_async)
+        retryer = self._retryers.get(key)
+        if retryer is None:
+            with self._lock:
+                retryer = self._retryers.get(key)
+                if retryer is None:
+                    retryer = (AsyncRetrying if is_async else Retrying)(retry=self._retry,
+                                                                        wait=self._wait,
+                                                                        stop=stop_after_attempt(max_attempts),
+                                                                        before_sleep=self._before_sleep,
+                                                                        retry_error_callback=self._give_up)
+                    self._retryers[key] = retryer
+        return retryer
+
+    def call(self, fn, max_attempts: int, **kwargs):
+        """
+        Calls `fn` until it returns a non-retryable response or `max_attempts` attempts were made.
+
+        Args:
+            fn: The function sending the request, e.g. `send_request`.
+            max_attempts (int): The maximum number of attempts, including the first one.
+            **kwargs: The keyword arguments for `fn`.
+
+        Returns:
+            The last response.
+        """
+        return self._retryer(max_attempts, is_async=False)(fn, **kwargs)
+
+    async def acall(self, fn, max_attempts: int, **kwargs):
+        """
+        Awaits `fn` until it returns a non-retryable response or `max_attempts` attempts were made.
+
+        Args:
+            fn: The coroutine function sending the request, e.g. `asend_request`.
+            max_attempts (int): The maximum number of attempts, including the first one.
+            **kwargs: The keyword arguments for `fn`.
+
+        Returns:
+            The last response.
+        """
+        return await self._retryer(max_attempts, is_async=True)(fn, **kwargs)
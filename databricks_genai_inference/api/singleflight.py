@@ -0,0 +1,155 @@
+"""Coalescing of identical in-flight requests.
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from databricks_genai_inference.api.cache import request_key
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Deduplicates identical requests in flight at the same time: the first caller sends the request and every
+    identical call made before it completes waits for, and gets, the same result or exception.
+
+    Only deterministic, non-streaming requests are coalesced, by the same rule as the response cache. Sync callers
+    are coalesced across threads, async callers within their event loop. An async request keeps running for the other
+    waiters when the caller that started it is cancelled.
+
+    Attributes:
+        calls (int): The number of requests actually sent.
+        coalesced (int): The number of calls answered by a request already in flight.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._ain_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary())
+
+    @staticmethod
+    def key_for(endpoint: str, json: dict, deterministic: bool) -> Optional[str]:
+        """
+        Returns the key identical requests share, or None if the request must not be coalesced.
+
+        Args:
+            endpoint (str): The serving endpoint name.
+            json (dict): The request body.
+            deterministic (bool): Whether identical requests are expected to get identical responses.
+
+        Returns:
+            Optional[str]: The key.
+        """
+        if json.get('stream') or not deterministic:
+            return None
+        return request_key(endpoint, json)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Calls `fn`, unless a call with the same key is in flight, in which case waits for its outcome instead.
+
+        Args:
+            key (str): The request key.
+            fn (Callable[[], T]): The function sending the request.
+
+        Returns:
+            T: The result of the call.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: str):
+        with self._lock:
+            del self._in_flight[key]
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Awaits `fn()`, unless a call with the same key is in flight on this event loop, in which case waits for its
+        outcome instead.
+
+        Args:
+            key (str): The request key.
+            fn (Callable[[], Awaitable[T]]): The coroutine function sending the request.
+
+        Returns:
+            T: The result of the call.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            in_flight = self._ain_flight.setdefault(loop, {})
+            task = in_flight.get(key)
+            if task is None:
+                task = in_flight[key] = loop.create_task(fn())
+                task.add_done_callback(lambda done: self._afinish(in_flight, key, done))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _afinish(in_flight: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved, in case every waiter was cancelled.
+            task.exception()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of requests sent and of calls coalesced.
+        """
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced}
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def enable_request_coalescing() -> SingleFlight:
+    """
+    Coalesces identical deterministic, non-streaming requests in flight at the same time, for the whole process.
+
+    Returns:
+        SingleFlight: The coalescer, whose `stats` count the calls coalesced.
+    """
+    global _single_flight
+    _single_flight = SingleFlight()
+    return _single_flight
+
+
+def disable_request_coalescing():
+    """
+    Stops coalescing requests.
+    """
+    global _single_flight
+    _single_flight = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Returns the process-wide coalescer, or None if coalescing is disabled.
+    """
+    return _single_flight
@@ -0,0 +1,195 @@
+"""Incremental parser for server-sent events (SSE) streams.
+"""
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional
+
+from databricks_genai_inference.api.util import json_loads
+
+DONE_DATA = '[DONE]'
+
+
+class ServerSentEvent(NamedTuple):
+    """
+    A single dispatched server-sent event.
+
+    Attributes:
+        data (str): The event data. Multiple `data:` lines are joined with newlines.
+        event (Optional[str]): The event type, if the server sent an `event:` field.
+        id (Optional[str]): The last event id seen on the stream.
+        retry (Optional[int]): The reconnection time in milliseconds, if the server sent a `retry:` field.
+    """
+    data: str
+    event: Optional[str] = None
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+
+class SSEDecoder:
+    """
+    An incremental SSE decoder. Feed it raw bytes as they arrive, in chunks of any size, and it returns the events
+    completed so far.
+
+    Besides the SSE format, lines holding a bare JSON object or array are dispatched as events of their own, so that
+    streams of newline-delimited JSON are accepted too.
+
+    Only the newly received bytes are scanned for line breaks. The pieces of an unfinished line are kept apart and
+    joined once the line ends, so a long event split across many small reads is still decoded in linear time.
+    """
+
+    def __init__(self):
+        self._tail: List[bytes] = []
+        self._after_cr = False
+        self._data: List[str] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        """
+        Decodes a chunk of the stream.
+
+        Args:
+            chunk (bytes): The next bytes of the stream.
+
+        Returns:
+            List[ServerSentEvent]: The events completed by this chunk.
+        """
+        if self._after_cr and chunk.startswith(b'\n'):
+            # The '\r' ending the previous chunk and this '\n' are a single '\r\n' line break.
+            chunk = chunk[1:]
+            self._after_cr = False
+        end = max(chunk.rfind(b'\n'), chunk.rfind(b'\r'))
+        if end < 0:
+            if chunk:
+                self._tail.append(chunk)
+                self._after_cr = False
+            return []
+        complete, rest = chunk[:end + 1], chunk[end + 1:]
+        if self._tail:
+            self._tail.append(complete)
+            complete = b''.join(self._tail)
+            self._tail = []
+        if rest:
+            self._tail.append(rest)
+        self._after_cr = not rest and complete.endswith(b'\r')
+        events = []
+        for line in complete.splitlines():
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> List[ServerSentEvent]:
+        """
+        Decodes whatever is left once the stream has ended, dispatching a final event not followed by a blank line.
+
+        Returns:
+            List[ServerSentEvent]: The remaining events.
+        """
+        events = []
+        self._after_cr = False
+        if self._tail:
+            line = b''.join(self._tail)
+            self._tail = []
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if not self._data:
+            self._event = None
+            return None
+        event = ServerSentEvent(data='\n'.join(self._data), event=self._event, id=self._id, retry=self._retry)
+        self._data = []
+        self._event = None
+        return event
+
+    def _process_line(self, line: bytes) -> Optional[ServerSentEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(b':'):
+            return None
+        if line.startswith((b'{', b'[')):
+            self._data.append(line.decode('utf-8'))
+            return self._dispatch()
+        field, _, value = line.partition(b':')
+        if value.startswith(b' '):
+            value = value[1:]
+        if field == b'data':
+            self._data.append(value.decode('utf-8'))
+        elif field == b'event':
+            self._event = value.decode('utf-8')
+        elif field == b'id':
+            if b'\0' not in value:
+                self._id = value.decode('utf-8')
+        elif field == b'retry':
+            if value.isdigit():
+                self._retry = int(value)
+        return None
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[ServerSentEvent]:
+    """
+    Yields the events of a byte stream.
+
+    Args:
+        chunks (Iterable[bytes]): The raw stream, e.g. `requests.Response.iter_content()`.
+    """
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+async def aiter_events(chunks: AsyncIterable[bytes]) -> AsyncIterator[ServerSentEvent]:
+    """
+    Yields the events of an async byte stream.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The raw stream, e.g. `httpx.Response.aiter_bytes()`.
+    """
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for event in decoder.feed(chunk):
+            yield event
+    for event in decoder.flush():
+        yield event
+
+
+def iter_json(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """
+    Yields the decoded JSON payloads of a streaming API response, up to the `[DONE]` sentinel.
+
+    Args:
+        chunks (Iterable[bytes]): The raw stream.
+
+    Raises:
+        json.JSONDecodeError: If an event does not hold valid JSON.
+    """
+    for event in iter_events(chunks):
+        if event.data == DONE_DATA:
+            return
+        loaded_json = json_loads(event.data)
+        if loaded_json:
+            yield loaded_json
+
+
+async def aiter_json(chunks: AsyncIterable[bytes]) -> AsyncIterator[dict]:
+    """
+    Yields the decoded JSON payloads of an async streaming API response, up to the `[DONE]` sentinel.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The raw stream.
+
+    Raises:
+        json.JSONDecodeError: If an event does not hold valid JSON.
+    """
+    async for event in aiter_events(chunks):
+        if event.data == DONE_DATA:
+            return
+        loaded_json = json_loads(event.data)
+        if loaded_json:
+            yield loaded_json
@@ -0,0 +1,268 @@
+"""Library-managed HTTP connection pools.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from typing import AsyncGenerator, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_MAX_HOSTS = 10
+DEFAULT_POOL_SIZE = 32
+DEFAULT_IDLE_TIMEOUT = 60.0
+DEFAULT_ASYNC_MAX_CONNECTIONS = 100
+DEFAULT_ASYNC_MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of keep-alive connections used when no `client` is passed to `create`.
+
+    Attributes:
+        max_hosts (int): The number of per-host connection pools to keep.
+        pool_size (int): The number of connections kept alive per host.
+        max_connections (Optional[int]): If set, a hard cap on concurrent connections per host. Callers block
+            until a connection is free instead of opening a new one.
+        keep_alive (bool): If False, every connection is closed after its response.
+        idle_timeout (Optional[float]): Seconds without any request after which pooled connections are dropped,
+            so that connections the server has already closed are not reused.
+    """
+
+    def __init__(self,
+                 max_hosts: int = DEFAULT_MAX_HOSTS,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 max_connections: Optional[int] = None,
+                 keep_alive: bool = True,
+                 idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT):
+        self.max_hosts = max_hosts
+        self.pool_size = pool_size
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self._session: Optional[requests.Session] = None
+        self._last_used = time.monotonic()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_hosts,
+                              pool_maxsize=self.max_connections or self.pool_size,
+                              pool_block=self.max_connections is not None)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def _acquire(self) -> requests.Session:
+        with self._lock:
+            now = time.monotonic()
+            if (self._session is not None and self._in_flight == 0 and self.idle_timeout is not None and
+                    now - self._last_used > self.idle_timeout):
+                self._session.close()
+                self._session = None
+            if self._session is None:
+                self._session = self._new_session()
+            self._in_flight += 1
+            self._last_used = now
+            return self._session
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_used = time.monotonic()
+
+    def post(self, **kwargs) -> requests.Response:
+        """
+        Sends a POST request over a pooled connection.
+
+        Args:
+            **kwargs: The keyword arguments for `requests.Session.post`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        session = self._acquire()
+        try:
+            return session.post(**kwargs)
+        finally:
+            self._release()
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it with default settings on first use.
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ConnectionPool()
+    return _default_pool
+
+
+def configure_pool(**kwargs) -> ConnectionPool:
+    """
+    Replaces the process-wide connection pool.
+
+    Args:
+        **kwargs: The keyword arguments for `ConnectionPool`.
+
+    Returns:
+        ConnectionPool: The new pool.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        old_pool, _default_pool = _default_pool, ConnectionPool(**kwargs)
+    if old_pool is not None:
+        old_pool.close()
+    return _default_pool
+
+
+def close_pool():
+    """
+    Closes the process-wide connection pool. A new one is created on the next request.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        old_pool, _default_pool = _default_pool, None
+    if old_pool is not None:
+        old_pool.close()
+
+
+async def _aclose_on_loop_shutdown(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def _close_on_loop_shutdown(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    """
+    Returns an async generator, suspended in the running loop, that closes `client` when it is closed. Event loops
+    close the async generators they started when they shut down (`loop.shutdown_asyncgens()`, as `asyncio.run` does),
+    so the client is closed in its own loop before the loop is.
+    """
+    closer = _aclose_on_loop_shutdown(client)
+    try:
+        closer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return closer
+
+
+class AsyncConnectionPool:
+    """
+    A shared `httpx.AsyncClient` per event loop, used when no `client` is passed to `acreate`.
+
+    An `httpx.AsyncClient` must only be used from the event loop it was first used in, so one client is kept per
+    running loop. It is closed when the loop shuts down its async generators, as `asyncio.run` does on exit, or
+    explicitly with `aclose`. A loop closed without `loop.shutdown_asyncgens()` leaves its client unclosed.
+
+    Attributes:
+        max_connections (int): The maximum number of concurrent connections.
+        max_keepalive_connections (int): The maximum number of idle connections kept alive.
+        keepalive_expiry (Optional[float]): Seconds after which an idle connection is closed.
+        http2 (bool): If True, negotiate HTTP/2 so concurrent requests are multiplexed over a few connections.
+            Requires the `h2` package (`pip install wfork-databricks-genai-inference[http2]`).
+    """
+
+    def __init__(self,
+                 max_connections: int = DEFAULT_ASYNC_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_ASYNC_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+                 http2: bool = False):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self._clients: ("weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, "
+                        "Tuple[httpx.AsyncClient, AsyncGenerator[None, None]]]") = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the shared client for the running event loop.
+
+        Returns:
+            httpx.AsyncClient: The client.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None or entry[0].is_closed:
+            with self._lock:
+                entry = self._clients.get(loop)
+                if entry is None or entry[0].is_closed:
+                    limits = httpx.Limits(max_connections=self.max_connections,
+                                          max_keepalive_connections=self.max_keepalive_connections,
+                                          keepalive_expiry=self.keepalive_expiry)
+                    client = httpx.AsyncClient(limits=limits, http2=self.http2)
+                    entry = (client, _close_on_loop_shutdown(client))
+                    self._clients[loop] = entry
+        return entry[0]
+
+    async def aclose(self):
+        """
+        Closes the shared client of the running event loop.
+        """
+        entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+
+_default_async_pool: Optional[AsyncConnectionPool] = None
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """
+    Returns the process-wide async connection pool, creating it with default settings on first use.
+    """
+    global _default_async_pool
+    if _default_async_pool is None:
+        with _default_pool_lock:
+            if _default_async_pool is None:
+                _default_async_pool = AsyncConnectionPool()
+    return _default_async_pool
+
+
+def configure_async_pool(**kwargs) -> AsyncConnectionPool:
+    """
+    Replaces the process-wide async connection pool. Clients of the previous pool are closed when their event loop
+    shuts down its async generators, as `asyncio.run` does on exit. To close the client of the running loop earlier,
+    call `aclose_async_pool` before replacing the pool.
+
+    Args:
+        **kwargs: The keyword arguments for `AsyncConnectionPool`.
+
+    Returns:
+        AsyncConnectionPool: The new pool.
+    """
+    global _default_async_pool
+    with _default_pool_lock:
+        _default_async_pool = AsyncConnectionPool(**kwargs)
+    return _default_async_pool
+
+
+async def aclose_async_pool():
+    """
+    Closes the process-wide async client of the running event loop. A new one is created on the next request.
+    """
+    if _default_async_pool is not None:
+        await _default_async_pool.aclose()
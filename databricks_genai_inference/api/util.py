@@ -1,10 +1,18 @@
 """Utils for the API.
 """
+import json as json_lib
 from enum import Enum
+from typing import Union
 
 import httpx
 import requests
-from tenacity import retry, retry_if_result, stop_after_attempt, wait_random_exponential
+
+from databricks_genai_inference.api.transport import get_async_pool, get_pool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class EmbeddingModel(Enum):
@@ -28,15 +36,73 @@ class ChatCompletionModel(Enum):
     DBRX_INSTRUCT = 'dbrx-instruct'
 
 
-def send_request(client: requests.Session, url, headers, json, timeout):
+def json_loads(data):
+    """
+    Decodes JSON with orjson when it is installed, falling back to the standard library.
+
+    Both raise a subclass of `json.JSONDecodeError` on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json_lib.loads(data)
+
+
+class RawJSON:
+    """
+    A value that holds its own JSON encoding, e.g. because it caches it across requests.
+    """
+
+    def encode_json(self) -> Union[bytes, bytearray]:
+        """
+        Returns the UTF-8 JSON encoding of the value.
+        """
+        raise NotImplementedError
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json_lib.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps_json(json: dict) -> bytes:
+    """
+    Encodes a request body to UTF-8 JSON, with orjson when it is installed. A `RawJSON` body, and top-level `RawJSON`
+    values, are spliced in from their own encoding instead of being encoded again.
+
+    Args:
+        json (dict): The request body.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if isinstance(json, RawJSON):
+        return json.encode_json()
+    fragments = [(key, value.encode_json()) for key, value in json.items() if isinstance(value, RawJSON)]
+    if not fragments:
+        return _dumps(json)
+    body = _dumps({key: value for key, value in json.items() if not isinstance(value, RawJSON)})
+    parts = [body[:-1]]
+    for key, fragment in fragments:
+        parts += (b',' if len(parts) > 1 or len(body) > 2 else b'', _dumps(key), b':', fragment)
+    parts.append(b'}')
+    return b''.join(parts)
+
+
+def send_request(client: requests.Session, url, headers, json, timeout, stream=False):
     if client:
-        return client.post(url=url, headers=headers, json=json, timeout=timeout)
+        return client.post(url=url, headers=headers, data=dumps_json(json), timeout=timeout, stream=stream)
     else:
-        return requests.post(url=url, headers=headers, json=json, timeout=timeout)
+        return get_pool().post(url=url, headers=headers, data=dumps_json(json), timeout=timeout, stream=stream)
 
 
-async def asend_request(client: httpx.AsyncClient, url, headers, json, timeout):
-    return await client.post(url=url, headers=headers, json=json, timeout=timeout)
+async def asend_request(client: httpx.AsyncClient, url, headers, json, timeout, stream=False):
+    if not client:
+        client = get_async_pool().get_client()
+    if stream:
+        request = client.build_request('POST', url=url, headers=headers, content=dumps_json(json), timeout=timeout)
+        return await client.send(request, stream=True)
+    return await client.post(url=url, headers=headers, content=dumps_json(json), timeout=timeout)
 
 
 def is_internal_server_error(response: requests.Response):
@@ -0,0 +1,213 @@
+"""Bulk batch inference over JSONL files.
+
+Each input line is a JSON object holding the keyword arguments of one request, e.g.
+`{"messages": [{"role": "user", "content": "Hi"}], "max_tokens": 16}`. An optional `custom_id` is copied to the
+output and not sent. Results are appended to the output file as they finish, one JSON object per line:
+`{"index": 0, "custom_id": ..., "response": {...}}` or `{"index": 0, "custom_id": ..., "error": {...}}`.
+
+The output file doubles as the checkpoint: when a job is restarted with the same output, requests already written
+there are skipped. With `--retry-failed`, requests whose last result is an error, e.g. a 429 or a timeout, are sent
+again and their new result is appended: the last line of an index is its result.
+
+    python -m databricks_genai_inference.batch requests.jsonl results.jsonl --model dbrx-instruct --concurrency 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Set
+
+from databricks_genai_inference.api.chat_completion import ChatCompletion
+from databricks_genai_inference.api.completion import Completion
+from databricks_genai_inference.api.embedding import Embedding
+from databricks_genai_inference.api.exception import FoundationModelAPIException
+
+RESOURCES = {
+    'chat': ChatCompletion,
+    'completion': Completion,
+    'embedding': Embedding,
+}
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchSummary:
+    """
+    Statistics of a batch run.
+
+    Attributes:
+        succeeded (int): The number of requests that returned a response.
+        failed (int): The number of requests that failed.
+        skipped (int): The number of requests skipped because the output already held their result.
+        errors (Counter): The failed requests counted by HTTP status, or by error type when there is no status.
+        prompt_tokens (int): The prompt tokens reported by the responses.
+        completion_tokens (int): The completion tokens reported by the responses.
+        elapsed (float): The wall-clock seconds of the run.
+    """
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors: Counter = Counter()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns the requests completed per second.
+        """
+        return (self.succeeded + self.failed) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            f'completed: {self.succeeded + self.failed} ({self.succeeded} succeeded, {self.failed} failed, '
+            f'{self.skipped} skipped)',
+            f'elapsed: {self.elapsed:.1f}s',
+            f'throughput: {self.throughput:.2f} requests/s, '
+            f'{(self.prompt_tokens + self.completion_tokens) / self.elapsed if self.elapsed > 0 else 0.0:.1f} tokens/s',
+            f'tokens: {self.prompt_tokens} prompt, {self.completion_tokens} completion',
+        ]
+        lines += [f'error {error}: {count}' for error, count in self.errors.most_common()]
+        return '\n'.join(lines)
+
+
+def _completed_indexes(output_path: str, retry_failed: bool = False) -> Set[int]:
+    """
+    Returns the indexes already written to the output, dropping a trailing line left partly written by a killed job.
+    With `retry_failed`, the indexes whose last result is an error are left out.
+    """
+    completed: Set[int] = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'rb+') as output:
+        good_end = 0
+        for line in output:
+            try:
+                result = json.loads(line)
+                index = result['index']
+            except (ValueError, KeyError, TypeError):
+                break
+            if retry_failed and 'error' in result:
+                completed.discard(index)
+            else:
+                completed.add(index)
+            good_end += len(line)
+        output.truncate(good_end)
+    return completed
+
+
+def _parse_request(line: str, defaults: Optional[Dict]) -> dict:
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError(f'Expected a JSON object of request arguments, got {type(request).__name__}')
+    return {**(defaults or {}), **request}
+
+
+def _run_request(resource, request: dict) -> dict:
+    try:
+        response = resource.create(**request)
+        return {'response': response.json}
+    except FoundationModelAPIException as e:
+        return {'error': {'status': e.status.value if e.status else None, 'message': e.message}}
+    except Exception as e:  # pylint: disable=broad-except
+        return {'error': {'status': None, 'type': type(e).__name__, 'message': str(e)}}
+
+
+def run_batch(input_path: str,
+              output_path: str,
+              resource: str = 'chat',
+              concurrency: int = DEFAULT_CONCURRENCY,
+              defaults: Optional[Dict] = None,
+              retry_failed: bool = False) -> BatchSummary:
+    """
+    Runs every request of a JSONL file and appends the results to an output JSONL file, resuming where a previous
+    run with the same output stopped.
+
+    Args:
+        input_path (str): The input JSONL file of request keyword arguments.
+        output_path (str): The output JSONL file, also used as the checkpoint.
+        resource (str): The API to call: 'chat', 'completion' or 'embedding'.
+        concurrency (int): The number of requests in flight.
+        defaults (Optional[Dict]): Keyword arguments applied to every request unless the line overrides them,
+            e.g. `{'model': 'dbrx-instruct'}`.
+        retry_failed (bool): If True, requests whose last result in the output is an error are sent again instead of
+            being skipped.
+
+    Returns:
+        BatchSummary: The statistics of the run.
+    """
+    api = RESOURCES[resource]
+    summary = BatchSummary()
+    completed = _completed_indexes(output_path, retry_failed)
+    start = time.perf_counter()
+
+    def record(index: int, custom_id, result: dict, output):
+        output.write(json.dumps({'index': index, 'custom_id': custom_id, **result}) + '\n')
+        output.flush()
+        if 'response' in result:
+            summary.succeeded += 1
+            usage = result['response'].get('usage') or {}
+            summary.prompt_tokens += usage.get('prompt_tokens') or 0
+            summary.completion_tokens += usage.get('completion_tokens') or 0
+        else:
+            summary.failed += 1
+            error = result['error']
+            summary.errors[error['status'] or error.get('type', 'unknown')] += 1
+
+    with open(input_path, encoding='utf-8') as requests_file, open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        for index, line in enumerate(requests_file):
+            if not line.strip():
+                continue
+            if index in completed:
+                summary.skipped += 1
+                continue
+            try:
+                request = _parse_request(line, defaults)
+            except ValueError as e:
+                record(index, None, {'error': {'status': None, 'type': type(e).__name__, 'message': str(e)}}, output)
+                continue
+            custom_id = request.pop('custom_id', None)
+            request.pop('stream', None)
+            pending[executor.submit(_run_request, api, request)] = (index, custom_id)
+            if len(pending) >= 2 * concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(*pending.pop(future), future.result(), output)
+        for future in wait(pending).done:
+            record(*pending[future], future.result(), output)
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m databricks_genai_inference.batch',
+                                     description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='input JSONL file of requests')
+    parser.add_argument('output', help='output JSONL file of results, also used to resume')
+    parser.add_argument('--resource', choices=sorted(RESOURCES), default='chat', help='the API to call')
+    parser.add_argument('--model', help='the model of every request that does not set one')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='requests in flight')
+    parser.add_argument('--retry-failed', action='store_true', help='send again the requests that failed last time')
+    args = parser.parse_args(argv)
+
+    defaults = {'model': args.model} if args.model else {}
+    summary = run_batch(args.input,
+                        args.output,
+                        resource=args.resource,
+                        concurrency=args.concurrency,
+                        defaults=defaults,
+                        retry_failed=args.retry_failed)
+    print(summary, file=sys.stderr)
+    return 1 if summary.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
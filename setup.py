@@ -17,6 +17,14 @@ install_requires = [
 
 extra_deps = {}
 
+extra_deps['http2'] = [
+    'httpx[http2]>=0.23.0, <1',
+]
+
+extra_deps['numpy'] = [
+    'numpy>=1.21',
+]
+
 extra_deps['dev'] = [
     'build>=0.10.0',
     'isort>=5.9.3',
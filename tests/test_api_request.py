@@ -10,6 +10,8 @@ from constants import (CHAT_COMPLETION_MESSAGES, CHAT_COMPLETION_MODEL_NAME, COM
 from databricks_genai_inference import ChatCompletion, Completion, Embedding
 from databricks_genai_inference.api.abstract.foundation_model_api_resource import (DATABRICKS_HOST_ENV,
                                                                                    DATABRICKS_MODEL_URL_ENV)
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.endpoints import get_endpoint_registry
 
 
 class TestAPIRequest:
@@ -27,6 +29,7 @@ class TestAPIRequest:
         monkeypatch.setenv(DATABRICKS_HOST_ENV, TEST_HOST_NAME)
         monkeypatch.setenv('DATABRICKS_TOKEN', TEST_API_KEY)
         monkeypatch.setenv(DATABRICKS_MODEL_URL_ENV, "")
+        get_endpoint_registry().reload()
 
     @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response')
     def test_chat_completion_request_non_streaming(self, mocked_request):
@@ -403,3 +406,22 @@ class TestAPIRequest:
         }
         await Embedding.acreate(**kwargs)
         mocked_request.assert_called_once_with(**expected_request)
+
+    @pytest.mark.asyncio
+    @patch('databricks_genai_inference.ChatCompletion._aget_non_streaming_response', new_callable=AsyncMock)
+    @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response')
+    async def test_sync_and_async_headers_match(self, mocked_request, mocked_async_request):
+        credentials = Credentials(host=TEST_HOST_NAME,
+                                  headers={
+                                      'Authorization': "Bearer " + TEST_API_KEY,
+                                      'Content-Type': 'application/json; charset=utf-8'
+                                  },
+                                  expires_at=float('inf'))
+        resource = 'databricks_genai_inference.api.abstract.foundation_model_api_resource'
+        with patch(f'{resource}.get_credentials', return_value=credentials), \
+                patch(f'{resource}.aget_credentials', new_callable=AsyncMock, return_value=credentials):
+            ChatCompletion.create(model=CHAT_COMPLETION_MODEL_NAME, messages=CHAT_COMPLETION_MESSAGES)
+            await ChatCompletion.acreate(model=CHAT_COMPLETION_MODEL_NAME, messages=CHAT_COMPLETION_MESSAGES)
+        headers = mocked_request.call_args.kwargs["headers"]
+        assert headers == mocked_async_request.call_args.kwargs["headers"]
+        assert headers['Content-Type'] == 'application/json; charset=utf-8', "the auth headers should take precedence"
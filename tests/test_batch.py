@@ -0,0 +1,117 @@
+import json
+from http import HTTPStatus
+from unittest.mock import patch
+
+from databricks_genai_inference import ChatCompletionObject, FoundationModelAPIException
+from databricks_genai_inference.batch import main, run_batch
+
+CHAT_COMPLETION_MODEL_NAME = "dbrx-instruct"
+
+
+def _chat_response(model, messages, **kwargs):
+    if messages[0]["content"] == "fail":
+        raise FoundationModelAPIException(status=HTTPStatus.TOO_MANY_REQUESTS, message="rate limited")
+    return ChatCompletionObject({
+        "id": "test",
+        "model": model,
+        "choices": [{
+            "message": {
+                "role": "assistant",
+                "content": messages[0]["content"].upper()
+            }
+        }],
+        "usage": {
+            "prompt_tokens": 1,
+            "completion_tokens": 2,
+            "total_tokens": 3
+        },
+    })
+
+
+def _write_requests(path, contents):
+    with open(path, "w") as f:
+        for i, content in enumerate(contents):
+            f.write(json.dumps({"custom_id": f"r{i}", "messages": [{"role": "user", "content": content}]}) + "\n")
+
+
+def _read_results(path):
+    with open(path) as f:
+        return sorted((json.loads(line) for line in f), key=lambda result: result["index"])
+
+
+@patch('databricks_genai_inference.ChatCompletion.create', side_effect=_chat_response)
+def test_run_batch(mocked_request, tmp_path):
+    _write_requests(tmp_path / "in.jsonl", ["a", "fail", "c"])
+    summary = run_batch(str(tmp_path / "in.jsonl"),
+                        str(tmp_path / "out.jsonl"),
+                        concurrency=2,
+                        defaults={"model": CHAT_COMPLETION_MODEL_NAME})
+    results = _read_results(tmp_path / "out.jsonl")
+    assert [result["custom_id"] for result in results] == ["r0", "r1", "r2"]
+    assert results[0]["response"]["choices"][0]["message"]["content"] == "A"
+    assert results[1]["error"] == {"status": 429, "message": "rate limited"}
+    assert (summary.succeeded, summary.failed, summary.skipped) == (2, 1, 0)
+    assert summary.errors == {429: 1}
+    assert summary.completion_tokens == 4
+    for call in mocked_request.call_args_list:
+        assert call.kwargs["model"] == CHAT_COMPLETION_MODEL_NAME
+        assert "custom_id" not in call.kwargs
+
+
+@patch('databricks_genai_inference.ChatCompletion.create', side_effect=_chat_response)
+def test_run_batch_resumes_from_output(mocked_request, tmp_path):
+    _write_requests(tmp_path / "in.jsonl", ["a", "b", "c"])
+    with open(tmp_path / "out.jsonl", "w") as f:
+        f.write(json.dumps({"index": 1, "custom_id": "r1", "response": {}}) + "\n")
+        f.write('{"index": 2, "custom')  # left partly written by a killed run
+    summary = run_batch(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"),
+                        defaults={"model": CHAT_COMPLETION_MODEL_NAME})
+    assert mocked_request.call_count == 2
+    assert (summary.succeeded, summary.skipped) == (2, 1)
+    assert [result["index"] for result in _read_results(tmp_path / "out.jsonl")] == [0, 1, 2]
+
+
+@patch('databricks_genai_inference.ChatCompletion.create', side_effect=_chat_response)
+def test_run_batch_retries_failed(mocked_request, tmp_path):
+    _write_requests(tmp_path / "in.jsonl", ["a", "b"])
+    with open(tmp_path / "out.jsonl", "w") as f:
+        f.write(json.dumps({"index": 0, "custom_id": "r0", "error": {"status": 429, "message": "rate limited"}}) + "\n")
+        f.write(json.dumps({"index": 1, "custom_id": "r1", "error": {"status": 503, "message": "unavailable"}}) + "\n")
+        f.write(json.dumps({"index": 1, "custom_id": "r1", "response": {}}) + "\n")
+    path = str(tmp_path / "out.jsonl")
+    summary = run_batch(str(tmp_path / "in.jsonl"), path, defaults={"model": CHAT_COMPLETION_MODEL_NAME})
+    assert mocked_request.call_count == 0, "failed requests are skipped by default"
+    assert summary.skipped == 2
+    summary = run_batch(str(tmp_path / "in.jsonl"), path, defaults={"model": CHAT_COMPLETION_MODEL_NAME},
+                        retry_failed=True)
+    assert mocked_request.call_count == 1
+    assert mocked_request.call_args.kwargs["messages"][0]["content"] == "a"
+    assert (summary.succeeded, summary.skipped) == (1, 1)
+    with open(path) as f:
+        last = [json.loads(line) for line in f][-1]
+    assert last["index"] == 0 and last["response"]["choices"][0]["message"]["content"] == "A"
+
+
+@patch('databricks_genai_inference.ChatCompletion.create', side_effect=_chat_response)
+def test_run_batch_records_lines_that_are_not_objects(mocked_request, tmp_path):
+    with open(tmp_path / "in.jsonl", "w") as f:
+        f.write('[1]\n"x"\n{not json\n')
+        f.write(json.dumps({"messages": [{"role": "user", "content": "a"}]}) + "\n")
+    summary = run_batch(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"),
+                        defaults={"model": CHAT_COMPLETION_MODEL_NAME})
+    results = _read_results(tmp_path / "out.jsonl")
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert all(result["error"]["type"] == "ValueError" for result in results[:2])
+    assert "JSON object" in results[0]["error"]["message"]
+    assert "error" in results[2] and "response" in results[3]
+    assert (summary.succeeded, summary.failed) == (1, 3)
+    assert mocked_request.call_count == 1
+
+@patch('databricks_genai_inference.Embedding.create')
+def test_main(mocked_request, tmp_path):
+    with open(tmp_path / "in.jsonl", "w") as f:
+        f.write(json.dumps({"input": ["a"]}) + "\n")
+    mocked_request.return_value.json = {"data": [{"index": 0, "embedding": [1.0]}]}
+    assert main([str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), "--resource", "embedding", "--model",
+                 "bge-large-en"]) == 0
+    mocked_request.assert_called_once_with(input=["a"], model="bge-large-en")
@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletion, ChatCompletionObject, Embedding, EmbeddingObject
+from databricks_genai_inference.api.cache import (ResponseCache, disable_response_cache, enable_response_cache,
+                                                  request_key)
+
+CHAT_COMPLETION_MESSAGES = [{"role": "user", "content": "Knock knock."}]
+CHAT_COMPLETION_RESPONSE = {"choices": [{"message": {"role": "assistant", "content": "Who's there?"}}]}
+EMBEDDING_RESPONSE = {"data": [{"index": 0, "embedding": [0.1, 0.2]}]}
+
+
+class TestResponseCache:
+
+    def test_request_key_is_canonical(self):
+        assert request_key("endpoint", {"a": 1, "b": [1, 2]}) == request_key("endpoint", {"b": [1, 2], "a": 1})
+        assert request_key("endpoint", {"a": 1}) != request_key("other-endpoint", {"a": 1})
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2, ttl=None)
+        cache.put("a", {"a": 1})
+        cache.put("b", {"b": 1})
+        assert cache.get("a") == {"a": 1}
+        cache.put("c", {"c": 1})
+        assert cache.get("b") is None
+        assert cache.stats == {"hits": 1, "misses": 1, "evictions": 1, "size": 2}
+
+    @patch('databricks_genai_inference.api.cache.time.monotonic', return_value=100.0)
+    def test_ttl(self, mocked_monotonic):
+        cache = ResponseCache(ttl=10)
+        cache.put("a", {"a": 1})
+        mocked_monotonic.return_value = 111.0
+        assert cache.get("a") is None
+
+    def test_key_for(self):
+        cache = ResponseCache()
+        assert cache.key_for("endpoint", {"temperature": 0}, deterministic=True) is not None
+        assert cache.key_for("endpoint", {"temperature": 0, "stream": True}, deterministic=True) is None
+        assert cache.key_for("endpoint", {"temperature": 1}, deterministic=False) is None
+        assert ResponseCache(cache_nondeterministic=True).key_for("endpoint", {}, deterministic=False) is not None
+
+
+@patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials')
+class TestResponseCaching:
+
+    @pytest.fixture(autouse=True)
+    def response_cache(self):
+        yield enable_response_cache()
+        disable_response_cache()
+
+    @patch('databricks_genai_inference.Embedding._get_non_streaming_response',
+           return_value=EmbeddingObject(EMBEDDING_RESPONSE))
+    def test_embedding_cached(self, mocked_request, mocked_credentials, response_cache):
+        first = Embedding.create(model="bge-large-en", input="text")
+        second = Embedding.create(model="bge-large-en", input="text")
+        assert mocked_request.call_count == 1
+        assert isinstance(second, EmbeddingObject)
+        assert second.embeddings == first.embeddings
+        assert response_cache.stats["hits"] == 1
+
+    @patch('databricks_genai_inference.Embedding._get_non_streaming_response')
+    def test_cached_responses_are_copies(self, mocked_request, mocked_credentials, response_cache):
+        mocked_request.return_value = EmbeddingObject({"data": [{"index": 0, "embedding": [0.1, 0.2]}]})
+        first = Embedding.create(model="bge-large-en", input="text")
+        first.response["data"][0]["embedding"].append(0.3)
+        hit = Embedding.create(model="bge-large-en", input="text")
+        assert hit.embeddings == [[0.1, 0.2]], "modifying the response that was cached should not change hits"
+        hit.response["data"].clear()
+        hit.response["model"] = "modified"
+        assert Embedding.create(model="bge-large-en", input="text").response == EMBEDDING_RESPONSE
+        assert mocked_request.call_count == 1
+
+    @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response',
+           return_value=ChatCompletionObject(CHAT_COMPLETION_RESPONSE))
+    def test_chat_completion_only_cached_when_greedy(self, mocked_request, mocked_credentials, response_cache):
+        for _ in range(2):
+            ChatCompletion.create(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES, temperature=0.7)
+        assert mocked_request.call_count == 2
+        for _ in range(2):
+            ChatCompletion.create(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES, temperature=0)
+        assert mocked_request.call_count == 3
@@ -0,0 +1,102 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from databricks_genai_inference.api.cache import request_key
+from databricks_genai_inference.api.chat_completion import ChatCompletionAPIInput
+from databricks_genai_inference.api.chat_history import Message, MessageHistory
+from databricks_genai_inference.api.util import dumps_json
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Héllo \"there\""}]
+
+
+class TestMessage:
+
+    def test_immutable(self):
+        message = Message(MESSAGES[0])
+        assert message == MESSAGES[0]
+        with pytest.raises(TypeError):
+            message["content"] = "changed"
+        with pytest.raises(TypeError):
+            message.update(content="changed")
+
+    def test_copy_and_pickle(self):
+        message = Message(MESSAGES[0])
+        for copied in (copy.deepcopy(message), pickle.loads(pickle.dumps(message))):
+            assert isinstance(copied, Message)
+            assert copied == message
+
+
+class TestMessageHistory:
+
+    def test_sequence(self):
+        history = MessageHistory(MESSAGES)
+        assert history == MESSAGES
+        assert MESSAGES == history
+        assert len(history) == 2
+        assert history[-1] == MESSAGES[-1]
+        assert history[:1] == MESSAGES[:1]
+        with pytest.raises(IndexError):
+            history[2]
+
+    def test_encode_json(self):
+        history = MessageHistory(MESSAGES)
+        assert json.loads(history.encode_json()) == MESSAGES
+        assert MessageHistory().encode_json() == b'[]'
+
+    def test_snapshot_is_unaffected_by_appends(self):
+        history = MessageHistory(MESSAGES)
+        snapshot = history.snapshot()
+        history.append({"role": "assistant", "content": "Hi."})
+        assert snapshot == MESSAGES
+        assert json.loads(snapshot.encode_json()) == MESSAGES
+        assert len(history) == 3
+
+    def test_append_to_snapshot_stops_sharing(self):
+        history = MessageHistory(MESSAGES)
+        branch = history.snapshot()
+        history.append({"role": "assistant", "content": "a"})
+        branch.append({"role": "assistant", "content": "b"})
+        history.append({"role": "user", "content": "c"})
+        assert [message["content"] for message in history][2:] == ["a", "c"]
+        assert json.loads(branch.encode_json())[2:] == [{"role": "assistant", "content": "b"}]
+
+    def test_list_operations(self):
+        history = MessageHistory(MESSAGES)
+        snapshot = history.snapshot()
+        reply = {"role": "assistant", "content": "Hi."}
+        history.append(reply)
+        assert history.pop() == reply
+        history[1] = {"role": "user", "content": "Bye"}
+        history.insert(1, reply)
+        history += [reply]
+        assert history == [MESSAGES[0], reply, {"role": "user", "content": "Bye"}, reply]
+        del history[1]
+        history.remove(reply)
+        assert history == [MESSAGES[0], {"role": "user", "content": "Bye"}]
+        assert json.loads(history.encode_json()) == history.copy()
+        assert isinstance(history[1], Message)
+        assert history + [reply] == [*history, reply]
+        assert [reply] + history == [reply, *history]
+        history.clear()
+        assert history == [] and history.encode_json() == b'[]'
+        assert snapshot == MESSAGES
+        assert json.loads(snapshot.encode_json()) == MESSAGES
+
+    def test_validated_as_is(self):
+        snapshot = MessageHistory(MESSAGES).snapshot()
+        api_input = ChatCompletionAPIInput(model="dbrx-instruct", messages=snapshot)
+        assert api_input.messages is snapshot
+        assert api_input.model_dump(exclude_unset=True)["messages"] is snapshot
+
+    def test_request_key_matches_plain_list(self):
+        assert request_key("endpoint", {"messages": MessageHistory(MESSAGES)}) == request_key(
+            "endpoint", {"messages": MESSAGES})
+
+
+def test_dumps_json_splices_raw_json():
+    history = MessageHistory(MESSAGES)
+    assert json.loads(dumps_json({"temperature": 0, "messages": history})) == {"temperature": 0, "messages": MESSAGES}
+    assert json.loads(dumps_json({"messages": history})) == {"messages": MESSAGES}
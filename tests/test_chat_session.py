@@ -4,7 +4,7 @@ from unittest.mock import patch
 from constants import (CHAT_COMPLETION_MESSAGES, CHAT_COMPLETION_MODEL_NAME, CHAT_COMPLETION_MODEL_SYSTEM_MESSAGE,
                        CHAT_COMPLETION_RESPONSE_OBJECT_1, CHAT_SESSION_PARAMETERS, COMPLETION_PROMPT_1)
 
-from databricks_genai_inference import ChatSession
+from databricks_genai_inference import ChatCompletionChunkObject, ChatSession
 
 
 class TestChatSession(unittest.TestCase):
@@ -48,6 +48,34 @@ class TestChatSession(unittest.TestCase):
             },
         ])
 
+    @patch("databricks_genai_inference.ChatCompletion.create", return_value=CHAT_COMPLETION_RESPONSE_OBJECT_1)
+    def test_history_list_operations(self, mocked_request):
+        self.chat_session.reply(COMPLETION_PROMPT_1)
+        self.chat_session.history.pop()
+        self.chat_session.history.pop()
+        self.chat_session.history[0] = {"role": "system", "content": "Be brief."}
+        self.chat_session.reply(COMPLETION_PROMPT_1)
+        self.assertEqual(mocked_request.call_args.kwargs["messages"], [
+            {
+                "role": "system",
+                "content": "Be brief."
+            },
+            {
+                "role": "user",
+                "content": COMPLETION_PROMPT_1
+            },
+        ])
+        self.assertEqual(self.chat_session.history[:1] + [{"role": "user", "content": "Hi"}], [
+            {
+                "role": "system",
+                "content": "Be brief."
+            },
+            {
+                "role": "user",
+                "content": "Hi"
+            },
+        ])
+
     @patch("databricks_genai_inference.ChatCompletion.create", return_value=CHAT_COMPLETION_RESPONSE_OBJECT_1)
     def test_pretty_history(self, mocked_request):
         self.assertEqual(self.chat_session.pretty_history, f"\nsystem: {self.system_message}")
@@ -62,3 +90,54 @@ class TestChatSession(unittest.TestCase):
         self.assertEqual(self.chat_session.count, 0)
         self.chat_session.reply(COMPLETION_PROMPT_1)
         self.assertEqual(self.chat_session.count, 1)
+
+
+def _chunks(*parts):
+    yield ChatCompletionChunkObject({"choices": [{"delta": {"role": "assistant"}}]})
+    for part in parts:
+        yield ChatCompletionChunkObject({"choices": [{"delta": {"content": part}}]})
+
+
+async def _achunks(*parts):
+    for chunk in _chunks(*parts):
+        yield chunk
+
+
+class TestChatSessionAsyncAndStreaming(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.chat_session = ChatSession(CHAT_COMPLETION_MODEL_NAME, CHAT_COMPLETION_MODEL_SYSTEM_MESSAGE,
+                                        **CHAT_SESSION_PARAMETERS)
+
+    @patch("databricks_genai_inference.ChatCompletion.acreate", return_value=CHAT_COMPLETION_RESPONSE_OBJECT_1)
+    async def test_areply(self, mocked_request):
+        response = await self.chat_session.areply(COMPLETION_PROMPT_1)
+        self.assertIs(response, CHAT_COMPLETION_RESPONSE_OBJECT_1)
+        mocked_request.assert_called_once_with(model=CHAT_COMPLETION_MODEL_NAME,
+                                               messages=CHAT_COMPLETION_MESSAGES,
+                                               **CHAT_SESSION_PARAMETERS)
+        self.assertEqual(self.chat_session.last, CHAT_COMPLETION_RESPONSE_OBJECT_1.message)
+
+    @patch("databricks_genai_inference.ChatCompletion.create", side_effect=lambda **kwargs: _chunks("Who's ", "there?"))
+    async def test_reply_stream(self, mocked_request):
+        chunks = list(self.chat_session.reply_stream(COMPLETION_PROMPT_1))
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(mocked_request.call_args.kwargs["stream"])
+        self.assertEqual(self.chat_session.history[-1], {"role": "assistant", "content": "Who's there?"})
+
+    @patch("databricks_genai_inference.ChatCompletion.create", side_effect=lambda **kwargs: _chunks("Who's ", "there?"))
+    async def test_reply_with_stream_parameter(self, mocked_request):
+        chat_session = ChatSession(CHAT_COMPLETION_MODEL_NAME, stream=True)
+        chunks = chat_session.reply(COMPLETION_PROMPT_1)
+        next(iter(chunks))
+        next(iter(chunks))
+        chunks.close()
+        self.assertEqual(chat_session.last, "Who's ")
+
+    @patch("databricks_genai_inference.ChatCompletion.acreate",
+           side_effect=lambda **kwargs: _achunks("Who's ", "there?"))
+    async def test_areply_stream(self, mocked_request):
+        chunks = [chunk async for chunk in self.chat_session.areply_stream(COMPLETION_PROMPT_1)]
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(self.chat_session.last, "Who's there?")
+        self.assertEqual(self.chat_session.count, 1)
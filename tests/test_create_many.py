@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+
+from databricks_genai_inference import Completion, CompletionObject, FoundationModelAPIException
+
+COMPLETION_MODEL_NAME = "mpt-7b-instruct"
+
+
+def _completion_response(prompt):
+    if prompt == "fail":
+        raise FoundationModelAPIException(status=HTTPStatus.BAD_REQUEST, message="bad prompt")
+    return CompletionObject({
+        "id": "test",
+        "model": COMPLETION_MODEL_NAME,
+        "choices": [{
+            "text": prompt.upper()
+        }],
+        "usage": {},
+    })
+
+
+class TestACreateMany:
+
+    @pytest.mark.asyncio
+    async def test_acreate_many(self):
+        in_flight, max_in_flight = 0, 0
+
+        async def acreate(client=None, model=None, prompt=None):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01 * (int(prompt) % 3) if prompt != "fail" else 0)
+            in_flight -= 1
+            return _completion_response(prompt)
+
+        prompts = [str(i) for i in range(10)] + ["fail"]
+        request_kwargs = ({"model": COMPLETION_MODEL_NAME, "prompt": prompt} for prompt in prompts)
+        with patch('databricks_genai_inference.Completion.acreate', side_effect=acreate) as mocked_request:
+            results = await Completion.acreate_many(request_kwargs, concurrency=3)
+        assert max_in_flight == 3
+        assert [result.text[0] for result in results[:10]] == prompts[:10]
+        assert isinstance(results[10], FoundationModelAPIException)
+        assert results[10].status == HTTPStatus.BAD_REQUEST
+        clients = {call.kwargs["client"] for call in mocked_request.call_args_list}
+        assert len(clients) == 1 and None not in clients
+
+    @pytest.mark.asyncio
+    async def test_acreate_as_completed(self):
+
+        async def acreate(client=None, model=None, prompt=None):
+            await asyncio.sleep(0.05 if prompt == "slow" else 0)
+            return _completion_response(prompt)
+
+        request_kwargs = [{"model": COMPLETION_MODEL_NAME, "prompt": prompt} for prompt in ["slow", "fast"]]
+        with patch('databricks_genai_inference.Completion.acreate', side_effect=acreate):
+            completed = [(index, result.text[0])
+                         async for index, result in Completion.acreate_as_completed(request_kwargs)]
+        assert completed == [(1, "FAST"), (0, "SLOW")]
+
+    @pytest.mark.asyncio
+    async def test_acreate_many_propagates_unexpected_errors(self):
+        with patch('databricks_genai_inference.Completion.acreate', side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                await Completion.acreate_many([{"model": COMPLETION_MODEL_NAME, "prompt": "a"}])
+
+
+class TestCreateMany:
+
+    def test_create_many(self):
+        in_flight, max_in_flight = 0, 0
+        lock = threading.Lock()
+
+        def create(client=None, model=None, prompt=None):
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return _completion_response(prompt)
+
+        prompts = [str(i) for i in range(10)] + ["fail"]
+        request_kwargs = ({"model": COMPLETION_MODEL_NAME, "prompt": prompt} for prompt in prompts)
+        with patch('databricks_genai_inference.Completion.create', side_effect=create):
+            results = Completion.create_many(request_kwargs, max_workers=3)
+        assert max_in_flight <= 3
+        assert [result.text[0] for result in results[:10]] == prompts[:10]
+        assert isinstance(results[10], FoundationModelAPIException)
+
+    def test_create_many_with_executor(self):
+        request_kwargs = [{"model": COMPLETION_MODEL_NAME, "prompt": prompt} for prompt in ["a", "b"]]
+        create = lambda client=None, model=None, prompt=None: _completion_response(prompt)
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                patch('databricks_genai_inference.Completion.create', side_effect=create):
+            results = Completion.create_many(request_kwargs, executor=executor)
+            assert not executor._shutdown
+        assert [result.text[0] for result in results] == ["A", "B"]
+
+    def test_create_as_completed(self):
+
+        def create(client=None, model=None, prompt=None):
+            time.sleep(0.05 if prompt == "slow" else 0)
+            return _completion_response(prompt)
+
+        request_kwargs = [{"model": COMPLETION_MODEL_NAME, "prompt": prompt} for prompt in ["slow", "fast"]]
+        with patch('databricks_genai_inference.Completion.create', side_effect=create):
+            completed = [(index, result.text[0]) for index, result in Completion.create_as_completed(request_kwargs)]
+        assert completed == [(1, "FAST"), (0, "SLOW")]
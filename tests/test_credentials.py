@@ -0,0 +1,65 @@
+import base64
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from databricks_genai_inference.api.credentials import CredentialCache, _jwt_expiry
+
+TEST_HOST_NAME = "https://test.cloud.databricks.com"
+
+
+def _make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+class TestCredentialCache:
+
+    @pytest.fixture
+    def mocked_config(self):
+        with patch('databricks_genai_inference.api.credentials._new_config') as config_cls:
+            config = MagicMock()
+            config.host = TEST_HOST_NAME
+            config.authenticate.return_value = {"Authorization": "Bearer dapi-test"}
+            config_cls.return_value = config
+            yield config_cls
+
+    def test_reuses_config_and_headers(self, mocked_config):
+        cache = CredentialCache()
+        first = cache.get(host=TEST_HOST_NAME)
+        second = cache.get(host=TEST_HOST_NAME)
+        assert first is second
+        assert first.host == TEST_HOST_NAME
+        assert first.headers == {"Authorization": "Bearer dapi-test"}
+        mocked_config.assert_called_once_with(host=TEST_HOST_NAME)
+        assert mocked_config.return_value.authenticate.call_count == 1
+
+    def test_invalidate(self, mocked_config):
+        cache = CredentialCache()
+        cache.get(host=TEST_HOST_NAME)
+        cache.invalidate(host=TEST_HOST_NAME)
+        cache.get(host=TEST_HOST_NAME)
+        assert mocked_config.call_count == 2
+
+    def test_refreshes_expiring_jwt(self, mocked_config):
+        config = mocked_config.return_value
+        config.authenticate.return_value = {"Authorization": f"Bearer {_make_jwt(time.time() + 30)}"}
+        cache = CredentialCache(expiry_skew=60)
+        cache.get(host=TEST_HOST_NAME)
+        cache.get(host=TEST_HOST_NAME)
+        assert config.authenticate.call_count == 2
+        assert mocked_config.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_aget(self, mocked_config):
+        cache = CredentialCache()
+        first = await cache.aget(host=TEST_HOST_NAME)
+        second = await cache.aget(host=TEST_HOST_NAME)
+        assert first is second
+
+    def test_jwt_expiry(self):
+        assert _jwt_expiry({"Authorization": f"Bearer {_make_jwt(123)}"}) == 123
+        assert _jwt_expiry({"Authorization": "Bearer dapi-test"}) is None
+        assert _jwt_expiry({}) is None
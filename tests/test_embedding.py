@@ -0,0 +1,166 @@
+import json
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from databricks_genai_inference import Embedding, EmbeddingObject, FoundationModelAPIException
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.embedding_store import EmbeddingStore
+from databricks_genai_inference.api.retry import RetryPolicy
+
+EMBEDDING_MODEL_NAME = "bge-large-en"
+BASE_RESOURCE = "databricks_genai_inference.api.abstract.foundation_model_api_resource.FoundationModelAPIResource"
+CREDENTIALS = Credentials(host="https://test.cloud.databricks.com", headers={}, expires_at=float('inf'))
+
+
+def _embedding_response(input, **kwargs):
+    return EmbeddingObject({
+        "id": "test",
+        "model": EMBEDDING_MODEL_NAME,
+        "data": [{
+            "index": i,
+            "embedding": [float(text)]
+        } for i, text in enumerate(input)],
+        "usage": {
+            "prompt_tokens": len(input),
+            "total_tokens": len(input)
+        },
+    })
+
+
+def _http_response(status_code, body=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.headers = {}
+    response.json.return_value = body
+    response.content = b''
+    return response
+
+
+class TestEmbeddingBatch:
+
+    @pytest.fixture(autouse=True)
+    def credentials(self):
+        with patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials',
+                   return_value=CREDENTIALS):
+            yield
+
+    @patch('databricks_genai_inference.Embedding.create', side_effect=_embedding_response)
+    def test_create_batch(self, mocked_request):
+        inputs = [str(i) for i in range(10)]
+        response = Embedding.create_batch(inputs, batch_size=3, concurrency=2, model=EMBEDDING_MODEL_NAME)
+        assert mocked_request.call_count == 4
+        assert response.embeddings == [[float(i)] for i in range(10)]
+        assert [data["index"] for data in response.json["data"]] == list(range(10))
+        assert response.usage == {"prompt_tokens": 10, "total_tokens": 10}
+
+    def test_create_batch_retries_sub_batch(self):
+        responses = {"3": [_http_response(HTTPStatus.TOO_MANY_REQUESTS)]}
+
+        def post(data, **kwargs):
+            inputs = json.loads(data)["input"]
+            failures = responses.get(inputs[0])
+            if failures:
+                return failures.pop()
+            return _http_response(HTTPStatus.OK, _embedding_response(inputs).response)
+
+        client = MagicMock()
+        client.post.side_effect = post
+        with patch.object(Embedding, 'retry_policy', RetryPolicy(min_wait=0, max_wait=0)):
+            response = Embedding.create_batch([str(i) for i in range(6)],
+                                              batch_size=3,
+                                              client=client,
+                                              model=EMBEDDING_MODEL_NAME)
+        assert client.post.call_count == 3
+        assert response.embeddings == [[float(i)] for i in range(6)]
+
+    @patch('databricks_genai_inference.Embedding.create', side_effect=_embedding_response)
+    def test_create_batch_sets_attempts(self, mocked_request):
+        Embedding.create_batch(["1", "2"], model=EMBEDDING_MODEL_NAME)
+        assert mocked_request.call_args.kwargs["max_retries"] == Embedding.BATCH_RETRIES + 1
+        Embedding.create_batch(["1", "2"], batch_retries=0, model=EMBEDDING_MODEL_NAME)
+        assert mocked_request.call_args.kwargs["max_retries"] == 1
+        Embedding.create_batch(["1", "2"], max_retries=5, model=EMBEDDING_MODEL_NAME)
+        assert mocked_request.call_args.kwargs["max_retries"] == 5
+
+    def test_create_batch_does_not_retry_invalid_input(self):
+        client = MagicMock()
+        client.post.return_value = _http_response(HTTPStatus.OK, _embedding_response(["1"]).response)
+        with pytest.raises(FoundationModelAPIException):
+            Embedding.create_batch(["a", 1, "b"], batch_size=2, client=client, model=EMBEDDING_MODEL_NAME)
+        assert all(json.loads(call.kwargs["data"])["input"] == ["b"] for call in client.post.call_args_list)
+
+    def test_create_batch_rejects_input(self):
+        with pytest.raises(FoundationModelAPIException, match="inputs"):
+            Embedding.create_batch(["1"], input=["2"], model=EMBEDDING_MODEL_NAME)
+
+    @pytest.mark.asyncio
+    @patch('databricks_genai_inference.Embedding.acreate', new_callable=AsyncMock, side_effect=_embedding_response)
+    async def test_acreate_batch(self, mocked_request):
+        inputs = [str(i) for i in range(10)]
+        response = await Embedding.acreate_batch(inputs, batch_size=4, concurrency=2, model=EMBEDDING_MODEL_NAME)
+        assert mocked_request.call_count == 3
+        assert response.embeddings == [[float(i)] for i in range(10)]
+
+
+class TestEmbeddingObject:
+
+    def test_as_array(self):
+        np = pytest.importorskip("numpy")
+        response = EmbeddingObject({"data": [{"embedding": [1.0, 2.0]}, {"embedding": [3.0, 4.0]}]})
+        array = response.as_array()
+        assert array.dtype == np.float32
+        assert array.shape == (2, 2)
+        assert array.flags.c_contiguous
+        np.testing.assert_array_equal(array, [[1.0, 2.0], [3.0, 4.0]])
+        assert response.as_array() is array
+        assert response.as_array(np.float64).dtype == np.float64
+
+    def test_as_array_empty(self):
+        pytest.importorskip("numpy")
+        assert EmbeddingObject({"data": []}).as_array().shape == (0, 0)
+
+
+class TestEmbeddingStore:
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        store = EmbeddingStore(str(tmp_path / "embeddings.db"))
+        monkeypatch.setattr(Embedding, "embedding_store", store)
+        yield store
+        store.close()
+
+    def test_get_many_and_put_many(self, store):
+        store.put_many("model", None, ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+        assert store.get_many("model", None, ["b", "c", "a"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+        assert store.get_many("model", "instruction", ["a"]) == [None]
+        assert store.get_many("other-model", None, ["a"]) == [None]
+
+    def test_persists_across_instances(self, store):
+        store.put_many("model", None, ["a"], [[1.0]])
+        reopened = EmbeddingStore(store.path)
+        assert reopened.get_many("model", None, ["a"]) == [[1.0]]
+        reopened.close()
+
+    @patch(f'{BASE_RESOURCE}._make_query')
+    def test_only_misses_are_sent(self, mocked_query, store):
+        mocked_query.side_effect = lambda client, model_input, endpoint: _embedding_response(model_input.input)
+        first = Embedding.create(model=EMBEDDING_MODEL_NAME, input=["1", "2"])
+        assert first.embeddings == [[1.0], [2.0]]
+        second = Embedding.create(model=EMBEDDING_MODEL_NAME, input=["2", "3", "3", "1"])
+        assert second.embeddings == [[2.0], [3.0], [3.0], [1.0]]
+        assert [call.args[1].input for call in mocked_query.call_args_list] == [["1", "2"], ["3"]]
+        Embedding.create(model=EMBEDDING_MODEL_NAME, input="3")
+        assert mocked_query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_async_only_misses_are_sent(self, store):
+        store.put_many(f"databricks-{EMBEDDING_MODEL_NAME}", None, ["1"], [[1.0]])
+        with patch(f'{BASE_RESOURCE}._amake_query',
+                   new_callable=AsyncMock,
+                   side_effect=lambda client, model_input, endpoint: _embedding_response(model_input.input)) as mocked:
+            response = await Embedding.acreate(model=EMBEDDING_MODEL_NAME, input=["1", "2"])
+        assert response.embeddings == [[1.0], [2.0]]
+        assert mocked.call_args.args[1].input == ["2"]
@@ -0,0 +1,91 @@
+import asyncio
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+
+from databricks_genai_inference import EmbeddingObject, FoundationModelAPIException
+from databricks_genai_inference.api.embedding_batcher import AsyncEmbeddingBatcher, EmbeddingBatcher
+
+EMBEDDING_MODEL_NAME = "bge-large-en"
+
+
+def _embedding_response(client=None, input=None, **kwargs):
+    return EmbeddingObject({
+        "model": EMBEDDING_MODEL_NAME,
+        "data": [{
+            "index": i,
+            "embedding": [float(text)]
+        } for i, text in enumerate(input)],
+        "usage": {
+            "prompt_tokens": len(input)
+        },
+    })
+
+
+async def _aembedding_response(client=None, input=None, **kwargs):
+    return _embedding_response(input=input)
+
+
+class TestEmbeddingBatcher:
+
+    @patch('databricks_genai_inference.Embedding.create', side_effect=_embedding_response)
+    def test_batches_and_splits(self, mocked_request):
+        with EmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_batch_size=4, max_wait_ms=100) as batcher:
+            texts = ["0", "1", "2", "3", "4", "4", "0", "5"]
+            futures = [batcher.submit(text) for text in texts]
+            results = [future.result() for future in futures]
+        assert [result.embeddings for result in results] == [[[float(text)]] for text in texts]
+        assert mocked_request.call_count == 2
+        assert mocked_request.call_args_list[0].kwargs["input"] == ["0", "1", "2", "3"]
+        # Duplicates within a batch are sent once.
+        assert mocked_request.call_args_list[1].kwargs["input"] == ["4", "0", "5"]
+        assert mocked_request.call_args_list[1].kwargs["model"] == EMBEDDING_MODEL_NAME
+
+    @patch('databricks_genai_inference.Embedding.create', side_effect=_embedding_response)
+    def test_sends_partial_batch_after_max_wait(self, mocked_request):
+        with EmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_wait_ms=10) as batcher:
+            assert batcher.embed("1").embeddings == [[1.0]]
+        mocked_request.assert_called_once()
+
+    @patch('databricks_genai_inference.Embedding.create',
+           side_effect=FoundationModelAPIException(status=HTTPStatus.BAD_REQUEST))
+    def test_errors_reach_every_caller(self, mocked_request):
+        with EmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_wait_ms=50) as batcher:
+            futures = [batcher.submit("1"), batcher.submit("2")]
+            for future in futures:
+                with pytest.raises(FoundationModelAPIException):
+                    future.result()
+
+    @patch('databricks_genai_inference.Embedding.create', side_effect=_embedding_response)
+    def test_cancelled_callers_are_skipped(self, mocked_request):
+        with EmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_wait_ms=50) as batcher:
+            cancelled, kept = batcher.submit("1"), batcher.submit("2")
+            assert cancelled.cancel()
+            assert kept.result(timeout=2).embeddings == [[2.0]]
+        assert mocked_request.call_args.kwargs["input"] == ["2"]
+
+    def test_submit_after_close(self):
+        batcher = EmbeddingBatcher(model=EMBEDDING_MODEL_NAME)
+        batcher.close()
+        with pytest.raises(RuntimeError):
+            batcher.submit("1")
+
+
+class TestAsyncEmbeddingBatcher:
+
+    @pytest.mark.asyncio
+    async def test_batches_and_splits(self):
+        with patch('databricks_genai_inference.Embedding.acreate', side_effect=_aembedding_response) as mocked_request:
+            async with AsyncEmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_batch_size=4, max_wait_ms=10) as batcher:
+                results = await asyncio.gather(*(batcher.embed(str(i)) for i in range(6)))
+        assert [result.embeddings for result in results] == [[[float(i)]] for i in range(6)]
+        assert [call.kwargs["input"] for call in mocked_request.call_args_list] == [["0", "1", "2", "3"], ["4", "5"]]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        with patch('databricks_genai_inference.Embedding.acreate',
+                   side_effect=FoundationModelAPIException(status=HTTPStatus.BAD_REQUEST)):
+            batcher = AsyncEmbeddingBatcher(model=EMBEDDING_MODEL_NAME, max_wait_ms=1)
+            results = await asyncio.gather(batcher.embed("1"), batcher.embed("2"), return_exceptions=True)
+        assert all(isinstance(result, FoundationModelAPIException) for result in results)
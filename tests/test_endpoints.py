@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletion, ChatCompletionObject
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.endpoints import (DATABRICKS_HOST_ENV, DATABRICKS_MODEL_URL_ENV, EndpointRegistry,
+                                                      get_endpoint_registry, remove_model_endpoint,
+                                                      set_model_endpoint)
+
+TEST_HOST_NAME = "https://test.cloud.databricks.com"
+CREDENTIALS = Credentials(host=TEST_HOST_NAME, headers={"Authorization": "Bearer token"}, expires_at=float('inf'))
+CHAT_COMPLETION_MESSAGES = [{"role": "user", "content": "Knock knock."}]
+CHAT_COMPLETION_RESPONSE = {"choices": [{"message": {"role": "assistant", "content": "Who's there?"}}]}
+SUPPORTED_MODELS = frozenset(["dbrx-instruct"])
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.delenv(DATABRICKS_MODEL_URL_ENV, raising=False)
+    monkeypatch.delenv(DATABRICKS_HOST_ENV, raising=False)
+    get_endpoint_registry().reload()
+    yield monkeypatch
+    get_endpoint_registry().clear()
+
+
+class TestEndpointRegistry:
+
+    def test_default_routing(self):
+        registry = EndpointRegistry()
+        assert registry.endpoint("dbrx-instruct", SUPPORTED_MODELS) == "databricks-dbrx-instruct"
+        assert registry.endpoint("my-finetuned-model", SUPPORTED_MODELS) == "my-finetuned-model"
+        assert registry.url("my-endpoint", TEST_HOST_NAME) == \
+            f"{TEST_HOST_NAME}/serving-endpoints/my-endpoint/invocations"
+
+    def test_overrides(self):
+        registry = EndpointRegistry()
+        registry.set("dbrx-instruct", endpoint="dbrx-provisioned")
+        registry.set("mixtral-8x7b-instruct", url="https://other.cloud.databricks.com/invocations")
+        assert registry.endpoint("dbrx-instruct", SUPPORTED_MODELS) == "dbrx-provisioned"
+        assert registry.url("dbrx-provisioned", TEST_HOST_NAME) == \
+            f"{TEST_HOST_NAME}/serving-endpoints/dbrx-provisioned/invocations"
+        assert registry.endpoint("mixtral-8x7b-instruct") == "mixtral-8x7b-instruct"
+        assert registry.url("mixtral-8x7b-instruct", TEST_HOST_NAME) == "https://other.cloud.databricks.com/invocations"
+        registry.remove("dbrx-instruct")
+        registry.remove("mixtral-8x7b-instruct")
+        assert registry.endpoint("dbrx-instruct", SUPPORTED_MODELS) == "databricks-dbrx-instruct"
+        assert registry.url("mixtral-8x7b-instruct", TEST_HOST_NAME).startswith(TEST_HOST_NAME)
+        with pytest.raises(ValueError):
+            registry.set("dbrx-instruct")
+
+    def test_environment_read_once(self, environment):
+        registry = EndpointRegistry()
+        environment.setenv(DATABRICKS_MODEL_URL_ENV, "https://model-url")
+        assert registry.url("endpoint", TEST_HOST_NAME) == f"{TEST_HOST_NAME}/serving-endpoints/endpoint/invocations"
+        registry.reload()
+        assert registry.url("endpoint", TEST_HOST_NAME) == "https://model-url"
+        registry.set("dbrx-instruct", url="https://model-specific-url")
+        assert registry.url("dbrx-instruct", TEST_HOST_NAME) == "https://model-specific-url"
+
+    def test_url_uses_credentials_host(self, environment):
+        environment.setenv(DATABRICKS_HOST_ENV, "https://env.cloud.databricks.com")
+        registry = EndpointRegistry()
+        environment.setenv(DATABRICKS_HOST_ENV, "https://other.cloud.databricks.com")
+        # The host the credentials were resolved for wins over any snapshot of DATABRICKS_HOST.
+        assert registry.url("endpoint", "https://other.cloud.databricks.com") == \
+            "https://other.cloud.databricks.com/serving-endpoints/endpoint/invocations"
+
+
+@patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.aget_credentials',
+       AsyncMock(return_value=CREDENTIALS))
+@patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials',
+       return_value=CREDENTIALS)
+class TestRouting:
+
+    @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response',
+           return_value=ChatCompletionObject(CHAT_COMPLETION_RESPONSE))
+    def test_sync_and_async_share_routes(self, mocked_request, mocked_credentials):
+        set_model_endpoint("dbrx-instruct", endpoint="dbrx-provisioned")
+        expected_url = f"{TEST_HOST_NAME}/serving-endpoints/dbrx-provisioned/invocations"
+        ChatCompletion.create(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES)
+        assert mocked_request.call_args.kwargs["url"] == expected_url
+        with patch('databricks_genai_inference.ChatCompletion._aget_non_streaming_response',
+                   return_value=ChatCompletionObject(CHAT_COMPLETION_RESPONSE)) as mocked_async_request:
+            asyncio.run(ChatCompletion.acreate(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES))
+        assert mocked_async_request.call_args.kwargs["url"] == expected_url
+        remove_model_endpoint("dbrx-instruct")
+        ChatCompletion.create(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES)
+        assert mocked_request.call_args.kwargs["url"] == \
+            f"{TEST_HOST_NAME}/serving-endpoints/databricks-dbrx-instruct/invocations"
+
+    @patch('databricks_genai_inference.ChatCompletion._make_query')
+    def test_endpoint_passed_to_query(self, mocked_query, mocked_credentials):
+        set_model_endpoint("dbrx-instruct", endpoint="dbrx-provisioned")
+        ChatCompletion.create(model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES)
+        assert mocked_query.call_args.args[2] == "dbrx-provisioned"
@@ -0,0 +1,113 @@
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletionObject, ChatSession
+from databricks_genai_inference.api.chat_history import MessageHistory
+from databricks_genai_inference.api.history_policy import (SUMMARY_HEADER, SlidingWindowPolicy, SummarizingPolicy,
+                                                           TokenBudgetPolicy, chat_summarizer)
+
+SYSTEM_MESSAGE = {"role": "system", "content": "Be brief."}
+CHAT_COMPLETION_RESPONSE = ChatCompletionObject({"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+
+def _history(turns):
+    history = MessageHistory([SYSTEM_MESSAGE])
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i}"})
+        history.append({"role": "assistant", "content": f"answer {i}"})
+    history.append({"role": "user", "content": "last question"})
+    return history
+
+
+def _contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_sliding_window_keeps_system_message():
+    selected = SlidingWindowPolicy(max_messages=3).select(_history(5))
+    assert _contents(selected) == ["Be brief.", "question 4", "answer 4", "last question"]
+
+
+def test_sliding_window_starts_on_a_user_message():
+    selected = SlidingWindowPolicy(max_messages=2).select(_history(5))
+    assert _contents(selected) == ["Be brief.", "last question"]
+
+
+def test_sliding_window_sends_short_history_as_is():
+    history = _history(1)
+    assert SlidingWindowPolicy(max_messages=10).select(history) == history
+
+
+def test_token_budget():
+    history = _history(5)
+    per_message = history[-1].tokens
+    selected = TokenBudgetPolicy(max_tokens=history[0].tokens + 3 * per_message).select(history)
+    assert _contents(selected) == ["Be brief.", "question 4", "answer 4", "last question"]
+
+
+def test_token_budget_always_sends_last_message():
+    assert _contents(TokenBudgetPolicy(max_tokens=1).select(_history(2))) == ["Be brief.", "last question"]
+
+
+def test_summarizing_policy():
+    summarizer = MagicMock(return_value="they talked")
+    policy = SummarizingPolicy(summarizer, max_tokens=60, keep_last=3)
+    history = _history(1)
+    assert policy.select(history) == history
+    summarizer.assert_not_called()
+
+    history = _history(5)
+    selected = policy.select(history)
+    summarizer.assert_called_once()
+    assert _contents(summarizer.call_args.args[0]) == _contents(history[1:9])
+    assert selected[0] == {"role": "system", "content": f"Be brief.\n\n{SUMMARY_HEADER}they talked"}
+    assert _contents(selected[1:]) == ["question 4", "answer 4", "last question"]
+
+    # The summary is reused until the budget is exceeded again.
+    history.append({"role": "assistant", "content": "answer"})
+    history.append({"role": "user", "content": "next"})
+    policy.select(history)
+    assert summarizer.call_count == 1
+
+
+@patch("databricks_genai_inference.ChatCompletion.create", return_value=CHAT_COMPLETION_RESPONSE)
+def test_chat_session_applies_policy(mocked_request):
+    chat = ChatSession("dbrx-instruct", "Be brief.", history_policy=SlidingWindowPolicy(max_messages=1))
+    for i in range(3):
+        chat.reply(f"question {i}")
+    assert _contents(mocked_request.call_args.kwargs["messages"]) == ["Be brief.", "question 2"]
+    assert len(chat.history) == 7
+
+
+@pytest.mark.asyncio
+@patch("databricks_genai_inference.ChatCompletion.acreate",
+       new_callable=AsyncMock,
+       return_value=ChatCompletionObject({"choices": [{"message": {"role": "assistant", "content": "they talked"}}]}))
+@patch("databricks_genai_inference.ChatCompletion.create")
+async def test_async_reply_awaits_chat_summarizer(mocked_create, mocked_acreate):
+    policy = SummarizingPolicy(chat_summarizer("dbrx-instruct"), max_tokens=60, keep_last=3)
+    chat = ChatSession("dbrx-instruct", "Be brief.", history_policy=policy)
+    for message in _history(5)[1:-1]:
+        chat.history.append(message)
+    await chat.areply("last question")
+    mocked_create.assert_not_called()
+    assert mocked_acreate.call_count == 2
+    assert policy.summary == "they talked"
+    assert _contents(mocked_acreate.call_args.kwargs["messages"]) == [
+        f"Be brief.\n\n{SUMMARY_HEADER}they talked", "question 4", "answer 4", "last question"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_select_runs_plain_summarizer_in_a_thread():
+    threads = []
+
+    def summarizer(messages):
+        threads.append(threading.current_thread())
+        return "they talked"
+
+    selected = await SummarizingPolicy(summarizer, max_tokens=60, keep_last=3).aselect(_history(5))
+    assert threads and threads[0] is not threading.main_thread()
+    assert _contents(selected[1:]) == ["question 4", "answer 4", "last question"]
@@ -0,0 +1,171 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from databricks_genai_inference import ChatCompletion, FoundationModelAPIException
+from databricks_genai_inference.api.abstract.foundation_model_api_resource import FoundationModelAPIResource
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.hooks import RequestHook, current_trace, get_hooks
+from databricks_genai_inference.api.retry import RetryPolicy
+
+CREDENTIALS = Credentials(host="https://test.cloud.databricks.com", headers={}, expires_at=float('inf'))
+CHAT_COMPLETION_MESSAGES = [{"role": "user", "content": "Knock knock."}]
+CHAT_COMPLETION_RESPONSE = {
+    "choices": [{
+        "message": {
+            "role": "assistant",
+            "content": "Who's there?"
+        }
+    }],
+    "usage": {
+        "prompt_tokens": 3,
+        "completion_tokens": 4,
+        "total_tokens": 7
+    }
+}
+SSE_STREAM = b"".join(f"data: {json.dumps({'choices': [{'delta': {'content': str(i)}}]})}\n\n".encode()
+                      for i in range(3)) + b"data: [DONE]\n\n"
+
+
+class RecordingHook(RequestHook):
+
+    def __init__(self):
+        self.events = []
+        self.traces = []
+
+    def on_request_start(self, trace):
+        self.events.append('request_start')
+        self.traces.append(trace)
+
+    def on_response_headers(self, trace):
+        self.events.append('response_headers')
+
+    def on_first_chunk(self, trace, chunk):
+        self.events.append('first_chunk')
+
+    def on_chunk(self, trace, chunk):
+        self.events.append('chunk')
+
+    def on_complete(self, trace, response):
+        self.events.append('complete')
+
+    def on_error(self, trace, error):
+        self.events.append('error')
+
+
+def _response(status_code, body=None, content=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.__bool__.return_value = status_code < 400
+    response.headers = {'x-request-id': 'test'}
+    response.json.return_value = body
+    response.text = json.dumps(body)
+    response.iter_content.return_value = iter([content or b''])
+    return response
+
+
+@pytest.fixture(autouse=True)
+def hook():
+    hook = RecordingHook()
+    ChatCompletion.add_hook(hook)
+    with patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials',
+               return_value=CREDENTIALS), \
+            patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.aget_credentials',
+                  AsyncMock(return_value=CREDENTIALS)), \
+            patch.object(ChatCompletion, 'retry_policy', RetryPolicy(min_wait=0, max_wait=0)):
+        yield hook
+    ChatCompletion.remove_hook(hook)
+
+
+class TestHooks:
+
+    def test_registration(self, hook):
+        base_hook = RequestHook()
+        FoundationModelAPIResource.add_hook(base_hook)
+        try:
+            assert get_hooks(ChatCompletion) == (base_hook, hook)
+        finally:
+            FoundationModelAPIResource.remove_hook(base_hook)
+        assert get_hooks(ChatCompletion) == (hook,)
+        assert get_hooks(FoundationModelAPIResource) == ()
+
+    def test_non_streaming(self, hook):
+        client = MagicMock()
+        client.post.side_effect = [_response(503, {}), _response(200, CHAT_COMPLETION_RESPONSE)]
+        ChatCompletion.create(client=client, model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES, max_retries=2)
+        assert hook.events == ['request_start', 'response_headers', 'complete']
+        trace = hook.traces[0]
+        assert (trace.resource, trace.endpoint, trace.status, trace.retries) == \
+            ('ChatCompletion', 'databricks-dbrx-instruct', 200, 1)
+        assert trace.headers == {'x-request-id': 'test'}
+        assert trace.usage == CHAT_COMPLETION_RESPONSE["usage"]
+        assert 0 <= trace.auth_time <= trace.ttfb <= trace.total_time
+        assert trace.send_time <= trace.ttfb
+        assert trace.tokens_per_second is None
+        assert current_trace() is None
+
+    def test_streaming(self, hook):
+        client = MagicMock()
+        client.post.return_value = _response(200, content=SSE_STREAM)
+        chunks = ChatCompletion.create(client=client,
+                                       model="dbrx-instruct",
+                                       messages=CHAT_COMPLETION_MESSAGES,
+                                       stream=True)
+        assert hook.events == ['request_start']
+        assert [chunk.message for chunk in chunks] == ['0', '1', '2']
+        assert hook.events == [
+            'request_start', 'response_headers', 'first_chunk', 'chunk', 'chunk', 'chunk', 'complete'
+        ]
+        trace = hook.traces[0]
+        assert trace.stream and trace.chunks == 3
+        assert trace.ttfb <= trace.ttft <= trace.total_time
+
+    def test_error(self, hook):
+        client = MagicMock()
+        client.post.return_value = _response(400, {"message": "bad request"})
+        with pytest.raises(FoundationModelAPIException):
+            ChatCompletion.create(client=client, model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES)
+        assert hook.events == ['request_start', 'response_headers', 'error']
+        assert hook.traces[0].status == 400
+        assert isinstance(hook.traces[0].error, FoundationModelAPIException)
+
+    def test_failing_hook_is_ignored(self, hook):
+        failing_hook = RequestHook()
+        failing_hook.on_request_start = MagicMock(side_effect=RuntimeError)
+        ChatCompletion.add_hook(failing_hook)
+        client = MagicMock()
+        client.post.return_value = _response(200, CHAT_COMPLETION_RESPONSE)
+        try:
+            response = ChatCompletion.create(client=client, model="dbrx-instruct", messages=CHAT_COMPLETION_MESSAGES)
+        finally:
+            ChatCompletion.remove_hook(failing_hook)
+        assert response.message == "Who's there?"
+        assert hook.events == ['request_start', 'response_headers', 'complete']
+
+    @pytest.mark.asyncio
+    async def test_async(self, hook):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=CHAT_COMPLETION_RESPONSE))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await ChatCompletion.acreate(client=client,
+                                                    model="dbrx-instruct",
+                                                    messages=CHAT_COMPLETION_MESSAGES)
+        assert response.message == "Who's there?"
+        assert hook.events == ['request_start', 'response_headers', 'complete']
+        assert hook.traces[0].status == 200
+
+    @pytest.mark.asyncio
+    async def test_async_streaming(self, hook):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=SSE_STREAM))
+        async with httpx.AsyncClient(transport=transport) as client:
+            chunks = await ChatCompletion.acreate(client=client,
+                                                  model="dbrx-instruct",
+                                                  messages=CHAT_COMPLETION_MESSAGES,
+                                                  stream=True)
+            assert [chunk.message async for chunk in chunks] == ['0', '1', '2']
+        assert hook.events == [
+            'request_start', 'response_headers', 'first_chunk', 'chunk', 'chunk', 'chunk', 'complete'
+        ]
+        assert hook.traces[0].tokens_per_second > 0
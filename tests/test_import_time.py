@@ -0,0 +1,35 @@
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ("databricks.sdk", "requests", "httpx", "pydantic", "tenacity")
+# Generous bound on the package import, which should only load the package itself.
+MAX_PACKAGE_IMPORT_US = 100_000
+
+
+def _imported_modules(statement):
+    """
+    Runs `statement` in a fresh interpreter with `-X importtime`, returning the cumulative microseconds per module.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", line)
+        if match:
+            modules[match.group(3)] = int(match.group(1))
+    return modules
+
+
+def test_package_import_is_lazy():
+    modules = _imported_modules("import databricks_genai_inference")
+    assert not [module for module in modules if module.startswith(HEAVY_MODULES)]
+    assert modules["databricks_genai_inference"] < MAX_PACKAGE_IMPORT_US
+
+
+def test_resource_import_does_not_load_databricks_sdk():
+    modules = _imported_modules("from databricks_genai_inference import ChatCompletion, Embedding")
+    assert "pydantic" in modules
+    assert not [module for module in modules if module.startswith("databricks.sdk")]
@@ -187,3 +187,24 @@ class TestInputValidation:
         with pytest.raises(FoundationModelAPIException) as error:
             Embedding.create(model=EMBEDDING_MODEL_NAME, input=EMBEDDING_INPUT_1, stream=True)
         assert "validation error" in str(error.value), "embedding model does not support streaming"
+
+    @patch('databricks_genai_inference.ChatCompletion._make_query')
+    def test_chat_completion_messages_not_copied(self, mocked_request):
+        ChatCompletion.create(model=CHAT_COMPLETION_MODEL_NAME, messages=CHAT_COMPLETION_MESSAGES)
+        model_input = mocked_request.call_args.args[1]
+        assert all(sent is message for sent, message in zip(model_input.messages, CHAT_COMPLETION_MESSAGES))
+        assert ChatCompletion._request_body(model_input) == {
+            "model": CHAT_COMPLETION_MODEL_NAME,
+            "messages": CHAT_COMPLETION_MESSAGES
+        }
+
+        with pytest.raises(FoundationModelAPIException) as error:
+            ChatCompletion.create(model=CHAT_COMPLETION_MODEL_NAME, messages=["not a message"])
+        assert "validation error" in str(error.value), "messages that are not dicts should raise validation error"
+
+    @patch('databricks_genai_inference.ChatCompletion._make_query')
+    def test_chat_completion_unknown_parameter(self, mocked_request):
+        with pytest.raises(FoundationModelAPIException) as error:
+            ChatCompletion.create(model=CHAT_COMPLETION_MODEL_NAME, messages=CHAT_COMPLETION_MESSAGES, max_token=5)
+        assert "max_token" in str(error.value), "misspelled parameters should raise validation error"
+        mocked_request.assert_not_called()
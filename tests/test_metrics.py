@@ -0,0 +1,112 @@
+import threading
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletion, FoundationModelAPIException
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.hooks import RequestTrace, get_hooks
+from databricks_genai_inference.api.metrics import MetricsRegistry, disable_metrics, enable_metrics, get_metrics
+
+CREDENTIALS = Credentials(host="https://test.cloud.databricks.com", headers={}, expires_at=float('inf'))
+USAGE = {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}
+
+
+def _trace(endpoint="endpoint", total_time=0.2, ttft=None, retries=0, status=200, usage=None):
+    trace = RequestTrace((), "ChatCompletion", endpoint, started=0.0)
+    trace.total_time = total_time
+    trace.ttft = ttft
+    trace.retries = retries
+    trace.status = status
+    trace.usage = usage
+    return trace
+
+
+class TestMetricsRegistry:
+
+    def test_records(self):
+        metrics = MetricsRegistry(latency_buckets=(0.1, 1.0))
+        metrics.on_complete(_trace(usage=USAGE, ttft=0.05), None)
+        metrics.on_complete(_trace(total_time=2.0, retries=2, usage=USAGE), None)
+        metrics.on_error(_trace(status=HTTPStatus.TOO_MANY_REQUESTS), FoundationModelAPIException(message="error"))
+        metrics.on_error(_trace(status=None), FoundationModelAPIException(message="error"))
+        snapshot = metrics.snapshot()["endpoint"]
+        assert (snapshot.requests, snapshot.retries, snapshot.prompt_tokens, snapshot.completion_tokens) == (4, 2, 6, 8)
+        assert snapshot.errors == {429: 1, 0: 1}
+        assert snapshot.latency.counts == [0, 3, 1]
+        assert snapshot.ttft.counts == [1, 0, 0]
+
+    def test_threads_are_merged(self):
+        metrics = MetricsRegistry()
+
+        def record():
+            for _ in range(1000):
+                metrics.on_complete(_trace(usage=USAGE), None)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = metrics.snapshot()["endpoint"]
+        assert snapshot.requests == 4000
+        assert snapshot.latency.count == 4000
+        assert snapshot.completion_tokens == 16000
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_finished_threads_are_retired(self):
+        metrics = MetricsRegistry()
+        for _ in range(20):
+            thread = threading.Thread(target=metrics.on_complete, args=(_trace(usage=USAGE), None))
+            thread.start()
+            thread.join()
+        metrics.on_complete(_trace(usage=USAGE), None)
+        assert len(metrics._shards) == 1
+        snapshot = metrics.snapshot()["endpoint"]
+        assert (snapshot.requests, snapshot.completion_tokens) == (21, 84)
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_prometheus(self):
+        metrics = MetricsRegistry(latency_buckets=(0.1, 1.0))
+        metrics.on_complete(_trace(endpoint='my "endpoint"', usage=USAGE, ttft=0.05), None)
+        metrics.on_error(_trace(endpoint='my "endpoint"', status=503), FoundationModelAPIException(message="error"))
+        text = metrics.to_prometheus()
+        assert '# TYPE databricks_genai_requests_total counter' in text
+        assert 'databricks_genai_requests_total{endpoint="my \\"endpoint\\""} 2' in text
+        assert 'databricks_genai_errors_total{endpoint="my \\"endpoint\\"",status="503"} 1' in text
+        assert 'databricks_genai_completion_tokens_total{endpoint="my \\"endpoint\\""} 4' in text
+        assert 'databricks_genai_request_duration_seconds_bucket{endpoint="my \\"endpoint\\"",le="0.1"} 0' in text
+        assert 'databricks_genai_request_duration_seconds_bucket{endpoint="my \\"endpoint\\"",le="+Inf"} 2' in text
+        assert 'databricks_genai_time_to_first_token_seconds_count{endpoint="my \\"endpoint\\""} 1' in text
+        assert text.endswith('\n')
+
+
+class TestEnableMetrics:
+
+    @pytest.fixture(autouse=True)
+    def metrics(self):
+        yield enable_metrics()
+        disable_metrics()
+
+    @patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials',
+           return_value=CREDENTIALS)
+    def test_records_requests(self, mocked_credentials, metrics):
+        response = MagicMock()
+        response.status_code = 200
+        response.ok = True
+        response.json.return_value = {"choices": [{"message": {"role": "assistant", "content": "Hi"}}], "usage": USAGE}
+        client = MagicMock()
+        client.post.return_value = response
+        ChatCompletion.create(client=client, model="dbrx-instruct", messages=[{"role": "user", "content": "Hi"}])
+        snapshot = metrics.snapshot()["databricks-dbrx-instruct"]
+        assert (snapshot.requests, snapshot.prompt_tokens, snapshot.completion_tokens) == (1, 3, 4)
+
+    def test_disable(self, metrics):
+        assert get_metrics() is metrics
+        assert metrics in get_hooks(ChatCompletion)
+        disable_metrics()
+        assert get_metrics() is None
+        assert metrics not in get_hooks(ChatCompletion)
@@ -0,0 +1,100 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletion, ChatCompletionObject, Embedding
+from databricks_genai_inference.api.chat_history import MessageHistory
+from databricks_genai_inference.api.credentials import Credentials
+from databricks_genai_inference.api.endpoints import get_endpoint_registry
+from databricks_genai_inference.api.exception import FoundationModelAPIException
+from databricks_genai_inference.api.util import dumps_json
+
+TEST_HOST_NAME = "https://test.cloud.databricks.com"
+CREDENTIALS = Credentials(host=TEST_HOST_NAME, headers={"Authorization": "Bearer token"}, expires_at=float('inf'))
+CHAT_COMPLETION_MESSAGES = [{"role": "user", "content": "Knock knock."}]
+CHAT_COMPLETION_RESPONSE = {"choices": [{"message": {"role": "assistant", "content": "Who's there?"}}]}
+EXPECTED_URL = f'{TEST_HOST_NAME}/serving-endpoints/databricks-dbrx-instruct/invocations'
+EXPECTED_HEADERS = {
+    'Authorization': 'Bearer token',
+    'Content-Type': 'application/json',
+    'X-Databricks-Endpoints-API-Client': 'Generative AI Inference (Mosaic) SDK'
+}
+
+
+@pytest.fixture(autouse=True)
+def credentials(monkeypatch):
+    monkeypatch.delenv('DATABRICKS_MODEL_URL', raising=False)
+    monkeypatch.delenv('DATABRICKS_HOST', raising=False)
+    get_endpoint_registry().reload()
+    with patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials',
+               return_value=CREDENTIALS) as mocked_credentials, \
+            patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.aget_credentials',
+                  AsyncMock(return_value=CREDENTIALS)):
+        yield mocked_credentials
+
+
+class TestPreparedRequest:
+
+    @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response',
+           return_value=ChatCompletionObject(CHAT_COMPLETION_RESPONSE))
+    def test_call(self, mocked_request):
+        chat = ChatCompletion.prepare(model="dbrx-instruct", temperature=0.5, max_tokens=10, timeout=5)
+        response = chat(messages=CHAT_COMPLETION_MESSAGES)
+        assert response.message == "Who's there?"
+        mocked_request.assert_called_once_with(client=None,
+                                               url=EXPECTED_URL,
+                                               headers=EXPECTED_HEADERS,
+                                               json={
+                                                   "temperature": 0.5,
+                                                   "max_tokens": 10,
+                                                   "messages": CHAT_COMPLETION_MESSAGES
+                                               },
+                                               timeout=5,
+                                               max_retries=ChatCompletion.MAX_RETRIES)
+
+    @patch('databricks_genai_inference.ChatCompletion._aget_non_streaming_response',
+           return_value=ChatCompletionObject(CHAT_COMPLETION_RESPONSE))
+    def test_acall(self, mocked_request):
+        chat = ChatCompletion.prepare(model="dbrx-instruct", temperature=0.5)
+        response = asyncio.run(chat.acall(messages=CHAT_COMPLETION_MESSAGES, max_retries=1))
+        assert response.message == "Who's there?"
+        kwargs = mocked_request.call_args.kwargs
+        assert kwargs["url"] == EXPECTED_URL
+        assert kwargs["json"] == {"temperature": 0.5, "messages": CHAT_COMPLETION_MESSAGES}
+        assert kwargs["timeout"] == ChatCompletion.DEFAULT_TIMEOUT
+        assert kwargs["max_retries"] == 1
+
+    def test_encoded_body(self):
+        chat = ChatCompletion.prepare(model="dbrx-instruct", temperature=0.5)
+        json, _, _ = chat._body({"messages": MessageHistory(CHAT_COMPLETION_MESSAGES)})
+        assert dumps_json(json) == b'{"temperature":0.5,"messages":[{"role":"user","content":"Knock knock."}]}'
+        json, _, _ = ChatCompletion.prepare(model="dbrx-instruct")._body({"messages": CHAT_COMPLETION_MESSAGES})
+        assert dumps_json(json) == b'{"messages":[{"role":"user","content":"Knock knock."}]}'
+
+    def test_target_follows_credentials(self, credentials):
+        chat = ChatCompletion.prepare(model="dbrx-instruct")
+        url, headers = chat.target(CREDENTIALS)
+        assert chat.target(CREDENTIALS)[1] is headers
+        refreshed = CREDENTIALS._replace(headers={"Authorization": "Bearer refreshed"})
+        assert chat.target(refreshed) == (url, {**EXPECTED_HEADERS, "Authorization": "Bearer refreshed"})
+
+    def test_invalid_parameters(self):
+        with pytest.raises(FoundationModelAPIException, match="validation error"):
+            ChatCompletion.prepare(model="dbrx-instruct", temperature="hot")
+        with pytest.raises(FoundationModelAPIException, match="fixed model"):
+            ChatCompletion.prepare(temperature=0.5)
+        chat = ChatCompletion.prepare(model="dbrx-instruct", temperature=0.5)
+        with pytest.raises(FoundationModelAPIException, match="validation error"):
+            chat(temperature=1.0, messages=CHAT_COMPLETION_MESSAGES)
+        with pytest.raises(FoundationModelAPIException, match="validation error"):
+            chat()
+
+    @patch('databricks_genai_inference.Embedding._make_query')
+    def test_embedding_store(self, mocked_query):
+        with patch.object(Embedding, 'embedding_store', object()):
+            Embedding.prepare(model="bge-large-en", instruction="Represent this")(input="text")
+        model_input, endpoint = mocked_query.call_args.args[1:]
+        assert endpoint == "databricks-bge-large-en"
+        assert model_input.input == "text"
+        assert model_input.instruction == "Represent this"
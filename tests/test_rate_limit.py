@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+
+from databricks_genai_inference import ChatCompletion
+from databricks_genai_inference.api.rate_limit import (RateLimiter, TokenBucket, estimate_request_tokens,
+                                                       remove_rate_limit, set_rate_limit)
+
+TEST_ENDPOINT = "databricks-dbrx-instruct"
+
+
+class TestTokenBucket:
+
+    @patch('databricks_genai_inference.api.rate_limit.time.monotonic', return_value=100.0)
+    def test_reserve(self, mocked_monotonic):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == 0.5
+        assert bucket.reserve(1) == 1.0
+        mocked_monotonic.return_value = 101.0
+        assert bucket.reserve(1) == 0.5
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+
+class TestRateLimiter:
+
+    @patch('databricks_genai_inference.api.rate_limit.time.sleep')
+    def test_acquire_throttles_tokens(self, mocked_sleep):
+        rate_limiter = RateLimiter(tokens_per_minute=600)
+        rate_limiter.acquire(tokens=600)
+        mocked_sleep.assert_not_called()
+        rate_limiter.acquire(tokens=10)
+        assert mocked_sleep.call_args.args[0] == pytest.approx(1, abs=0.05)
+
+    @pytest.mark.asyncio
+    @patch('databricks_genai_inference.api.rate_limit.asyncio.sleep')
+    async def test_aacquire_throttles_requests(self, mocked_sleep):
+        rate_limiter = RateLimiter(requests_per_second=10, burst=1)
+        await rate_limiter.aacquire()
+        mocked_sleep.assert_not_called()
+        await rate_limiter.aacquire()
+        assert mocked_sleep.call_args.args[0] == pytest.approx(0.1, abs=0.01)
+
+    @patch('databricks_genai_inference.ChatCompletion._get_non_streaming_response')
+    @patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials')
+    def test_create_acquires_endpoint_limit(self, mocked_credentials, mocked_request):
+        rate_limiter = set_rate_limit(TEST_ENDPOINT, requests_per_second=1)
+        try:
+            with patch.object(rate_limiter, 'acquire') as mocked_acquire:
+                ChatCompletion.create(model="dbrx-instruct",
+                                      messages=[{
+                                          "role": "user",
+                                          "content": "12345678"
+                                      }],
+                                      max_tokens=10)
+            mocked_acquire.assert_called_once_with(12)
+        finally:
+            remove_rate_limit(TEST_ENDPOINT)
+
+
+def test_estimate_request_tokens():
+    assert estimate_request_tokens({"prompt": ["1234", "12345"], "max_tokens": 5}) == 8
+    assert estimate_request_tokens({"input": "123", "instruction": "1234"}) == 2
@@ -0,0 +1,89 @@
+from email.utils import formatdate
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+import requests
+
+from databricks_genai_inference.api.retry import RetryPolicy, parse_retry_after
+
+
+def _response(status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestRetryPolicy:
+
+    def test_retries_rate_limits_and_server_errors(self):
+        policy = RetryPolicy(min_wait=0, max_wait=0)
+        ok = _response(HTTPStatus.OK)
+        send_request = MagicMock(side_effect=[
+            _response(HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "0"}),
+            _response(HTTPStatus.SERVICE_UNAVAILABLE), ok
+        ])
+        assert policy.call(send_request, max_attempts=3, url="url") is ok
+        assert send_request.call_count == 3
+        assert policy.stats.as_dict() == {
+            "retries": 2,
+            "rate_limited": 1,
+            "server_errors": 1,
+            "connection_errors": 0,
+        }
+
+    def test_retries_connection_errors(self):
+        policy = RetryPolicy(min_wait=0, max_wait=0)
+        ok = _response(HTTPStatus.OK)
+        send_request = MagicMock(side_effect=[requests.exceptions.ConnectionError(), ok])
+        assert policy.call(send_request, max_attempts=2) is ok
+        assert policy.stats.connection_errors == 1
+
+    def test_gives_up(self):
+        policy = RetryPolicy(min_wait=0, max_wait=0)
+        error = _response(HTTPStatus.INTERNAL_SERVER_ERROR)
+        send_request = MagicMock(return_value=error)
+        assert policy.call(send_request, max_attempts=2) is error
+        assert send_request.call_count == 2
+        error.close.assert_called_once()
+
+        send_request = MagicMock(side_effect=requests.exceptions.ConnectionError())
+        with pytest.raises(requests.exceptions.ConnectionError):
+            policy.call(send_request, max_attempts=2)
+
+    def test_does_not_retry_client_errors(self):
+        policy = RetryPolicy(min_wait=0, max_wait=0)
+        send_request = MagicMock(return_value=_response(HTTPStatus.BAD_REQUEST))
+        policy.call(send_request, max_attempts=3)
+        assert send_request.call_count == 1
+        assert policy.stats.retries == 0
+
+    def test_honors_retry_after(self):
+        policy = RetryPolicy(max_retry_after=10)
+        retry_state = MagicMock()
+        retry_state.outcome.failed = False
+        retry_state.outcome.result.return_value = _response(HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "3"})
+        assert policy._wait(retry_state) == 3
+        retry_state.outcome.result.return_value = _response(HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "120"})
+        assert policy._wait(retry_state) == 10
+
+    def test_reuses_retryers(self):
+        policy = RetryPolicy()
+        assert policy._retryer(3, is_async=False) is policy._retryer(3, is_async=False)
+
+    @pytest.mark.asyncio
+    async def test_acall(self):
+        policy = RetryPolicy(min_wait=0, max_wait=0)
+        ok = _response(HTTPStatus.OK)
+        asend_request = AsyncMock(side_effect=[httpx.ConnectError("reset"), ok])
+        assert await policy.acall(asend_request, max_attempts=2) is ok
+        assert policy.stats.connection_errors == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 0 <= parse_retry_after(formatdate(usegmt=True)) <= 1
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+
+from databricks_genai_inference import Embedding, EmbeddingObject, FoundationModelAPIException
+from databricks_genai_inference.api.singleflight import (SingleFlight, disable_request_coalescing,
+                                                         enable_request_coalescing)
+
+EMBEDDING_RESPONSE = {"data": [{"index": 0, "embedding": [0.1, 0.2]}]}
+
+
+class TestSingleFlight:
+
+    def test_do_coalesces_concurrent_calls(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(single_flight.do, "key", fn)
+            started.wait()
+            waiters = [executor.submit(single_flight.do, "key", fn) for _ in range(3)]
+            results = [future.result() for future in [leader, *waiters]]
+        assert results == ["result"] * 4
+        assert len(calls) == 1
+        assert single_flight.stats == {"calls": 1, "coalesced": 3}
+        assert single_flight.do("key", lambda: "again") == "again"
+
+    def test_do_propagates_errors(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def fn():
+            started.set()
+            time.sleep(0.1)
+            raise FoundationModelAPIException(status=HTTPStatus.SERVICE_UNAVAILABLE)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", fn)
+            started.wait()
+            waiter = executor.submit(single_flight.do, "key", fn)
+            for future in (leader, waiter):
+                with pytest.raises(FoundationModelAPIException):
+                    future.result()
+        assert single_flight.stats == {"calls": 1, "coalesced": 1}
+
+    @pytest.mark.asyncio
+    async def test_ado_coalesces_concurrent_calls(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(single_flight.ado("key", fn) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert single_flight.stats == {"calls": 1, "coalesced": 4}
+
+    @pytest.mark.asyncio
+    async def test_ado_survives_leader_cancellation(self):
+        single_flight = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        leader = asyncio.ensure_future(single_flight.ado("key", fn))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(single_flight.ado("key", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "result"
+
+    def test_key_for(self):
+        assert SingleFlight.key_for("endpoint", {"input": "a"}, deterministic=True) is not None
+        assert SingleFlight.key_for("endpoint", {"stream": True}, deterministic=True) is None
+        assert SingleFlight.key_for("endpoint", {"temperature": 1}, deterministic=False) is None
+
+
+@patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.get_credentials')
+class TestRequestCoalescing:
+
+    @pytest.fixture(autouse=True)
+    def single_flight(self):
+        yield enable_request_coalescing()
+        disable_request_coalescing()
+
+    def test_embedding_coalesced(self, mocked_credentials, single_flight):
+
+        def slow_response(**kwargs):
+            time.sleep(0.1)
+            return EmbeddingObject(EMBEDDING_RESPONSE)
+
+        with patch('databricks_genai_inference.Embedding._get_non_streaming_response',
+                   side_effect=slow_response) as mocked_request, ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(Embedding.create, model="bge-large-en", input="text") for _ in range(4)]
+            results = [future.result() for future in futures]
+        assert mocked_request.call_count == 1
+        assert all(result.embeddings == [[0.1, 0.2]] for result in results)
+        assert single_flight.stats == {"calls": 1, "coalesced": 3}
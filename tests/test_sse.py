@@ -0,0 +1,134 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from databricks_genai_inference import ChatCompletion, ChatCompletionChunkObject, FoundationModelAPIException
+from databricks_genai_inference.api.sse import SSEDecoder, ServerSentEvent, aiter_json, iter_events, iter_json
+
+TEST_URL = "https://test.cloud.databricks.com/serving-endpoints/test/invocations"
+
+
+def _chunk(content):
+    return {"id": "test", "model": "test", "choices": [{"delta": {"content": content}}]}
+
+
+SSE_STREAM = b"".join(f"data: {json.dumps(_chunk(str(i)))}\r\n\r\n".encode()
+                     for i in range(5)) + b"data: [DONE]\r\n\r\n"
+
+
+def _split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestSSEDecoder:
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 64, len(SSE_STREAM)])
+    def test_chunk_boundaries(self, size):
+        assert list(iter_json(_split(SSE_STREAM, size))) == [_chunk(str(i)) for i in range(5)]
+
+    def test_line_breaks_split_across_chunks(self):
+        stream = b"data: a\r\n\r\ndata: b\r\rdata: c\n\n"
+        expected = [ServerSentEvent(data=data) for data in "abc"]
+        for i in range(len(stream)):
+            for j in range(i, len(stream)):
+                assert list(iter_events([stream[:i], stream[i:j], stream[j:]])) == expected
+
+    def test_long_event_in_small_reads(self):
+        decoder = SSEDecoder()
+        data = b"data: " + b"x" * 100000
+        assert all(decoder.feed(data[i:i + 10]) == [] for i in range(0, len(data), 10))
+        assert decoder.feed(b"\n") == []
+        assert decoder.feed(b"") == []
+        assert decoder.feed(b"\n") == [ServerSentEvent(data="x" * 100000)]
+
+    def test_fields_and_comments(self):
+        stream = b": keep-alive\n\nevent: delta\nid: 7\nretry: 100\ndata: line 1\ndata: line 2\n\ndata: last"
+        assert list(iter_events([stream])) == [
+            ServerSentEvent(data="line 1\nline 2", event="delta", id="7", retry=100),
+            ServerSentEvent(data="last", event=None, id="7", retry=100),
+        ]
+
+    def test_json_lines(self):
+        decoder = SSEDecoder()
+        assert decoder.feed(b'{"a": 1}\n{"b"') == [ServerSentEvent(data='{"a": 1}')]
+        assert decoder.feed(b': 2}\n') == [ServerSentEvent(data='{"b": 2}')]
+
+    def test_stops_at_done(self):
+        stream = b"data: {\"a\": 1}\n\ndata: [DONE]\n\ndata: {\"b\": 2}\n\n"
+        assert list(iter_json([stream])) == [{"a": 1}]
+
+    @pytest.mark.asyncio
+    async def test_aiter_json(self):
+
+        async def chunks():
+            for chunk in _split(SSE_STREAM, 5):
+                yield chunk
+
+        assert [data async for data in aiter_json(chunks())] == [_chunk(str(i)) for i in range(5)]
+
+
+class TestStreamingResponse:
+
+    @patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.send_request')
+    def test_streaming_response(self, mocked_send_request):
+        response = MagicMock()
+        response.__bool__.return_value = True
+        response.status_code = 200
+        response.iter_content.return_value = iter(_split(SSE_STREAM, 10))
+        mocked_send_request.return_value = response
+        chunks = list(
+            ChatCompletion._get_streaming_response(client=None,
+                                                   url=TEST_URL,
+                                                   headers={},
+                                                   json={},
+                                                   timeout=1,
+                                                   max_retries=1))
+        assert all(isinstance(chunk, ChatCompletionChunkObject) for chunk in chunks)
+        assert [chunk.message for chunk in chunks] == [str(i) for i in range(5)]
+        assert mocked_send_request.call_args.kwargs["stream"]
+        response.close.assert_called_once()
+
+    @patch('databricks_genai_inference.api.abstract.foundation_model_api_resource.send_request')
+    def test_streaming_response_invalid_json(self, mocked_send_request):
+        response = MagicMock()
+        response.__bool__.return_value = True
+        response.status_code = 200
+        response.iter_content.return_value = iter([b"data: {invalid\n\n"])
+        mocked_send_request.return_value = response
+        with pytest.raises(FoundationModelAPIException):
+            list(
+                ChatCompletion._get_streaming_response(client=None,
+                                                       url=TEST_URL,
+                                                       headers={},
+                                                       json={},
+                                                       timeout=1,
+                                                       max_retries=1))
+
+    @pytest.mark.asyncio
+    async def test_async_streaming_response(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=SSE_STREAM))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await ChatCompletion._aget_streaming_response(client=client,
+                                                                     url=TEST_URL,
+                                                                     headers={},
+                                                                     json={},
+                                                                     timeout=1,
+                                                                     max_retries=1)
+            assert [chunk.message async for chunk in response] == [str(i) for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_async_streaming_error(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(400, content=b"bad request"))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await ChatCompletion._aget_streaming_response(client=client,
+                                                                     url=TEST_URL,
+                                                                     headers={},
+                                                                     json={},
+                                                                     timeout=1,
+                                                                     max_retries=1)
+            with pytest.raises(FoundationModelAPIException) as error:
+                async for _ in response:
+                    pass
+        assert error.value.message == "bad request"
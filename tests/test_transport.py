@@ -0,0 +1,91 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from databricks_genai_inference.api import transport
+from databricks_genai_inference.api.transport import AsyncConnectionPool, ConnectionPool
+from databricks_genai_inference.api.util import asend_request, send_request
+
+TEST_URL = "https://test.cloud.databricks.com/serving-endpoints/test/invocations"
+
+
+class TestConnectionPool:
+
+    def test_reuses_session(self):
+        pool = ConnectionPool()
+        with patch.object(ConnectionPool, '_new_session', return_value=MagicMock()) as new_session:
+            pool.post(url=TEST_URL)
+            pool.post(url=TEST_URL)
+        assert new_session.call_count == 1
+
+    def test_evicts_idle_connections(self):
+        pool = ConnectionPool(idle_timeout=0)
+        with patch.object(ConnectionPool, '_new_session', side_effect=lambda: MagicMock()) as new_session:
+            pool.post(url=TEST_URL)
+            first_session = pool._session
+            pool._last_used -= 1
+            pool.post(url=TEST_URL)
+        assert new_session.call_count == 2
+        first_session.close.assert_called_once()
+
+    def test_max_connections_blocks(self):
+        adapter = ConnectionPool(max_connections=4)._new_session().get_adapter(TEST_URL)
+        assert adapter._pool_maxsize == 4
+        assert adapter._pool_block
+
+    def test_send_request_uses_default_pool(self):
+        pool = MagicMock()
+        with patch.object(transport, '_default_pool', pool):
+            send_request(client=None, url=TEST_URL, headers={}, json={"a": 1}, timeout=1)
+        pool.post.assert_called_once_with(url=TEST_URL, headers={}, data=b'{"a":1}', timeout=1, stream=False)
+
+
+class TestAsyncConnectionPool:
+
+    @pytest.mark.asyncio
+    async def test_reuses_client_within_loop(self):
+        pool = AsyncConnectionPool()
+        client = pool.get_client()
+        assert pool.get_client() is client
+        await pool.aclose()
+        assert client.is_closed
+        assert pool.get_client() is not client
+        await pool.aclose()
+
+    def test_client_per_event_loop(self):
+
+        async def get_client(pool):
+            return pool.get_client()
+
+        pool = AsyncConnectionPool()
+        assert asyncio.run(get_client(pool)) is not asyncio.run(get_client(pool))
+
+    def test_client_closed_when_loop_shuts_down(self):
+
+        async def get_client(pool):
+            return pool.get_client()
+
+        pool = AsyncConnectionPool()
+        client = asyncio.run(get_client(pool))
+        assert client.is_closed, "asyncio.run should close the client of its loop"
+
+        loop = asyncio.new_event_loop()
+        try:
+            client = loop.run_until_complete(get_client(pool))
+            assert not client.is_closed
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            assert client.is_closed
+        finally:
+            loop.close()
+
+    @pytest.mark.asyncio
+    async def test_asend_request_uses_default_pool(self):
+        pool = MagicMock()
+        pool.get_client.return_value.post = AsyncMock()
+        with patch.object(transport, '_default_async_pool', pool):
+            await asend_request(client=None, url=TEST_URL, headers={}, json={"a": 1}, timeout=1)
+        pool.get_client.return_value.post.assert_called_once_with(url=TEST_URL,
+                                                                  headers={},
+                                                                  content=b'{"a":1}',
+                                                                  timeout=1)